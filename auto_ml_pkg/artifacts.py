@@ -0,0 +1,312 @@
+import argparse
+import json
+import os
+import sys
+from dataclasses import asdict, is_dataclass
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Add project root (/files/auto_ml) to sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))   # folder: auto_ml/auto_ml_pkg
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                # folder: auto_ml
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Run artifacts: outputs/runs/<run id>/{manifest.json, <artifact>.npz}
+RUNS_DIR = os.path.join(PROJECT_ROOT, "outputs", "runs")
+ARTIFACT_FORMATS = ("binary", "csv", "both")
+
+# Artifact file layout (a compressed .npz archive, one member per array):
+#   index      row labels (datetime64[ns] for date indexes)
+#   c0, c1...  one member per column, so a column is read without the others
+# Column labels, index name and kind (frame / series) live in the run manifest.
+#
+# Usage:
+#   python auto_ml_pkg/artifacts.py list
+#   python auto_ml_pkg/artifacts.py export latest --out exported/     # CSV copies of a run
+#   python auto_ml_pkg/artifacts.py plot --experiment walkforward --workers 4
+#
+#   store = RunStore()
+#   store.run("latest", experiment="walkforward").load("predictions", columns=["TSLA"], start="2024-01-01")
+#   store.load("equity_curve", experiment="walkforward")              # all runs, stacked by run_id
+
+
+def _to_array(values) -> np.ndarray:
+    """Column values as a plain numpy array (object columns become fixed-width strings)."""
+    arr = np.asarray(values)
+    if arr.dtype == object:
+        arr = arr.astype(str)
+    return arr
+
+
+def write_frame(path: str, obj: pd.DataFrame | pd.Series) -> dict:
+    """
+    Write a DataFrame / Series as a compressed columnar .npz file (atomically).
+
+    Returns
+    -------
+    dict
+        Metadata to keep in the manifest: kind, columns, index name, shape.
+    """
+    kind = "series" if isinstance(obj, pd.Series) else "frame"
+    df = obj.to_frame() if kind == "series" else obj
+    members = {"index": _to_array(df.index)}
+    for i, c in enumerate(df.columns):
+        members[f"c{i}"] = _to_array(df.iloc[:, i].to_numpy())
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        np.savez_compressed(fh, **members)
+    os.replace(tmp, path)
+    return {
+        "kind": kind,
+        "columns": [str(c) for c in df.columns],
+        "name": str(obj.name) if kind == "series" and obj.name is not None else None,
+        "index_name": df.index.name,
+        "shape": list(df.shape),
+    }
+
+
+def read_frame(                                 # to load an artifact lazily (only the requested columns)
+    path: str,                                  # .npz file written by write_frame
+    meta: dict,                                 # its manifest entry
+    columns=None,                               # subset of column labels (default: all)
+    start=None,                                 # first index label to keep (date indexes: inclusive)
+    end=None,                                   # last index label to keep (inclusive)
+) -> pd.DataFrame | pd.Series:
+    """
+    Read an artifact written by `write_frame`. Only the index and the
+    requested columns are decompressed; rows are sliced on the index before
+    the columns are assembled.
+    """
+    all_cols = meta["columns"]
+    if columns is None:
+        wanted = list(range(len(all_cols)))
+    else:
+        pos = {c: i for i, c in enumerate(all_cols)}
+        missing = [c for c in columns if str(c) not in pos]
+        if missing:
+            raise KeyError(f"Columns {missing} not in artifact (available: {all_cols[:10]}...).")
+        wanted = [pos[str(c)] for c in columns]
+
+    with np.load(path, allow_pickle=False) as npz:
+        index = pd.Index(npz["index"], name=meta.get("index_name"))
+        if isinstance(index, pd.DatetimeIndex):
+            start = None if start is None else pd.Timestamp(start)
+            end = None if end is None else pd.Timestamp(end)
+        lo = 0 if start is None else int(index.searchsorted(start, side="left"))
+        hi = len(index) if end is None else int(index.searchsorted(end, side="right"))
+        rows = slice(lo, hi)
+        data = {all_cols[i]: npz[f"c{i}"][rows] for i in wanted}
+
+    df = pd.DataFrame(data, index=index[rows])
+    if meta["kind"] == "series" and columns is None:
+        return df.iloc[:, 0].rename(meta.get("name"))
+    return df
+
+
+def artifact_targets(fmt: str) -> tuple[bool, bool]:
+    """(write binary run store, write CSV files) for Config.artifacts."""
+    if fmt not in ARTIFACT_FORMATS:
+        raise ValueError(f"Unknown artifact format '{fmt}'. Use one of {ARTIFACT_FORMATS}.")
+    return fmt in ("binary", "both"), fmt in ("csv", "both")
+
+
+def new_run_id(experiment: str) -> str:
+    """Sortable run ID: <YYYYmmdd-HHMMSS-ffffff>-<experiment>."""
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{experiment}"
+
+
+class RunWriter:
+    """
+    Writes the artifacts of one run under `root/<run id>/` and records them
+    (with a snapshot of the Config) in `manifest.json`, which is rewritten
+    atomically after every artifact so a crashed run stays readable.
+    """
+
+    def __init__(self, experiment: str, cfg=None, root: str = RUNS_DIR, run_id: str | None = None):
+        self.run_id = run_id or new_run_id(experiment)
+        self.path = os.path.join(root, self.run_id)
+        os.makedirs(self.path, exist_ok=True)
+        self.manifest = {
+            "run_id": self.run_id,
+            "experiment": experiment,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "config": asdict(cfg) if is_dataclass(cfg) else (cfg or {}),
+            "artifacts": {},
+        }
+        self._write_manifest()
+
+    def save(self, name: str, obj: pd.DataFrame | pd.Series) -> str:
+        """Store one DataFrame / Series under `name`; returns the file path."""
+        path = os.path.join(self.path, f"{name}.npz")
+        meta = write_frame(path, obj)
+        self.manifest["artifacts"][name] = {**meta, "file": f"{name}.npz"}
+        self._write_manifest()
+        return path
+
+    def _write_manifest(self) -> None:
+        path = os.path.join(self.path, "manifest.json")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self.manifest, fh, indent=2, default=str)
+        os.replace(tmp, path)
+
+
+class RunReader:
+    """Read access to one stored run; artifacts are loaded on demand."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as fh:
+            self.manifest = json.load(fh)
+        self.run_id = self.manifest["run_id"]
+
+    @property
+    def config(self) -> dict:
+        return self.manifest["config"]
+
+    @property
+    def artifacts(self) -> list[str]:
+        return list(self.manifest["artifacts"])
+
+    def columns(self, name: str) -> list[str]:
+        return list(self._meta(name)["columns"])
+
+    def _meta(self, name: str) -> dict:
+        if name not in self.manifest["artifacts"]:
+            raise KeyError(f"Run '{self.run_id}' has no artifact '{name}'. Available: {self.artifacts}")
+        return self.manifest["artifacts"][name]
+
+    def load(self, name: str, columns=None, start=None, end=None) -> pd.DataFrame | pd.Series:
+        """Load (a slice of) one artifact; see `read_frame`."""
+        meta = self._meta(name)
+        return read_frame(os.path.join(self.path, meta["file"]), meta, columns=columns, start=start, end=end)
+
+    __getitem__ = load
+
+    def export_csv(self, out_dir: str | None = None, names=None) -> list[str]:
+        """Write artifacts as CSV files (default: next to the binary files)."""
+        out_dir = out_dir or self.path
+        os.makedirs(out_dir, exist_ok=True)
+        paths = []
+        for name in names or self.artifacts:
+            path = os.path.join(out_dir, f"{name}.csv")
+            self.load(name).to_csv(path)
+            paths.append(path)
+        return paths
+
+
+class RunStore:
+    """
+    All runs under `root`. Only manifests are read until an artifact is
+    requested, so listing and filtering many runs is cheap.
+    """
+
+    def __init__(self, root: str = RUNS_DIR):
+        self.root = root
+
+    def run_ids(self, experiment: str | None = None) -> list[str]:
+        """Run IDs (oldest first), optionally for one experiment."""
+        if not os.path.isdir(self.root):
+            return []
+        ids = sorted(
+            d for d in os.listdir(self.root)
+            if os.path.exists(os.path.join(self.root, d, "manifest.json"))
+        )
+        if experiment is not None:
+            ids = [i for i in ids if i.endswith(f"-{experiment}")]
+        return ids
+
+    def runs(self, experiment: str | None = None) -> pd.DataFrame:
+        """
+        Returns
+        -------
+        pd.DataFrame
+            One row per run: run_id, experiment, created, artifacts.
+        """
+        rows = []
+        for run_id in self.run_ids(experiment):
+            m = self.run(run_id).manifest
+            rows.append({
+                "run_id": run_id,
+                "experiment": m["experiment"],
+                "created": m["created"],
+                "artifacts": ",".join(m["artifacts"]),
+            })
+        return pd.DataFrame(rows, columns=["run_id", "experiment", "created", "artifacts"])
+
+    def run(self, run_id: str = "latest", experiment: str | None = None) -> RunReader:
+        """One run by ID, or the most recent one ('latest'), optionally for one experiment."""
+        if run_id == "latest":
+            ids = self.run_ids(experiment)
+            if not ids:
+                raise FileNotFoundError(f"No stored runs under '{self.root}'.")
+            run_id = ids[-1]
+        path = os.path.join(self.root, run_id)
+        if not os.path.exists(os.path.join(path, "manifest.json")):
+            raise FileNotFoundError(f"Unknown run '{run_id}' under '{self.root}'.")
+        return RunReader(path)
+
+    def load(self, name: str, run_ids=None, experiment: str | None = None, columns=None, start=None, end=None) -> pd.DataFrame:
+        """
+        The same artifact from several runs stacked with a `run_id` level
+        (runs without that artifact are skipped).
+        """
+        run_ids = run_ids or self.run_ids(experiment)
+        parts = {}
+        for run_id in run_ids:
+            reader = self.run(run_id)
+            if name in reader.artifacts:
+                obj = reader.load(name, columns=columns, start=start, end=end)
+                parts[run_id] = obj.to_frame() if isinstance(obj, pd.Series) else obj
+        if not parts:
+            return pd.DataFrame()
+        return pd.concat(parts, names=["run_id"])
+
+
+def store_run(experiment: str, cfg, artifacts: dict, root: str = RUNS_DIR) -> str:
+    """Write a new run with the given {name: DataFrame / Series}; returns its run ID."""
+    writer = RunWriter(experiment, cfg, root=root)
+    for name, obj in artifacts.items():
+        if obj is not None:
+            writer.save(name, obj)
+    return writer.run_id
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="List stored runs or export one run as CSV files.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ls = sub.add_parser("list", help="List stored runs.")
+    ls.add_argument("--experiment", default=None)
+    ex = sub.add_parser("export", help="Export the artifacts of a run as CSV.")
+    ex.add_argument("run_id", nargs="?", default="latest")
+    ex.add_argument("--experiment", default=None, help="With 'latest': most recent run of this experiment.")
+    ex.add_argument("--out", default=None, help="Output folder (default: the run folder).")
+    pl = sub.add_parser("plot", help="Render equity / scatter figures of many runs in a worker pool.")
+    pl.add_argument("run_ids", nargs="*", help="Runs to plot (default: all).")
+    pl.add_argument("--experiment", default=None)
+    pl.add_argument("--workers", type=int, default=None)
+    pl.add_argument("--out", default=os.path.join(PROJECT_ROOT, "outputs", "figures", "runs"))
+    args = parser.parse_args(argv)
+
+    store = RunStore()
+    if args.command == "list":
+        with pd.option_context("display.width", 160, "display.max_colwidth", 80):
+            print(store.runs(args.experiment).to_string(index=False))
+    elif args.command == "plot":
+        from auto_ml_pkg.viz import plot_run, render_batch
+        run_ids = args.run_ids or store.run_ids(args.experiment)
+        jobs = [(plot_run, (os.path.join(store.root, r), args.out), None) for r in run_ids]
+        done = render_batch(jobs, workers=args.workers)
+        print(f"[INFO] Plotted {done}/{len(jobs)} runs into {args.out}")
+    else:
+        for path in store.run(args.run_id, args.experiment).export_csv(args.out):
+            print(f"[INFO] Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
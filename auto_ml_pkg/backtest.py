@@ -1,15 +1,215 @@
+from dataclasses import dataclass
 import pandas as pd
 import numpy as np
 import sys, os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from auto_ml_pkg.profiling import traced
+from auto_ml_pkg.costs import CostArrays, cost_model_from_config
+from auto_ml_pkg.evaluate import max_drawdown
 
+
+def _float_dtype(*frames) -> np.dtype:
+    """Common float dtype of DataFrames (float32 only if every column is float32)."""
+    dtypes = [d for f in frames for d in np.atleast_1d(f.dtypes)]
+    return np.dtype(np.float32) if dtypes and all(d == np.float32 for d in dtypes) else np.dtype(np.float64)
+
+
+def align_panels(                               # to align predictions and realized returns on a common date × ticker grid
+    pred_scores: pd.DataFrame,                  # predicted excess returns
+    future_excess: pd.DataFrame,                # realized excess returns
+) -> tuple[pd.DatetimeIndex, pd.Index, np.ndarray, np.ndarray]:
+    """
+    Align predictions and realized excess returns on their common dates and tickers.
+
+    Returns
+    -------
+    tuple
+        (dates, tickers, S, R) where S and R are float arrays of shape
+        (n_dates, n_tickers), float32 if both inputs are float32 and float64
+        otherwise. Missing values are kept as NaN. `dates` is unnamed, like
+        the sorted date list of the original loop, so saved curves keep a
+        blank index header.
+    """
+    dates = pred_scores.index.intersection(future_excess.index).unique().sort_values().rename(None)
+    tickers = pred_scores.columns.intersection(future_excess.columns)
+    dtype = _float_dtype(pred_scores, future_excess)
+
+    S = pred_scores.reindex(index=dates, columns=tickers).to_numpy(dtype=dtype)
+    R = future_excess.reindex(index=dates, columns=tickers).to_numpy(dtype=dtype)
+    return dates, tickers, S, R
+
+
+def _prev_used(used: np.ndarray) -> np.ndarray:
+    """
+    For each row along the last axis, index of the previous used row (-1 if none).
+    """
+    m = used.shape[-1]
+    idx = np.where(used, np.arange(m), -1)                              # row index where used, -1 elsewhere
+    last = np.maximum.accumulate(idx, axis=-1)                          # last used row up to and including t
+    prev = np.full_like(last, -1)
+    prev[..., 1:] = last[..., :-1]                                      # shift by one: strictly before t
+    return prev
+
+
+def _trades(W: np.ndarray, valid: np.ndarray, used: np.ndarray) -> np.ndarray:
+    """
+    Absolute weight change of every name on each used row against the weights
+    of the previous used row (the date × ticker trade matrix).
+
+    Previous weights are restricted to the tickers valid at the current row
+    (same convention as reindexing the previous weights on today's universe).
+    The first used row has no trades.
+    """
+    prev = _prev_used(used)
+    W_prev = np.take_along_axis(W, np.clip(prev, 0, None)[..., None], axis=-2)
+    W_prev = np.where(valid, W_prev, 0.0)                               # drop names not tradable today
+    return np.where((used & (prev >= 0))[..., None], np.abs(W - W_prev), 0.0)
+
+
+def _turnover(W: np.ndarray, valid: np.ndarray, used: np.ndarray) -> np.ndarray:
+    """Turnover of each used row (half the sum of `_trades`); the first used row has zero turnover."""
+    return _trades(W, valid, used).sum(axis=-1) / 2.0
+
+
+def topk_weights(                               # to build equal-weight top-k weights for all rows at once
+    S: np.ndarray,                              # predicted scores (..., n_dates, n_tickers)
+    valid: np.ndarray,                          # tradable mask, same shape as S
+    top_k: int,                                 # number of names to hold
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Select the top-k valid names per row with `argpartition` and equal-weight them.
+
+    Rows with fewer than `top_k` valid names are not used (no rebalance).
+
+    Returns
+    -------
+    tuple
+        (W, used, picks): weight array shaped like S, boolean mask of used rows,
+        and the picked column indices (..., n_dates, top_k) sorted by
+        descending score.
+    """
+    if top_k < 1:
+        raise ValueError(f"top_k must be >= 1, got {top_k}.")
+
+    W = np.zeros(S.shape, dtype=S.dtype if S.dtype == np.float32 else np.float64)
+    used = valid.sum(axis=-1) >= top_k
+    if S.shape[-1] < top_k:
+        return W, used, np.zeros(S.shape[:-1] + (0,), dtype=np.intp)
+
+    keys = np.where(valid, S, -np.inf)                                  # invalid names can never be picked
+    part = np.argpartition(-keys, top_k - 1, axis=-1)[..., :top_k]      # unordered top-k per row
+    order = np.argsort(-np.take_along_axis(keys, part, axis=-1), axis=-1, kind="stable")
+    picks = np.take_along_axis(part, order, axis=-1)                    # top-k sorted by descending score
+
+    np.put_along_axis(W, picks, 1.0 / top_k, axis=-1)
+    W[~used] = 0.0                                                      # no position on skipped rows
+    return W, used, picks
+
+
+def topk_returns(                               # to run the top-k backtest directly on arrays
+    S: np.ndarray,                              # predicted scores on rebalance rows (..., n_rows, n_tickers)
+    R: np.ndarray,                              # realized excess returns, broadcastable to S
+    top_k: int,                                 # number of names to hold
+    transaction_cost_bps: float = 0.0,          # transaction cost in basis points
+    costs=None,                                 # costs.CostArrays on the same rows (per-ticker costs on top of the flat bps)
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Array engine behind `equity_curve`. Leading axes of `S` are independent
+    backtests (e.g. a batch of placebo signals) sharing the same realized returns.
+
+    Returns
+    -------
+    tuple
+        (net, turnover, used, cost), each of shape S.shape[:-1]. `net` is the
+        excess return after costs and `cost` the flat plus per-ticker cost
+        charged, both 0.0 on skipped rows.
+    """
+    R = np.broadcast_to(R, S.shape)
+    valid = ~np.isnan(S) & ~np.isnan(R)                                 # tickers with both prediction and realized return
+
+    # 1-2) Top-k selection and equal weights for every rebalance row
+    W, used, picks = topk_weights(S, valid, top_k)
+
+    # 3) Turnover vs previous weights
+    trades = _trades(W, valid, used)
+    turnover = trades.sum(axis=-1) / 2.0
+
+    # 4) Realized excess return of the portfolio (summed in pick order)
+    port_excess = (np.take_along_axis(R, picks, axis=-1) * (1.0 / top_k)).sum(axis=-1)
+
+    # 5) Transaction cost (bps → fraction), plus per-ticker spread / FX / impact costs
+    cost = transaction_cost_bps / 10000.0 * turnover
+    if costs is not None:
+        cost = cost + costs.charge(trades)
+    return np.where(used, port_excess - cost, 0.0), turnover, used, np.where(used, cost, 0.0)
+
+
+def weights_returns(                            # to backtest arbitrary weight matrices directly on arrays
+    W: np.ndarray,                              # portfolio weights on rebalance rows (..., n_rows, n_tickers)
+    R: np.ndarray,                              # realized excess returns, broadcastable to W
+    transaction_cost_bps: float = 0.0,          # transaction cost in basis points
+    costs=None,                                 # costs.CostArrays on the same rows (per-ticker costs on top of the flat bps)
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Same conventions as `topk_returns` for a given weight matrix: names with a
+    missing weight or realized return are not traded, rows without any position
+    are skipped, and turnover is measured against the previous traded row.
+
+    Returns
+    -------
+    tuple
+        (net, turnover, used, cost), each of shape W.shape[:-1].
+    """
+    R = np.broadcast_to(R, W.shape)
+    valid = ~np.isnan(W) & ~np.isnan(R)
+    W = np.where(valid, W, 0.0)
+    used = (W != 0.0).any(axis=-1)
+
+    trades = _trades(W, valid, used)
+    turnover = trades.sum(axis=-1) / 2.0
+    port_excess = (W * np.where(valid, R, 0.0)).sum(axis=-1)
+    cost = transaction_cost_bps / 10000.0 * turnover
+    if costs is not None:
+        cost = cost + costs.charge(trades)
+    return np.where(used, port_excess - cost, 0.0), turnover, used, np.where(used, cost, 0.0)
+
+
+@traced(cat="backtest")
+def weights_equity_curve(                       # to backtest a weight matrix given on rebalance dates
+    weights: pd.DataFrame,                      # target weights (rebalance dates × tickers)
+    future_excess: pd.DataFrame,                # realized excess returns
+    transaction_cost_bps: float = 0.0,          # transaction cost in basis points
+    cost_model=None,                            # costs.CostModel (per-ticker spread / FX / impact costs)
+) -> pd.Series:
+    """
+    Backtest pre-computed portfolio weights. Every row of `weights` is a
+    rebalance date; rows without positions are skipped (no rebalance).
+
+    Returns
+    -------
+    pd.Series
+        Cumulative growth of the strategy (×), in excess of the benchmark.
+    """
+    dates, tickers, W, R = align_panels(weights, future_excess)
+    if len(dates) == 0:
+        return pd.Series(dtype=float, name="equity_excess")
+
+    costs = cost_model.arrays(dates, tickers) if cost_model is not None else None
+    net, _, used, _ = weights_returns(W, R, transaction_cost_bps, costs)
+    equity = (1 + pd.Series(net[used], index=dates[used], dtype=float)).cumprod()
+    equity.name = "equity_excess"
+    return equity
+
+
+@traced(cat="backtest")
 def equity_curve(                               # to backtest a top-k long strategy based on predicted excess returns
     pred_scores: pd.DataFrame,                  # predicted excess returns
     future_excess: pd.DataFrame,                # realized excess returns
-    top_k: int = 5,                             # number of top tickers to hold 
+    top_k: int = 5,                             # number of top tickers to hold
     rebalance_every: int = 5,                   # rebalance frequency (in days)
     transaction_cost_bps: float = 0.0,          # transaction cost in basis points
+    cost_model=None,                            # costs.CostModel (per-ticker spread / FX / impact costs)
 ) -> pd.Series:
     """
     Backtest a top-k long strategy based on predicted EXCESS returns.
@@ -18,7 +218,10 @@ def equity_curve(                               # to backtest a top-k long strat
     - At each rebalance date, invests equally in the top_k tickers
       with the highest predicted excess return.
     - Uses realized excess returns in `future_excess` at those dates.
-    - Subtracts transaction costs proportional to turnover.
+    - Subtracts transaction costs proportional to turnover, plus the
+      per-ticker costs of `cost_model` on each name's weight change.
+
+    All rebalance dates are processed at once on aligned date × ticker arrays.
 
     Returns
     -------
@@ -26,75 +229,367 @@ def equity_curve(                               # to backtest a top-k long strat
         Cumulative growth of the strategy (×), in excess of the benchmark.
     """
 
-    # Common dates between predictions and realized excess
-    dates = sorted(set(pred_scores.index).intersection(future_excess.index))
-    if not dates:
+    # Common dates and tickers between predictions and realized excess
+    dates, tickers, S, R = align_panels(pred_scores, future_excess)
+    if len(dates) == 0:
         return pd.Series(dtype=float, name="equity_excess")
 
-    rets = []            # list of (date, net excess return) tuples
-    prev_weights = None  # portfolio weights at previous rebalance
+    # Rebalance rows only, all processed at once
+    rows = np.arange(0, len(dates), rebalance_every)
+    costs = cost_model.arrays(dates[rows], tickers) if cost_model is not None else None
+    net_excess, turnover, used, cost = topk_returns(S[rows], R[rows], top_k, transaction_cost_bps, costs)
+
+    # Time series of (net) excess returns on used rebalance dates
+    s = pd.Series(net_excess[used], index=dates[rows][used], dtype=float)
+    s.name = "excess_return_net"
+
+    equity = (1 + s).cumprod()                                          # cumulative product to get equity curve
+    equity.name = "equity_excess"                                       # name the equity series
+
+    # ==== DEBUG PRINT ====
+    if (transaction_cost_bps != 0 or costs is not None) and used.any(): # debug print
+        avg_turnover = float(np.mean(turnover[used]))                   # average turnover
+        avg_cost = float(np.mean(cost[used]))                           # average cost per rebalance
+        total_cost = float(np.sum(cost[used]))                          # total cost over period
+        print(
+            f"[COST DEBUG] avg turnover: {avg_turnover:.3f}, "
+            f"avg cost per rebalance: {avg_cost:.5f}, "
+            f"total cost over period: {total_cost:.4f}"
+        )
+
+    return equity
+
+
+@dataclass
+class SweepResult:
+    """
+    Output of `sweep_equity`.
+
+    `table` is tidy (one row per top_k × rebalance_every × cost combination);
+    `grid()` and `heatmap()` reshape any metric for plotting.
+    """
+    table: pd.DataFrame
+    top_ks: np.ndarray
+    rebalance_periods: np.ndarray
+    costs_bps: np.ndarray
+
+    def grid(self, metric: str = "final_equity") -> np.ndarray:
+        """Metric as an array of shape (n_top_k, n_rebalance, n_cost)."""
+        shape = (len(self.top_ks), len(self.rebalance_periods), len(self.costs_bps))
+        return self.table[metric].to_numpy().reshape(shape)
+
+    def heatmap(self, metric: str = "final_equity", cost_bps: float | None = None) -> pd.DataFrame:
+        """top_k × rebalance_every DataFrame of a metric for one cost level (default: first)."""
+        c = 0 if cost_bps is None else int(np.flatnonzero(self.costs_bps == cost_bps)[0])
+        return pd.DataFrame(
+            self.grid(metric)[:, :, c],
+            index=pd.Index(self.top_ks, name="top_k"),
+            columns=pd.Index(self.rebalance_periods, name="rebalance_every"),
+        )
+
+
+def _row_counts_below(ranks: np.ndarray, n_bins: int, weights: np.ndarray | None = None) -> np.ndarray:
+    """
+    cum[i, k] = number of entries in row i with rank < k + 1, for k in [0, n_bins)
+    (with `weights`: sum of their weights). Ranks >= n_bins are ignored.
+    """
+    m = ranks.shape[0]
+    r = np.minimum(ranks, n_bins)                                       # out-of-range ranks go to an overflow bin
+    flat = (np.arange(m)[:, None] * (n_bins + 1) + r).ravel()
+    w = None if weights is None else np.ravel(weights)
+    hist = np.bincount(flat, weights=w, minlength=m * (n_bins + 1)).reshape(m, n_bins + 1)
+    return np.cumsum(hist[:, :n_bins], axis=1)
+
+
+@traced(cat="backtest")
+def sweep_equity(                               # to evaluate a whole grid of top-k backtests in one pass
+    pred_scores: pd.DataFrame,                  # predicted excess returns
+    future_excess: pd.DataFrame,                # realized excess returns
+    top_ks=None,                                # iterable of top_k values (default: 1..n_tickers)
+    rebalance_periods=(5,),                     # iterable of rebalance frequencies (in days)
+    costs_bps=(0.0,),                           # iterable of transaction costs (in bps)
+    cost_model=None,                            # costs.CostModel charged on top of every cost level
+) -> SweepResult:
+    """
+    Evaluate the top-k long strategy of `equity_curve` over a grid of
+    top_k × rebalance_every × transaction_cost_bps.
+
+    Predictions are ranked once per date. Portfolio returns for every top_k
+    come from prefix sums of realized returns in that sorted order, turnover
+    from cumulative counts of rank overlaps between consecutive rebalances,
+    and costs are linear in turnover so the cost axis is a broadcast. The
+    per-ticker costs of `cost_model` come from the same counts weighted by
+    each name's cost coefficients (names entering or leaving the top k trade
+    1/k each).
+
+    Returns
+    -------
+    SweepResult
+        Tidy table with final equity, annualized return / volatility / Sharpe
+        (252 trading days), max drawdown, average turnover and number of
+        rebalances for each combination.
+    """
+    dates, tickers, S, R = align_panels(pred_scores, future_excess)
+    n, N = S.shape
+
+    top_ks = np.arange(1, N + 1) if top_ks is None else np.asarray(sorted(set(top_ks)), dtype=int)
+    rebalance_periods = np.asarray(sorted(set(rebalance_periods)), dtype=int)
+    costs_bps = np.asarray(sorted(set(costs_bps)), dtype=float)
+    if len(top_ks) and top_ks.min() < 1:
+        raise ValueError("All top_k values must be >= 1.")
+
+    # 1) Rank once per date: valid names first, by descending score
+    valid = ~np.isnan(S) & ~np.isnan(R)
+    order = np.argsort(-np.where(valid, S, -np.inf), axis=1, kind="stable")
+    rank = np.empty_like(order)
+    np.put_along_axis(rank, order, np.arange(N)[None, :], axis=1)       # rank[t, ticker] = position in sorted order
+    n_valid = valid.sum(axis=1)
+
+    # 2) Prefix sums of realized returns in sorted order
+    R_sorted = np.take_along_axis(np.where(valid, R, 0.0), order, axis=1)
+    csum = np.cumsum(R_sorted, axis=1)
+
+    costs = cost_model.arrays(dates, tickers) if cost_model is not None else None
+
+    n_k, n_p, n_c = len(top_ks), len(rebalance_periods), len(costs_bps)
+    metrics = {name: np.full((n_k, n_p, n_c), np.nan) for name in (
+        "final_equity", "ann_return", "ann_vol", "sharpe", "max_drawdown", "avg_turnover",
+    )}
+    n_rebalances = np.zeros((n_k, n_p, n_c), dtype=int)
+    ks_in = top_ks[top_ks <= N]
+
+    for j, step in enumerate(rebalance_periods):
+        rows = np.arange(0, n, step)
+        nv = n_valid[rows]
+
+        # Rows used (and therefore the previous rebalance) only change when k crosses a
+        # distinct count of valid names, so turnover is shared by all k in a group.
+        groups = np.searchsorted(np.unique(nv), ks_in, side="left")
+        for g in np.unique(groups):
+            ks = ks_in[groups == g]
+            used = nv >= ks[0]
+            prev = _prev_used(used)
+            has_prev = used & (prev >= 0)
+
+            rank_now = rank[rows]
+            rank_prev = np.where(valid[rows], rank[rows[np.clip(prev, 0, None)]], N)
+            overlap = _row_counts_below(np.maximum(rank_now, rank_prev), N)[:, ks - 1]
+            n_prev = _row_counts_below(rank_prev, N)[:, ks - 1]
 
+            turnover = (ks + n_prev - 2 * overlap) / (2.0 * ks)
+            turnover = np.where(has_prev[:, None], turnover, 0.0)      # (m, n_group_k)
+            gross = csum[rows][:, ks - 1] / ks
 
-    # DEBUG ACCUMULATORS
-    turnovers = []     # list of turnover values per rebalance
-    costs = []         # list of transaction costs per rebalance
+            model_cost = np.zeros_like(turnover)
+            if costs is not None:
+                # Cost coefficients summed over the names in exactly one of the two top-k sets
+                both = np.maximum(rank_now, rank_prev)
+                c = costs.take(rows)
 
-    for i in range(0, len(dates), rebalance_every): # step through rebalance dates
-        dt = dates[i]                               # current rebalance date
+                def traded(w):
+                    return (_row_counts_below(rank_now, N, w) + _row_counts_below(rank_prev, N, w)
+                            - 2.0 * _row_counts_below(both, N, w))[:, ks - 1]
 
-        # Drop NaNs
-        p = pred_scores.loc[dt].dropna()            # predicted scores at date dt
-        y = future_excess.loc[dt].dropna()          # realized excess returns at date dt
+                model_cost = np.where(has_prev[:, None], traded(c.linear) / ks + traded(c.impact) / ks ** 1.5, 0.0)
 
-        # Intersection of tickers
-        common = p.index.intersection(y.index)      # tickers with both predictions and realized returns
-        if len(common) < top_k:
-            continue
+            net = gross[:, :, None] - costs_bps[None, None, :] / 10000.0 * turnover[:, :, None] - model_cost[:, :, None]
+            net = np.where(used[:, None, None], net, 0.0)              # no position on skipped rows
 
-        # 1) Select top-k tickers by predicted score
-        picks = p[common].sort_values(ascending=False).head(top_k).index
+            idx = np.searchsorted(top_ks, ks)
+            n_used = int(used.sum())
+            n_rebalances[idx, j, :] = n_used
+            if n_used == 0:
+                continue
 
-        # 2) Equal weights
-        weights = pd.Series(0.0, index=common)      # initialize weights       
-        weights[picks] = 1.0 / top_k                # equal weight for selected tickers
+            eq = np.cumprod(1.0 + net, axis=0)
+            r_used = net[used]
+            mean = r_used.mean(axis=0)
+            vol = r_used.std(axis=0, ddof=1) if n_used > 1 else np.full(mean.shape, np.nan)
+            per_year = 252.0 / step
 
-        # 3) Turnover vs previous weights
-        if prev_weights is None:                                        # first rebalance
-            turnover = 0.0
-        else:
-            w_prev = prev_weights.reindex(weights.index).fillna(0.0)    # align previous weights
-            turnover = (weights - w_prev).abs().sum() / 2.0             # turnover calculation
+            metrics["final_equity"][idx, j, :] = eq[-1]
+            metrics["ann_return"][idx, j, :] = mean * per_year
+            metrics["ann_vol"][idx, j, :] = vol * np.sqrt(per_year)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                metrics["sharpe"][idx, j, :] = mean / vol * np.sqrt(per_year)
+            metrics["max_drawdown"][idx, j, :] = max_drawdown(eq, axis=0)
+            metrics["avg_turnover"][idx, j, :] = turnover[used].mean(axis=0)[:, None]
 
-        # 4) Realized excess return of the portfolio
-        port_excess = (y[picks] * weights[picks]).sum()                 # portfolio excess return
+    K, P, C = np.meshgrid(top_ks, rebalance_periods, costs_bps, indexing="ij")
+    table = pd.DataFrame({
+        "top_k": K.ravel(),
+        "rebalance_every": P.ravel(),
+        "transaction_cost_bps": C.ravel(),
+        "n_rebalances": n_rebalances.ravel(),
+        **{name: arr.ravel() for name, arr in metrics.items()},
+    })
+    return SweepResult(table, top_ks, rebalance_periods, costs_bps)
 
-        # 5) Transaction cost (bps → fraction)
-        cost = transaction_cost_bps / 10000.0 * turnover                # transaction cost
-        net_excess = port_excess - cost                                 # net excess return after cost
 
-        # store for debug
-        turnovers.append(turnover)                                      # store turnover
-        costs.append(cost)                                              # store cost         
+@traced(cat="backtest")
+def tranche_equity_curve(                       # to backtest overlapping top-k tranches (one per start offset)
+    pred_scores: pd.DataFrame,                  # predicted excess returns
+    future_excess: pd.DataFrame,                # realized excess returns (over `horizon` days)
+    top_k: int = 5,                             # number of top tickers held by each tranche
+    horizon: int = 5,                           # holding period = number of tranches
+    transaction_cost_bps: float = 0.0,          # transaction cost in basis points
+    cost_model=None,                            # costs.CostModel (per-ticker spread / FX / impact costs)
+) -> pd.Series:
+    """
+    Staggered-tranche version of `equity_curve`.
+
+    The capital is split into `horizon` sub-portfolios. Tranche o rebalances on
+    dates o, o + horizon, o + 2·horizon, ... exactly like `equity_curve` started
+    at offset o, so every date's predictions are traded by one tranche. The book
+    value on each date is the average of the tranche values (each started with
+    1/horizon of capital).
 
-        rets.append((dt, net_excess))                                   # store (date, net excess return)   
-        prev_weights = weights                                          # update previous weights      
+    All tranches are computed in one vectorized pass: rows are reshaped to
+    (n_blocks, horizon) so that each column is one tranche.
 
-    # Time series of (net) excess returns
-    s = pd.Series({d: r for d, r in rets}).sort_index()                 # index by date
-    s.name = "excess_return_net"                                        # name the series
+    Returns
+    -------
+    pd.Series
+        Daily cumulative growth of the combined book (×), in excess of the benchmark.
+    """
+    if horizon < 1:
+        raise ValueError(f"horizon must be >= 1, got {horizon}.")
 
-    equity = (1 + s).cumprod()                                          # cumulative product to get equity curve            
-    equity.name = "equity_excess"                                       # name the equity series          
+    dates, tickers, S, R = align_panels(pred_scores, future_excess)
+    n, N = S.shape
+    if n == 0:
+        return pd.Series(dtype=float, name="equity_excess")
+
+    valid = ~np.isnan(S) & ~np.isnan(R)
+    W, used, picks = topk_weights(S, valid, top_k)                      # every date is a rebalance of one tranche
+    gross = (np.take_along_axis(R, picks, axis=-1) * (1.0 / top_k)).sum(axis=-1)
+
+    # Pad to whole blocks and reshape to tranche-major arrays: (horizon, n_blocks, ...)
+    h = horizon
+    m = -(-n // h)
+    pad = m * h - n
+
+    def _by_tranche(a: np.ndarray, fill) -> np.ndarray:
+        a = np.concatenate([a, np.full((pad,) + a.shape[1:], fill, dtype=a.dtype)])
+        return np.swapaxes(a.reshape((m, h) + a.shape[1:]), 0, 1)
+
+    W_t, valid_t, used_t = _by_tranche(W, 0.0), _by_tranche(valid, False), _by_tranche(used, False)
+    trades = _trades(W_t, valid_t, used_t)                              # (h, m, N): vs same tranche's previous rebalance
+    turnover = trades.sum(axis=-1) / 2.0
+    cost = transaction_cost_bps / 10000.0 * turnover
+    if cost_model is not None:
+        c = cost_model.arrays(dates, tickers)
+        cost = cost + CostArrays(_by_tranche(c.linear, 0.0), _by_tranche(c.impact, 0.0)).charge(trades)
+    net = np.where(used_t, _by_tranche(gross, 0.0) - cost, 0.0)
+
+    # Tranche values after each of its rebalances, with a leading 1.0 (initial capital)
+    G = np.ones((h, m + 1))
+    G[:, 1:] = np.cumprod(1.0 + net, axis=1)
+
+    # Value of every tranche at row t: tranches with offset <= t % h have already
+    # rebalanced in block t // h, the others still carry their previous block.
+    t = np.arange(n)
+    block, offset = t // h, t % h
+    col = block[:, None] + (np.arange(h)[None, :] <= offset[:, None])   # (n, h) column into G
+    values = G[np.arange(h)[None, :], col]
+    equity = pd.Series(values.mean(axis=1), index=dates, name="equity_excess")
 
     # ==== DEBUG PRINT ====
-    if transaction_cost_bps != 0 and len(turnovers) > 0:                # debug print
-        avg_turnover = float(np.mean(turnovers))                        # average turnover
-        avg_cost = float(np.mean(costs))                                # average cost per rebalance       
-        total_cost = float(np.sum(costs))                               # total cost over period
+    if (transaction_cost_bps != 0 or cost_model is not None) and used.any():
+        # Book turnover: each tranche's turnover weighted by its share of the book before trading
+        pre = G[offset, block]                                          # value of the trading tranche before rebalance
+        share = pre / (values.sum(axis=1) - values[t, offset] + pre)
+        book_turnover = turnover.T.ravel()[:n] * share
+        book_cost = cost.T.ravel()[:n] * share
         print(
-            f"[COST DEBUG] avg turnover: {avg_turnover:.3f}, "
-            f"avg cost per rebalance: {avg_cost:.5f}, "
-            f"total cost over period: {total_cost:.4f}"
+            f"[COST DEBUG] avg daily book turnover: {float(book_turnover.mean()):.3f}, "
+            f"avg daily book cost: {float(book_cost.mean()):.5f}, "
+            f"total cost over period: {float(book_cost.sum()):.4f}"
+        )
+
+    return equity
+
+
+def backtest_inputs(cfg) -> tuple[bool, bool]:
+    """
+    Market panels `run_backtest` reads for the Config: (prices, volumes).
+    Prices feed the covariance of non-equal weights, the betas of
+    beta-neutral books and the volume cost model; volumes only the latter.
+    """
+    volumes = cfg.cost_model != "flat"
+    prices = volumes or cfg.weighting != "equal" or cfg.neutral == "beta"
+    return prices, volumes
+
+
+def run_backtest(
+    P: pd.DataFrame,
+    Y: pd.DataFrame,
+    cfg,
+    prices: pd.DataFrame | None = None,
+    volumes: pd.DataFrame | None = None,
+) -> pd.Series:
+    """
+    Top-k backtest with the Config settings: single book rebalanced every
+    `horizon_days`, or overlapping tranches when `cfg.tranche_mode` is set.
+    Non-equal `cfg.weighting` needs `prices` for the covariance estimate.
+    Other portfolio constructions (`cfg.construction`, `cfg.neutral`,
+    `cfg.max_turnover`) go through portfolio.portfolio_weights; beta-neutral
+    books need `prices` for the betas. `cfg.cost_model = 'volume'` adds the
+    per-ticker spread / FX / impact costs of costs.py, estimated from
+    `prices` and `volumes`.
+    """
+    cost_model = cost_model_from_config(cfg, prices, volumes)
+
+    if cfg.construction != "topk" or cfg.neutral != "none" or cfg.max_turnover is not None:
+        if cfg.weighting != "equal" or cfg.tranche_mode:
+            raise ValueError("Portfolio constructions require weighting='equal' and tranche_mode=False.")
+        if cfg.neutral == "beta" and prices is None:
+            raise ValueError("neutral='beta' requires prices for the beta estimate.")
+        from auto_ml_pkg.portfolio import portfolio_weights
+
+        weights = portfolio_weights(
+            P, Y,
+            construction=cfg.construction,
+            top_k=cfg.top_k,
+            rebalance_every=cfg.horizon_days,
+            neutral=cfg.neutral,
+            returns=prices.pct_change(fill_method=None) if cfg.neutral == "beta" else None,
+            beta_window=cfg.beta_window,
+            max_turnover=cfg.max_turnover,
+        )
+        return weights_equity_curve(weights, Y, transaction_cost_bps=cfg.transaction_cost_bps, cost_model=cost_model)
+
+    if cfg.weighting != "equal":
+        if cfg.tranche_mode:
+            raise ValueError("tranche_mode only supports weighting='equal'.")
+        if prices is None:
+            raise ValueError(f"weighting='{cfg.weighting}' requires prices for the covariance estimate.")
+        from auto_ml_pkg.risk import topk_risk_weights
+
+        weights = topk_risk_weights(
+            P, Y,
+            returns=prices.pct_change(fill_method=None),
+            top_k=cfg.top_k,
+            rebalance_every=cfg.horizon_days,
+            weighting=cfg.weighting,
+            window=cfg.cov_window,
+            halflife=cfg.cov_halflife,
+            shrinkage=cfg.cov_shrinkage,
+        )
+        return weights_equity_curve(weights, Y, transaction_cost_bps=cfg.transaction_cost_bps, cost_model=cost_model)
+
+    if cfg.tranche_mode:
+        return tranche_equity_curve(
+            P, Y,
+            top_k=cfg.top_k,
+            horizon=cfg.horizon_days,
+            transaction_cost_bps=cfg.transaction_cost_bps,
+            cost_model=cost_model,
         )
-        
-    return equity
\ No newline at end of file
+    return equity_curve(
+        P, Y,
+        top_k=cfg.top_k,                                    # e.g. 5
+        rebalance_every=cfg.horizon_days,                   # normally 5
+        transaction_cost_bps=cfg.transaction_cost_bps,      # for example 10 bps
+        cost_model=cost_model,                              # None with cost_model='flat'
+    )
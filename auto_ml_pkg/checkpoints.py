@@ -0,0 +1,244 @@
+import argparse
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import pickle
+import shutil
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Add project root (/files/auto_ml) to sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))   # folder: auto_ml/auto_ml_pkg
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                # folder: auto_ml
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Walk-forward fold checkpoints: outputs/checkpoints/walkforward/<scope>/fold_<n>/
+CHECKPOINT_DIR = os.path.join(PROJECT_ROOT, "outputs", "checkpoints", "walkforward")
+
+from auto_ml_pkg.artifacts import write_frame, read_frame
+
+# Fold directory layout:
+#   predictions.npz, realized.npz   test predictions / realized targets (artifacts.write_frame format)
+#   params.npz                      fitted parameters, one row per (ticker, feature) (models.ridge_params)
+#   models.pkl                      fitted models, used by --resume
+#   fold.json                       fold key, bounds, metrics and file metadata; written last
+# Every file is written to a temporary name and moved into place, and fold.json
+# is removed before a fold is rewritten, so a fold interrupted mid-write has no
+# fold.json and counts as not completed.
+#
+# A fold's key hashes its row ranges and dates, the content of its feature /
+# target rows, the model code and the model Config fields. Extending test_end
+# or adding a fold leaves earlier keys unchanged, so `--resume` only refits the
+# folds whose inputs moved.
+#
+# The scope directory separates configurations with different fold schedules
+# (e.g. sweep variants), which would otherwise overwrite each other's folds.
+#
+# Usage:
+#   python main.py --resume
+#   python auto_ml_pkg/run_experiment_walkforward.py --resume
+#   python auto_ml_pkg/checkpoints.py list
+#
+#   load_fold(3).predictions                          # one fold, offline
+#   list_folds()                                      # completed folds with their metrics
+
+# Config fields that define the fold schedule and the fitted models
+_SCOPE = ("tickers", "train_start", "horizon_days", "wf_first_test", "wf_cadence", "wf_window",
+          "wf_train_days", "wf_purge_days", "wf_embargo_days", "ridge_alpha", "dtype",
+          "min_train_rows", "min_test_rows")
+_MODEL = ("ridge_alpha", "min_train_rows", "min_test_rows")
+_CODE = ("auto_ml_pkg.models",)
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """Hash of a frame's labels and values (row hashes from pandas, NaN-aware)."""
+    rows = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    h = hashlib.sha256(rows.tobytes())
+    h.update(json.dumps([str(c) for c in df.columns]).encode("utf-8"))
+    h.update(str(df.dtypes.tolist()).encode("utf-8"))
+    return h.hexdigest()
+
+
+@dataclass
+class FoldCheckpoint:
+    """One completed fold read back from disk."""
+    fold: int
+    key: str
+    bounds: dict                  # train / test start and end dates
+    metrics: dict                 # test metrics (evaluate.fold_report)
+    predictions: pd.DataFrame     # test predictions (dates × tickers)
+    realized: pd.DataFrame        # realized targets on the same rows
+    params: pd.DataFrame          # fitted parameters (models.ridge_params)
+    path: str
+
+    def load_models(self) -> dict:
+        """Fitted models (ticker -> (model, feature columns)), as returned by models.fit_tickers."""
+        with open(os.path.join(self.path, "models.pkl"), "rb") as fh:
+            return pickle.load(fh)
+
+
+def _write_atomic(path: str, write) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        write(fh)
+    os.replace(tmp, path)
+
+
+def read_fold(path: str) -> FoldCheckpoint:
+    """Read the fold directory `path` (raises FileNotFoundError if the fold is not completed)."""
+    with open(os.path.join(path, "fold.json"), encoding="utf-8") as fh:
+        meta = json.load(fh)
+    files = meta["files"]
+    return FoldCheckpoint(
+        fold=meta["fold"],
+        key=meta["key"],
+        bounds=meta["bounds"],
+        metrics=meta["metrics"],
+        predictions=read_frame(os.path.join(path, "predictions.npz"), files["predictions"]),
+        realized=read_frame(os.path.join(path, "realized.npz"), files["realized"]),
+        params=read_frame(os.path.join(path, "params.npz"), files["params"]),
+        path=path,
+    )
+
+
+class FoldCheckpoints:
+    """
+    Per-fold checkpoints of one walk-forward configuration under
+    `root/<scope>/fold_<n>/` (see the layout above).
+    """
+
+    def __init__(self, cfg, root: str = CHECKPOINT_DIR):
+        self.cfg = cfg
+        scope = {p: getattr(cfg, p) for p in _SCOPE}
+        self.scope = _sha256(json.dumps(scope, sort_keys=True, default=str))[:12]
+        self.dir = os.path.join(root, self.scope)
+        code = [inspect.getsource(importlib.import_module(m)) for m in _CODE]
+        self._base = {
+            "code": _sha256("\n".join(code)),
+            "params": {p: getattr(cfg, p) for p in _MODEL},
+        }
+
+    def path(self, fold: int) -> str:
+        return os.path.join(self.dir, f"fold_{fold:03d}")
+
+    def key(self, fold, X: pd.DataFrame, Y: pd.DataFrame) -> str:
+        """Key of a fold (folds.Fold): row ranges, dates, input rows, model code and params."""
+        rows = slice(fold.train.start, fold.test.stop)
+        payload = {
+            **self._base,
+            "train": [fold.train.start, fold.train.stop],
+            "test": [fold.test.start, fold.test.stop],
+            "bounds": fold.bounds(),
+            "X": frame_digest(X.iloc[rows]),
+            "Y": frame_digest(Y.iloc[rows]),
+        }
+        return _sha256(json.dumps(payload, sort_keys=True, default=str))
+
+    def load(self, fold: int, key: str) -> FoldCheckpoint | None:
+        """Completed checkpoint of `fold` if its key matches `key`, else None."""
+        path = self.path(fold)
+        if not os.path.exists(os.path.join(path, "fold.json")):
+            return None
+        try:
+            ckpt = read_fold(path)
+        except Exception as e:
+            print(f"[WARN] Unreadable checkpoint for fold {fold} ({e}); refitting.")
+            return None
+        return ckpt if ckpt.key == key else None
+
+    def save(self, fold, key: str, models: dict, P: pd.DataFrame, Yf: pd.DataFrame, metrics: dict) -> str:
+        """Write the checkpoint of a fold (folds.Fold); fold.json last, as the completion marker."""
+        from auto_ml_pkg.models import ridge_params
+
+        path = self.path(fold.fold)
+        os.makedirs(path, exist_ok=True)
+        marker = os.path.join(path, "fold.json")
+        if os.path.exists(marker):
+            os.remove(marker)                                           # the old fold is no longer complete
+
+        files = {
+            "predictions": write_frame(os.path.join(path, "predictions.npz"), P),
+            "realized": write_frame(os.path.join(path, "realized.npz"), Yf),
+            "params": write_frame(os.path.join(path, "params.npz"), ridge_params(models)),
+        }
+        _write_atomic(os.path.join(path, "models.pkl"),
+                      lambda fh: pickle.dump(models, fh, protocol=pickle.HIGHEST_PROTOCOL))
+
+        meta = {
+            "fold": fold.fold,
+            "key": key,
+            "scope": self.scope,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "bounds": fold.bounds(),
+            "metrics": {k: (None if isinstance(v, float) and np.isnan(v) else v)
+                        for k, v in metrics.items() if k != "fold" and k not in fold.bounds()},
+            "files": files,
+        }
+        _write_atomic(marker, lambda fh: fh.write(json.dumps(meta, indent=2, default=str).encode("utf-8")))
+        return path
+
+
+def load_fold(fold: int, scope: str | None = None, root: str = CHECKPOINT_DIR) -> FoldCheckpoint:
+    """
+    Completed fold `fold` of a scope (default: the most recently written
+    scope containing that fold).
+    """
+    if scope is None:
+        done = list_folds(root)
+        done = done[done["fold"] == fold]
+        if done.empty:
+            raise FileNotFoundError(f"No completed checkpoint for fold {fold} under {root}.")
+        scope = done.sort_values("created").iloc[-1]["scope"]
+    return read_fold(os.path.join(root, scope, f"fold_{fold:03d}"))
+
+
+def list_folds(root: str = CHECKPOINT_DIR) -> pd.DataFrame:
+    """Completed folds of every scope: scope, fold, bounds, metrics and write time."""
+    rows = []
+    if os.path.isdir(root):
+        for scope in sorted(os.listdir(root)):
+            scope_dir = os.path.join(root, scope)
+            if not os.path.isdir(scope_dir):
+                continue
+            for name in sorted(os.listdir(scope_dir)):
+                marker = os.path.join(scope_dir, name, "fold.json")
+                if not os.path.exists(marker):
+                    continue
+                with open(marker, encoding="utf-8") as fh:
+                    meta = json.load(fh)
+                rows.append({"scope": scope, "fold": meta["fold"], "created": meta["created"],
+                             **meta["bounds"], **meta["metrics"]})
+    return pd.DataFrame(rows, columns=None if rows else ["scope", "fold", "created"])
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Inspect or remove walk-forward fold checkpoints.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="Completed folds with their test metrics.")
+    p_clear = sub.add_parser("clear", help="Remove the checkpoints of one scope (or all).")
+    p_clear.add_argument("scope", nargs="?", default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        with pd.option_context("display.width", 160, "display.max_columns", 20):
+            print(list_folds())
+    else:
+        target = CHECKPOINT_DIR if args.scope is None else os.path.join(CHECKPOINT_DIR, args.scope)
+        shutil.rmtree(target, ignore_errors=True)
+        print(f"[INFO] Removed {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+
+# Add project root (/files/auto_ml) to sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))   # folder: auto_ml/auto_ml_pkg
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                # folder: auto_ml
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Prediction shards of chunked runs: outputs/chunks/<experiment>/{manifest.json, f<fold>_b<batch>_{pred,real}.npz}
+# plus the prices.npy / volumes.npy panels when the backtest reads them (backtest.backtest_inputs)
+CHUNKS_DIR = os.path.join(PROJECT_ROOT, "outputs", "chunks")
+
+from auto_ml_pkg.config import Config
+from auto_ml_pkg.data import fetch_prices, fetch_benchmark, fetch_volumes
+from auto_ml_pkg.backtest import backtest_inputs
+from auto_ml_pkg.features import make_features, make_targets_excess
+from auto_ml_pkg.models import fit_tickers, predict_tickers
+from auto_ml_pkg.artifacts import write_frame, read_frame
+from auto_ml_pkg.profiling import span
+
+# Usage:
+#   python auto_ml_pkg/chunked.py --experiment walkforward --chunk-size 100
+#   python main.py --chunk-size 100                 # both experiments in chunked mode
+#
+# Out-of-core execution: tickers are streamed in batches of `Config.chunk_size`
+# through prices → features → targets → fit → predict. Only one batch of
+# prices / features / targets is in memory at a time; each batch's test
+# predictions and realized targets are written to disk as soon as they are
+# computed. The final merge reads the shards back into the (dates × tickers)
+# prediction and realized panels needed by the cross-sectional top-k backtest.
+#
+# Results match the in-memory experiments: every batch is aligned on the
+# calendar of the full universe, so rolling windows, targets and fold
+# boundaries are the same as in the wide panel.
+
+
+def ticker_batches(tickers, size: int | None):
+    """Consecutive batches of at most `size` tickers (one batch if size is None)."""
+    tickers = list(tickers)
+    size = size or len(tickers) or 1
+    for i in range(0, len(tickers), size):
+        yield tickers[i:i + size]
+
+
+def _batch_prices(cfg: Config, batch) -> pd.DataFrame | None:
+    """Close prices of one batch (None if no ticker of the batch has data)."""
+    try:
+        return fetch_prices(batch, cfg.train_start, cfg.test_end)
+    except RuntimeError:
+        print(f"[SKIP] No price data for batch {batch[0]} … {batch[-1]}.")
+        return None
+
+
+def universe_calendar(cfg: Config) -> pd.DatetimeIndex:
+    """
+    Trading dates of the whole universe (union over batches), i.e. the index
+    of the aligned price panel, built without holding the panel.
+    """
+    calendar = pd.DatetimeIndex([], name="Date")                       # same index name as the price panel
+    for batch in ticker_batches(cfg.tickers, cfg.chunk_size):
+        prices = _batch_prices(cfg, batch)
+        if prices is not None:
+            calendar = calendar.union(prices.dropna(how="all").index)
+    if calendar.empty:
+        raise RuntimeError("No price data available for any ticker of the universe.")
+    return calendar
+
+
+def streaming_benchmark(cfg: Config, calendar: pd.DatetimeIndex) -> pd.Series:
+    """
+    Config benchmark, or the equal-weight universe index accumulated batch by
+    batch (running sum and count of daily returns per date) when the
+    benchmark is unavailable. Same values as data.equal_weight_benchmark.
+    """
+    try:
+        return fetch_benchmark(cfg.benchmark, cfg.train_start, cfg.test_end)
+    except RuntimeError:
+        print("[INFO] Using equal-weight benchmark fallback (streamed over batches).")
+
+    total = np.zeros(len(calendar))
+    count = np.zeros(len(calendar))
+    for batch in ticker_batches(cfg.tickers, cfg.chunk_size):
+        prices = _batch_prices(cfg, batch)
+        if prices is None:
+            continue
+        r = prices.reindex(calendar).astype(float).pct_change(fill_method=None).to_numpy()
+        ok = np.isfinite(r)
+        total += np.where(ok, r, 0.0).sum(axis=1)
+        count += ok.sum(axis=1)
+
+    mean = np.divide(total, count, out=np.zeros_like(total), where=count > 0)
+    ew = pd.Series(np.cumprod(1.0 + mean), index=calendar)
+    ew = ew / ew.iloc[0] * 100.0
+    ew.name = "EQUAL_WEIGHT_BENCH"
+    return ew
+
+
+def _splits(cfg: Config, experiment: str, calendar: pd.DatetimeIndex) -> list[dict]:
+    """Train / test rows of every fold on the universe calendar (one fold for the single split)."""
+    if experiment == "single":
+        from auto_ml_pkg.run_experiment_single_split import _split_masks
+        train, test = _split_masks(cfg, calendar)
+        return [{"fold": 1, "train": train, "test": test, "info": None, "label": ""}]
+
+    from auto_ml_pkg.run_experiment_walkforward import build_walkforward_folds
+    return [
+        {"fold": f.fold, "train": f.train, "test": f.test, "info": f, "label": f" (fold {f.fold}"}
+        for f in build_walkforward_folds(cfg, calendar)
+    ]
+
+
+class ShardWriter:
+    """Prediction / realized shards of one chunked run, indexed in `manifest.json`."""
+
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        if os.path.isdir(out_dir):                                  # shards of a previous run are stale
+            shutil.rmtree(out_dir)
+        os.makedirs(out_dir)
+        self.shards: list[dict] = []
+
+    def write(self, fold: int, batch: int, P: pd.DataFrame, Yf: pd.DataFrame) -> None:
+        for part, frame in (("pred", P), ("real", Yf)):
+            file = f"f{fold:03d}_b{batch:05d}_{part}.npz"
+            meta = write_frame(os.path.join(self.out_dir, file), frame)
+            self.shards.append({"fold": fold, "batch": batch, "part": part, "file": file, **meta})
+        manifest = os.path.join(self.out_dir, "manifest.json")
+        tmp = f"{manifest}.{os.getpid()}.tmp"                          # a crash never leaves a truncated manifest
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"shards": self.shards}, fh, indent=2)
+        os.replace(tmp, manifest)
+
+    def read(self, fold: int, part: str) -> pd.DataFrame:
+        """Shards of one fold and part ('pred' or 'real'), concatenated along the tickers in batch order."""
+        parts = [
+            read_frame(os.path.join(self.out_dir, s["file"]), s)
+            for s in sorted(self.shards, key=lambda s: s["batch"])
+            if s["fold"] == fold and s["part"] == part
+        ]
+        return pd.concat(parts, axis=1, sort=True) if parts else pd.DataFrame()
+
+
+class PanelShard:
+    """
+    Date × ticker float64 panel filled batch by batch into a memory-mapped
+    .npy file of the shard directory (tickers in batch order), so the
+    universe-wide panel is never held in memory.
+    """
+
+    def __init__(self, path: str, calendar: pd.DatetimeIndex, n_tickers: int):
+        self.path = path
+        self.calendar = calendar
+        self.columns: list[str] = []
+        self._data = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64, shape=(len(calendar), n_tickers))
+        self._data[:] = np.nan
+
+    def write(self, frame: pd.DataFrame) -> None:
+        """Append the columns of one batch (a frame on the calendar)."""
+        j = len(self.columns)
+        self._data[:, j:j + frame.shape[1]] = frame.to_numpy(dtype=np.float64)
+        self.columns += list(frame.columns)
+
+    def frame(self) -> pd.DataFrame:
+        """Read-only, memory-mapped view of the written columns."""
+        self._data.flush()
+        data = np.load(self.path, mmap_mode="r")[:, :len(self.columns)]
+        return pd.DataFrame(data, index=self.calendar, columns=self.columns, copy=False)
+
+
+def run_chunked(                                # to run an experiment batch by batch with bounded memory
+    cfg: Config | None = None,                  # configuration (cfg.chunk_size tickers per batch)
+    experiment: str = "walkforward",            # 'single' or 'walkforward'
+    chunk_size: int | None = None,              # overrides cfg.chunk_size
+    report: bool = True,                        # store run artifacts and figures like the in-memory experiment
+) -> dict:
+    """
+    Fit and predict the experiment one ticker batch at a time, write each
+    batch's predictions to outputs/chunks/<experiment>/, then merge them for
+    evaluation and the top-k backtest.
+
+    Peak memory of the fit / predict phase is one batch of prices, features
+    and targets (about 8 panels of n_dates × chunk_size) instead of the full
+    universe; the merged prediction and realized panels are the only
+    universe-wide frames held in memory. Prices and volumes, when the
+    backtest reads them, are written batch by batch to memory-mapped panels
+    in the shard directory.
+
+    Returns
+    -------
+    dict
+        pred (in the experiment's predict-stage format), metrics, bt (backtest
+        outputs: at least 'ec'), and out_dir (the shard directory).
+    """
+    cfg = cfg or Config()
+    if chunk_size is not None:
+        cfg = replace(cfg, chunk_size=chunk_size)
+
+    with span("calendar", cat="chunked"):
+        calendar = universe_calendar(cfg)
+    with span("benchmark", cat="chunked"):
+        bench = streaming_benchmark(cfg, calendar)
+    splits = _splits(cfg, experiment, calendar)
+    print(f"[INFO] Chunked {experiment}: {len(cfg.tickers)} tickers in batches of "
+          f"{cfg.chunk_size or len(cfg.tickers)}, {len(splits)} fold(s), {len(calendar)} trading days.")
+
+    # === Fit / predict batch by batch, predictions written as they are produced ===
+    shards = ShardWriter(os.path.join(CHUNKS_DIR, experiment))
+    need_prices, need_volumes = backtest_inputs(cfg)
+    panels = {name: PanelShard(os.path.join(shards.out_dir, f"{name}.npy"), calendar, len(cfg.tickers))
+              for name, needed in (("prices", need_prices), ("volumes", need_volumes)) if needed}
+    for b, batch in enumerate(ticker_batches(cfg.tickers, cfg.chunk_size)):
+        with span("batch", cat="chunked", batch=b, n_tickers=len(batch)):
+            prices = _batch_prices(cfg, batch)
+            if prices is None:
+                continue
+            prices = prices.reindex(calendar)                           # float64; features / targets take cfg.dtype
+            if "prices" in panels:
+                panels["prices"].write(prices)
+            if "volumes" in panels:
+                volumes = fetch_volumes(prices.columns, cfg.train_start, cfg.test_end)
+                panels["volumes"].write(volumes.reindex(index=calendar, columns=prices.columns))
+            X = make_features(prices, dtype=cfg.dtype).reindex(calendar)
+            Y = make_targets_excess(prices, bench, cfg.horizon_days, dtype=cfg.dtype)
+            del prices
+
+            for s in splits:
+                label = f"{s['label']}, batch {b})" if s["label"] else f" (batch {b})"
+                models = fit_tickers(X, Y, batch, s["train"], s["test"], alpha=cfg.ridge_alpha, label=label,
+                                     min_train=cfg.min_train_rows, min_test=cfg.min_test_rows)
+                if models:
+                    P, Yf = predict_tickers(models, X, Y, s["test"])
+                    shards.write(s["fold"], b, P, Yf)
+            del X, Y
+
+    # === Merge the shards into the experiment's prediction format ===
+    with span("merge", cat="chunked"):
+        folds = []
+        for s in splits:
+            P, Yf = shards.read(s["fold"], "pred"), shards.read(s["fold"], "real")
+            if P.empty:
+                print(f"[INFO] Fold {s['fold']}: no predictions created, skipped.")
+                continue
+            folds.append({"fold": s["info"], "P": P, "Y": Yf})
+        if not folds:
+            raise RuntimeError("No predictions created in any batch. Check folds or data availability.")
+
+    # Price / volume panels of the universe, memory-mapped from the shard directory (only those the backtest reads)
+    prices = panels["prices"].frame() if "prices" in panels else None
+    volumes = panels["volumes"].frame() if "volumes" in panels else None
+
+    if experiment == "single":
+        from auto_ml_pkg.run_experiment_single_split import _evaluate
+        from auto_ml_pkg.backtest import run_backtest
+
+        pred = (folds[0]["P"], folds[0]["Y"])
+        metrics = _evaluate(cfg, pred)
+        bt = {"ec": run_backtest(*pred, cfg, prices, volumes)}
+        if report:
+            _report_single(cfg, pred, bt)
+    else:
+        from auto_ml_pkg.folds import aggregate_folds
+        from auto_ml_pkg.run_experiment_walkforward import _evaluate, _backtest, _report
+
+        pred = aggregate_folds(folds)
+        metrics = _evaluate(cfg, pred)
+        bt = _backtest(cfg, pred, prices, volumes)
+        if report:
+            _report(cfg, pred, metrics, bt)
+
+    print("\n==== GLOBAL OUT-OF-SAMPLE METRICS (chunked) ====")
+    for k, v in metrics["reg"].items():
+        print(f"{k}: {v:.6f}")
+    print("IC:", metrics["ic"])
+    return {"pred": pred, "metrics": metrics, "bt": bt, "out_dir": shards.out_dir}
+
+
+def _report_single(cfg: Config, pred, bt: dict) -> None:
+    """
+    Run artifacts and figures of a chunked single split. The CARZ vs
+    Equal-Weight comparison of the in-memory report needs the full price
+    panel and is not produced here; artifacts always go to the run store.
+    """
+    from auto_ml_pkg.artifacts import store_run
+    from auto_ml_pkg.run_experiment_single_split import FIGURES_DIR
+    from auto_ml_pkg.viz import plot_equity, scatter_pred_vs_true, render
+
+    P, Yf = pred
+    run_id = store_run("single", cfg, {"predictions": P, "realized_excess": Yf, "equity_curve": bt["ec"]})
+    print(f"[INFO] Run artifacts stored under run ID '{run_id}'.")
+
+    if cfg.plots == "off":
+        return
+    os.makedirs(FIGURES_DIR, exist_ok=True)
+    render(cfg.plots, plot_equity, bt["ec"], os.path.join(FIGURES_DIR, "equity_curve.png"),
+           title=f"Top-{cfg.top_k} long — Ridge — h={cfg.horizon_days} (chunked)")
+    render(cfg.plots, scatter_pred_vs_true, Yf.stack(), P.stack(),
+           os.path.join(FIGURES_DIR, "pred_vs_realized.png"))
+
+
+def main(argv=None) -> dict:
+    from auto_ml_pkg.viz import PLOT_MODES, wait_plots
+
+    parser = argparse.ArgumentParser(description="Run an experiment out of core, streaming tickers in batches.")
+    parser.add_argument("--experiment", choices=("single", "walkforward"), default="walkforward")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Tickers per batch (default: Config.chunk_size).")
+    parser.add_argument("--plots", choices=PLOT_MODES, default=None)
+    args = parser.parse_args(argv)
+
+    cfg = Config()
+    if args.plots is not None:
+        cfg = replace(cfg, plots=args.plots)
+    out = run_chunked(cfg, args.experiment, chunk_size=args.chunk_size)
+    wait_plots()
+    return out
+
+
+if __name__ == "__main__":
+    main()
@@ -23,14 +23,58 @@ class Config:
     ])
     benchmark: str = "CARZ"          # Sector ETF for automotive
     horizon_days: int = 5            # Prediction horizon (trading days)
+    ridge_alpha: float = 2.0         # Ridge regularization strength
     
     # Date ranges
-    train_start = "2016-01-01"
-    train_end   = "2022-12-31"
-    test_start  = "2023-01-01"
-    test_end    = "2025-09-30"
+    train_start: str = "2016-01-01"
+    train_end: str   = "2022-12-31"
+    test_start: str  = "2023-01-01"
+    test_end: str    = "2025-09-30"
+
+    # Walk-forward fold schedule (see folds.walkforward_folds)
+    wf_first_test: str = "2020-01-01"      # Start of the first walk-forward test period
+    wf_cadence: str = "annual"             # Refit cadence: 'annual', 'quarterly', 'monthly' or 'weekly'
+    wf_window: str = "expanding"           # 'expanding' or 'rolling' training window
+    wf_train_days: int | None = None       # Rolling window length (trading days)
+    wf_purge_days: int | None = None       # Gap before each test period (None = horizon_days)
+    wf_embargo_days: int = 0               # Extra gap after the purge (trading days)
+    min_train_rows: int = 100              # Complete train rows a ticker needs to be fitted
+    min_test_rows: int = 20                # Complete test rows a ticker needs (capped at half the test window)
+
+    # Numeric precision of the data panels (prices, features, targets, design matrices,
+    # predictions, backtest arrays): 'float64' or 'float32' (half the memory, see precision.py)
+    dtype: str = "float64"
 
     # Backtest settings
     top_k: int = 5                     # Number of top predicted tickers to hold
     transaction_cost_bps: float = 10.0 # 10 basis points = 0.10%
-    seed: int = 42                     # Random seed for reproducibility
\ No newline at end of file
+    tranche_mode: bool = False         # Overlapping tranches: one sub-portfolio per start offset (h = horizon_days)
+    weighting: str = "equal"           # Top-k weighting: 'equal', 'inverse_vol', 'min_variance' or 'risk_parity'
+    cov_window: int = 60               # Rolling covariance window (trading days)
+    cov_halflife: float | None = None  # EW covariance half-life (overrides cov_window when set)
+    cov_shrinkage: float = 0.1         # Shrinkage of the covariance towards a scaled identity
+    construction: str = "topk"         # Portfolio construction (portfolio.py): 'topk', 'rank', 'score', 'rank_ls', 'score_ls' or 'long_short'
+    neutral: str = "none"              # Long-short books only: 'none', 'dollar' or 'beta' neutral
+    beta_window: int = 60              # Rolling beta window for beta-neutral books (trading days)
+    max_turnover: float | None = None  # Turnover cap per rebalance (partial rebalancing toward the target)
+    cost_model: str = "flat"           # 'flat' (transaction_cost_bps only) or 'volume' (+ per-ticker spread, FX and impact costs, costs.py)
+    cost_window: int = 20              # Rolling window of the volatility and dollar volume behind the impact term (trading days)
+    impact_coef: float = 1.0           # Square-root impact coefficient η
+    portfolio_notional: float = 1e7    # Book size in USD (impact grows with sqrt(trade size / dollar volume))
+    spread_table: str | None = None    # Per-ticker spread CSV (ticker, spread_bps[, currency]); default data/costs/spreads.csv
+    seed: int = 42                     # Random seed for reproducibility
+    n_placebos: int = 0                # Placebo draws per null for the significance test (0 = off)
+
+    # Pipeline settings
+    pipeline_cache: bool = True        # Reuse cached stage outputs (outputs/cache) across runs
+    checkpoints: bool = True           # Per-fold walk-forward checkpoints (outputs/checkpoints, see checkpoints.py)
+    resume: bool = False               # Reuse fold checkpoints whose inputs are unchanged instead of refitting
+    plots: str = "sync"                # Figures: 'sync', 'background' (worker process, after metrics) or 'off'
+    artifacts: str = "binary"          # Run artifacts: 'binary' (outputs/runs/<run id>), 'csv' (outputs/artifacts) or 'both'
+    chunk_size: int | None = None      # Tickers per batch in out-of-core mode (chunked.py); None = whole universe in memory
+    queue_shard_size: int = 50         # Tickers per task of the filesystem work queue (workqueue.py)
+    queue_lease_seconds: float = 300.0 # A claimed task whose lease is not renewed for this long is requeued
+
+    # Instrumentation (see profiling.py)
+    trace: bool = False                # Record timing spans; writes outputs/traces/<run>_trace.json + _summary.csv
+    trace_memory: bool = True          # Also record peak memory per span (tracemalloc, slower)
@@ -0,0 +1,200 @@
+import os
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Add project root (/files/auto_ml) to sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))   # folder: auto_ml/auto_ml_pkg
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                # folder: auto_ml
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Optional per-ticker spread table: CSV with columns ticker, spread_bps [, currency]
+SPREADS_PATH = os.path.join(PROJECT_ROOT, "data", "costs", "spreads.csv")
+
+COST_MODELS = ("flat", "volume")
+
+# Cost of trading |Δw| of the book in name i on a rebalance date t (fraction of the book):
+#   |Δw| · (spread_i / 2 + fx_i) / 10⁴                       half the quoted spread + FX conversion
+#   + η · σ_{t,i} · |Δw| · sqrt(|Δw| · notional / ADV_{t,i})  square-root market impact
+# σ is the daily return volatility and ADV the average daily dollar volume
+# (local close × shares × USD per local unit) over the `window` days before t.
+# All terms are computed on the date × ticker trade matrix at once; the flat
+# transaction_cost_bps on turnover is charged on top (commissions).
+
+# Yahoo listing suffix → trading currency ("GBp": London quotes in pence)
+LISTING_CURRENCIES = {
+    "": "USD", "DE": "EUR", "PA": "EUR", "MI": "EUR", "AS": "EUR", "MC": "EUR", "BR": "EUR",
+    "L": "GBp", "SW": "CHF", "T": "JPY", "KS": "KRW", "KQ": "KRW", "HK": "HKD", "TO": "CAD",
+}
+MINOR_UNITS = {"GBp": ("GBP", 0.01)}
+
+# Default quoted spreads (bps) by trading currency, used for tickers missing from the spread table
+DEFAULT_SPREAD_BPS = {"USD": 4.0, "EUR": 8.0, "GBP": 8.0, "CHF": 8.0, "CAD": 8.0, "JPY": 10.0, "HKD": 12.0, "KRW": 16.0}
+
+# FX conversion cost (bps of traded notional) for a USD book trading non-USD listings
+FX_COST_BPS = {"USD": 0.0, "EUR": 1.0, "GBP": 1.0, "CHF": 1.5, "CAD": 1.5, "JPY": 1.5, "HKD": 2.0, "KRW": 5.0}
+
+# USD per unit of currency, used when the Yahoo FX series is unavailable
+FX_FALLBACK_USD = {"USD": 1.0, "EUR": 1.10, "GBP": 1.27, "CHF": 1.12, "CAD": 0.74, "JPY": 0.0070, "HKD": 0.128, "KRW": 0.00075}
+
+
+def listing_currency(ticker: str) -> str:
+    """Trading currency of a Yahoo ticker from its exchange suffix (no suffix = US listing)."""
+    suffix = ticker.rsplit(".", 1)[1] if "." in ticker else ""
+    if suffix not in LISTING_CURRENCIES:
+        print(f"[WARN] Unknown listing suffix '.{suffix}' for '{ticker}'; assuming USD.")
+        return "USD"
+    return LISTING_CURRENCIES[suffix]
+
+
+def _base_currency(ccy: str) -> tuple[str, float]:
+    """ISO currency and scale of a quote currency (e.g. GBp → GBP, 0.01)."""
+    return MINOR_UNITS.get(ccy, (ccy, 1.0))
+
+
+def spread_table(tickers, path: str | None = None) -> pd.DataFrame:
+    """
+    Per-ticker cost parameters: trading currency, quoted spread and FX
+    conversion cost (bps). Rows of the CSV at `path` (default SPREADS_PATH,
+    if it exists) override the currency defaults.
+
+    Returns
+    -------
+    pd.DataFrame
+        Indexed by ticker: currency, spread_bps, fx_bps, source ('table' or 'default').
+    """
+    rows = {}
+    for t in tickers:
+        ccy = listing_currency(t)
+        base = _base_currency(ccy)[0]
+        rows[t] = {"currency": ccy, "spread_bps": DEFAULT_SPREAD_BPS.get(base, 10.0),
+                   "fx_bps": FX_COST_BPS.get(base, 2.0), "source": "default"}
+
+    path = SPREADS_PATH if path is None else path
+    if os.path.exists(path):
+        table = pd.read_csv(path).set_index("ticker")
+        for t in table.index.intersection(list(rows)):
+            rows[t]["spread_bps"] = float(table.at[t, "spread_bps"])
+            if "currency" in table.columns and isinstance(table.at[t, "currency"], str):
+                rows[t]["currency"] = table.at[t, "currency"]
+                rows[t]["fx_bps"] = FX_COST_BPS.get(_base_currency(rows[t]["currency"])[0], 2.0)
+            rows[t]["source"] = "table"
+    return pd.DataFrame.from_dict(rows, orient="index").rename_axis("ticker")
+
+
+def fx_rates(currencies, index: pd.DatetimeIndex) -> pd.DataFrame:
+    """
+    USD per unit of each quote currency on `index` (dates × currencies),
+    from Yahoo '<CCY>USD=X' series (cached like prices) forward-filled onto
+    the trading calendar, or the FX_FALLBACK_USD constants when unavailable.
+    """
+    from auto_ml_pkg.data import _download_one
+
+    start, end = str(index[0].date()), str((index[-1] + pd.Timedelta(days=1)).date())
+    out = {}
+    for ccy in sorted(set(currencies)):
+        base, scale = _base_currency(ccy)
+        if base == "USD":
+            out[ccy] = pd.Series(scale, index=index)
+            continue
+        s = _download_one(f"{base}USD=X", start, end)
+        if s is None or s.dropna().empty:
+            print(f"[WARN] No FX series for {base}/USD; using the constant {FX_FALLBACK_USD.get(base)}.")
+            s = pd.Series(FX_FALLBACK_USD.get(base, np.nan), index=index)
+        out[ccy] = s.reindex(s.index.union(index)).ffill().bfill().reindex(index) * scale
+    return pd.DataFrame(out, index=index)
+
+
+def dollar_volume(prices: pd.DataFrame, volumes: pd.DataFrame, fx: pd.DataFrame, currencies: pd.Series) -> pd.DataFrame:
+    """Daily traded value in USD: local close × shares × USD per local unit (dates × tickers)."""
+    rate = fx.reindex(columns=currencies.reindex(prices.columns).to_numpy())
+    rate.columns = prices.columns
+    return prices.astype(float) * volumes.reindex_like(prices) * rate.to_numpy()
+
+
+@dataclass
+class CostArrays:
+    """
+    Cost coefficients aligned on a (rows × tickers) grid: `linear` per unit
+    traded (spread / 2 + FX, as a fraction) and `impact` such that the impact
+    cost of a trade is impact · |Δw|^1.5. Unknown values are 0.
+    """
+    linear: np.ndarray
+    impact: np.ndarray
+
+    def charge(self, trades: np.ndarray) -> np.ndarray:
+        """Cost of each row (fraction of the book) for absolute trades (..., rows, tickers)."""
+        return (trades * self.linear).sum(axis=-1) + (trades * np.sqrt(trades) * self.impact).sum(axis=-1)
+
+    def take(self, rows) -> "CostArrays":
+        return CostArrays(self.linear[rows], self.impact[rows])
+
+
+@dataclass
+class CostModel:
+    """Per-ticker spreads, FX costs and impact inputs on the price calendar."""
+    table: pd.DataFrame           # spread_table output
+    sigma: pd.DataFrame           # daily return volatility over the previous `window` days
+    adv_usd: pd.DataFrame         # average daily dollar volume (USD) over the previous `window` days
+    impact_coef: float = 1.0      # η of the square-root law
+    notional_usd: float = 1e7     # book size (USD)
+
+    def arrays(self, dates, tickers) -> CostArrays:
+        """Cost coefficients on the given dates and tickers (e.g. the rebalance rows of a backtest)."""
+        tab = self.table.reindex(tickers)
+        linear = ((tab["spread_bps"] / 2.0 + tab["fx_bps"]) / 10000.0).fillna(0.0).to_numpy()
+        sigma = self.sigma.reindex(index=dates, columns=tickers).to_numpy(dtype=np.float64)
+        adv = self.adv_usd.reindex(index=dates, columns=tickers).to_numpy(dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            impact = self.impact_coef * sigma * np.sqrt(self.notional_usd / adv)
+        impact = np.where(np.isfinite(impact), impact, 0.0)
+        return CostArrays(np.broadcast_to(linear, impact.shape), impact)
+
+
+def build_cost_model(                           # to estimate all cost inputs for a price / volume panel at once
+    prices: pd.DataFrame,                       # daily closes in listing currency (dates × tickers)
+    volumes: pd.DataFrame,                      # daily share volumes, same grid
+    window: int = 20,                           # rolling window for volatility and ADV (trading days)
+    impact_coef: float = 1.0,                   # η of the square-root impact law
+    notional_usd: float = 1e7,                  # book size (USD)
+    spreads_path: str | None = None,            # per-ticker spread table (default SPREADS_PATH)
+) -> CostModel:
+    """
+    Cost model for a universe: spreads and FX costs from `spread_table`,
+    volatility and USD dollar volume as rolling means shifted by one day
+    (only information before each trade date is used).
+    """
+    table = spread_table(prices.columns, spreads_path)
+    minp = max(window // 2, 2)
+
+    returns = prices.astype(float).pct_change(fill_method=None)
+    sigma = returns.rolling(window, min_periods=minp).std().shift(1)
+
+    volumes = volumes.reindex_like(prices) if volumes is not None else pd.DataFrame(np.nan, index=prices.index, columns=prices.columns)
+    no_volume = [t for t in prices.columns if volumes[t].isna().all()]
+    if no_volume:
+        print(f"[WARN] No volume for {no_volume}: spread and FX costs only (no impact term).")
+    fx = fx_rates(table["currency"], prices.index)
+    adv = dollar_volume(prices, volumes, fx, table["currency"]).rolling(window, min_periods=minp).mean().shift(1)
+    return CostModel(table=table, sigma=sigma, adv_usd=adv, impact_coef=impact_coef, notional_usd=notional_usd)
+
+
+def cost_model_from_config(cfg, prices: pd.DataFrame, volumes: pd.DataFrame | None) -> CostModel | None:
+    """Cost model of the Config (`cfg.cost_model`), or None for flat costs only."""
+    if cfg.cost_model not in COST_MODELS:
+        raise ValueError(f"Unknown cost model '{cfg.cost_model}'. Use one of {COST_MODELS}.")
+    if cfg.cost_model == "flat":
+        return None
+    if prices is None:
+        raise ValueError("cost_model='volume' requires prices (and volumes) for the impact term.")
+    return build_cost_model(
+        prices, volumes,
+        window=cfg.cost_window,
+        impact_coef=cfg.impact_coef,
+        notional_usd=cfg.portfolio_notional,
+        spreads_path=cfg.spread_table,
+    )
@@ -2,10 +2,11 @@ import os
 import time
 from typing import Iterable
 import pandas as pd
-import yfinance as yf
 import sys, os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from auto_ml_pkg.profiling import span
+
 # === Directories for cached and raw CSVs (GLOBAL auto_ml/)
 
 # BASE_DIR = folder of this file → auto_ml/auto_ml_pkg
@@ -20,8 +21,7 @@ DATA_DIR = os.path.join(PROJECT_ROOT, "data", "cache")
 # Manually downloaded CSVs will go in auto_ml/data/raw
 RAW_DIR = os.path.join(PROJECT_ROOT, "data", "raw")
 
-os.makedirs(DATA_DIR, exist_ok=True)
-os.makedirs(RAW_DIR, exist_ok=True)
+# Folders are created on first write (not at import time)
 
 def _cache_path(ticker: str) -> str:
     """Return path for cached CSV."""
@@ -31,9 +31,10 @@ def _raw_path(ticker: str) -> str:
     """Return path for manually downloaded CSV (Yahoo export)."""
     return os.path.join(RAW_DIR, f"{ticker.replace('.', '_')}.csv")
 
-def _normalize_price_df(df: pd.DataFrame, ticker: str) -> pd.Series | None:
+def _normalize_price_df(df: pd.DataFrame, ticker: str, fields=("Close", "Adj Close")) -> pd.Series | None:
     """
-    Clean and extract a single 'Close' price series from a Yahoo DataFrame.
+    Clean and extract a single 'Close' price series from a Yahoo DataFrame
+    (or the first of `fields` found, e.g. ("Volume",)).
     Handles both single-index and multi-index (ticker, field) structures.
     """
     if df is None or len(df) == 0:
@@ -47,7 +48,7 @@ def _normalize_price_df(df: pd.DataFrame, ticker: str) -> pd.Series | None:
     # Handle MultiIndex columns (e.g., (TSLA, Close))
     if isinstance(df.columns, pd.MultiIndex):
         # Try to extract by level: ('Close',) or ('Adj Close',)
-        for candidate in ["Close", "Adj Close"]:
+        for candidate in fields:
             try:
                 sub = df.xs(key=candidate, level=1, axis=1)
                 if ticker in sub.columns:
@@ -59,7 +60,7 @@ def _normalize_price_df(df: pd.DataFrame, ticker: str) -> pd.Series | None:
         # Alternative attempt: xs by ticker then 'Close'
         try:
             sub = df.xs(key=ticker, level=0, axis=1)
-            for col in ["Close", "Adj Close"]:
+            for col in fields:
                 if col in sub.columns:
                     s = sub[col].rename(ticker).dropna()
                     s.index.name = "Date"
@@ -69,7 +70,7 @@ def _normalize_price_df(df: pd.DataFrame, ticker: str) -> pd.Series | None:
         return None
 
     # Handle simple columns (non-multi-index)
-    for col in ["Close", "Adj Close"]:
+    for col in fields:
         if col in df.columns:
             s = df[col].rename(ticker).dropna()
             s.index.name = "Date"
@@ -77,10 +78,13 @@ def _normalize_price_df(df: pd.DataFrame, ticker: str) -> pd.Series | None:
 
     return None
 
-def _save_cache(ticker: str, series: pd.Series) -> None:
-    """Save a clean price series (Date, Close) to cache."""
+def _save_cache(ticker: str, series: pd.Series, volume: pd.Series | None = None) -> None:
+    """Save a clean price series (Date, Close) to cache, with its Volume when available."""
     out = series.to_frame(name="Close")
+    if volume is not None:
+        out["Volume"] = volume.reindex(out.index)
     out.index.name = "Date"
+    os.makedirs(DATA_DIR, exist_ok=True)
     out.to_csv(_cache_path(ticker), index=True)
 
 def _load_cache(ticker: str, start: str, end: str) -> pd.Series | None:
@@ -116,7 +120,7 @@ def _load_raw_csv_if_available(ticker: str, start: str, end: str) -> pd.Series |
         if s.empty:
             return None
         # Save to cache for future offline use
-        _save_cache(ticker, s)
+        _save_cache(ticker, s, df["Volume"] if "Volume" in df.columns else None)
         print(f"[INFO] Loaded '{ticker}' from raw CSV and cached it.")
         return s
     except Exception as e:
@@ -130,8 +134,13 @@ def _download_one(ticker: str, start: str, end: str, retries: int = 4, base_paus
       2. Try yf.Ticker().history()
       3. Fallback to cached data
       4. Fallback to manually downloaded CSV in data/raw
+    Without yfinance installed, steps 1 and 2 are skipped.
     """
     last_exc = None
+    try:
+        import yfinance as yf  # heavy import, only needed when a download is attempted
+    except ImportError as e:
+        yf, last_exc, retries = None, e, 0  # no download attempts: straight to cache / raw CSV
 
     # (1) Try yf.download with exponential backoff
     for i in range(retries):
@@ -149,7 +158,7 @@ def _download_one(ticker: str, start: str, end: str, retries: int = 4, base_paus
             )
             s = _normalize_price_df(df, ticker)
             if s is not None and len(s) > 0:
-                _save_cache(ticker, s)
+                _save_cache(ticker, s, _normalize_price_df(df, ticker, fields=("Volume",)))
                 return s
             else:
                 last_exc = RuntimeError("Empty or unrecognized DataFrame from yf.download")
@@ -164,7 +173,7 @@ def _download_one(ticker: str, start: str, end: str, retries: int = 4, base_paus
             df = tk.history(start=start, end=end, interval="1d", auto_adjust=True, actions=False, timeout=60)
             s = _normalize_price_df(df, ticker)
             if s is not None and len(s) > 0:
-                _save_cache(ticker, s)
+                _save_cache(ticker, s, _normalize_price_df(df, ticker, fields=("Volume",)))
                 return s
             else:
                 last_exc = RuntimeError("Empty or unrecognized DataFrame from Ticker.history")
@@ -197,7 +206,8 @@ def fetch_prices(tickers: Iterable[str], start: str, end: str) -> pd.DataFrame:
     """
     series = []
     for t in tickers:
-        s = _download_one(t, start, end)
+        with span("download", cat="data", ticker=t):
+            s = _download_one(t, start, end)
         if s is not None and len(s) > 0:
             series.append(s)
         else:
@@ -206,12 +216,47 @@ def fetch_prices(tickers: Iterable[str], start: str, end: str) -> pd.DataFrame:
     if not series:
         raise RuntimeError(
             "No price data available (network blocked and no cache). "
-            "Upload CSVs to auto_ml/data/raw/<TICKER>.csv or auto_ml/data/cache/<TICKER>.csv with columns Date,Close (or Adj Close)."
+            "Upload CSVs to auto_ml/data/raw/<TICKER>.csv or auto_ml/data/cache/<TICKER>.csv with columns Date,Close (or Adj Close) and optionally Volume."
         )
 
-    prices = pd.concat(series, axis=1).sort_index()
+    prices = pd.concat(series, axis=1, sort=True)
     return prices
 
+def _load_volume(ticker: str, start: str, end: str) -> pd.Series | None:
+    """Volume column of the cached (or raw) CSV of a ticker within the date range, if present."""
+    for path in (_cache_path(ticker), _raw_path(ticker)):
+        if not os.path.exists(path):
+            continue
+        try:
+            df = pd.read_csv(path, parse_dates=["Date"], index_col="Date")
+        except Exception:
+            continue
+        if "Volume" not in df.columns:
+            continue
+        v = df["Volume"].rename(ticker).sort_index()
+        return v.loc[(v.index >= pd.to_datetime(start)) & (v.index <= pd.to_datetime(end))]
+    return None
+
+def fetch_volumes(tickers: Iterable[str], start: str, end: str) -> pd.DataFrame:
+    """
+    Daily share volumes for a list of tickers, read from the CSVs written by
+    `fetch_prices` (downloads store Volume next to Close). Tickers whose cache
+    predates volume ingestion are reported and left out; delete their cache
+    file to download them again.
+    """
+    series, missing = [], []
+    for t in tickers:
+        v = _load_volume(t, start, end)
+        if v is None or v.dropna().empty:
+            missing.append(t)
+        else:
+            series.append(v)
+    if missing:
+        print(f"[WARN] No volume data for {missing} (cache without a Volume column).")
+    if not series:
+        return pd.DataFrame(columns=list(tickers), dtype=float)
+    return pd.concat(series, axis=1, sort=True).astype(float)
+
 def fetch_benchmark(symbol: str, start: str, end: str, fallback_from: pd.DataFrame | None = None) -> pd.Series:
     """
     Fetch a benchmark index (e.g., S&P 500).
@@ -224,9 +269,21 @@ def fetch_benchmark(symbol: str, start: str, end: str, fallback_from: pd.DataFra
     if fallback_from is None or fallback_from.empty:
         raise RuntimeError(f"Benchmark '{symbol}' unavailable and no fallback data provided.")
 
-    # Equal-weight synthetic benchmark
-    ew = fallback_from.pct_change().mean(axis=1).pipe(lambda r: (1 + r).cumprod())
+    print("[INFO] Using equal-weight benchmark fallback.")
+    return equal_weight_benchmark(fallback_from)
+
+def equal_weight_benchmark(prices: pd.DataFrame) -> pd.Series:
+    """
+    Equal-weight synthetic benchmark (base 100) built from a price panel.
+    Always float64: the cumulative product is promoted whatever the panel dtype.
+
+    Returns are not forward-filled over gaps (fill_method=None): a ticker
+    without a price on a day, or on the day before, is left out of that
+    day's mean. Days without any return (the first row) count as 0, so the
+    index starts at 100. The original fallback forward-filled gaps and
+    started with a NaN return, which made the whole series NaN.
+    """
+    ew = prices.astype(float).pct_change(fill_method=None).mean(axis=1).fillna(0).pipe(lambda r: (1 + r).cumprod())
     ew = ew / ew.iloc[0] * 100.0
     ew.name = "EQUAL_WEIGHT_BENCH"
-    print("[INFO] Using equal-weight benchmark fallback.")
     return ew
\ No newline at end of file
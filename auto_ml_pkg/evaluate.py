@@ -1,6 +1,5 @@
 import numpy as np
 import pandas as pd
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import sys, os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
@@ -8,7 +7,9 @@ def regression_report(y_true: pd.Series, y_pred: pd.Series) -> dict:
     """
     Computes MSE, MAE and R^2 on aligned non-missing pairs of (y_true, y_pred).
     """
-    df = pd.concat([y_true, y_pred], axis=1).dropna()                    # align and drop NaNs
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score  # imported on first use
+
+    df = pd.concat([y_true, y_pred], axis=1).dropna().astype(np.float64) # align, drop NaNs, promote float32 inputs
     if df.empty:
         return {"MSE": np.nan, "MAE": np.nan, "R2": np.nan}              # return NaNs if no data
     return {
@@ -21,10 +22,58 @@ def information_coefficient(y_true: pd.Series, y_pred: pd.Series) -> dict:
     """
     Computes Pearson and Spearman correlations between predictions and realized targets.
     """
-    df = pd.concat([y_true, y_pred], axis=1).dropna()
+    df = pd.concat([y_true, y_pred], axis=1).dropna().astype(np.float64)
     if len(df) < 3:
         return {"pearson": np.nan, "spearman": np.nan}
     return {
         "pearson": float(df.corr(method="pearson").iloc[0, 1]),
         "spearman": float(df.corr(method="spearman").iloc[0, 1]),
-    }
\ No newline at end of file
+    }
+
+def fold_report(fold, P: pd.DataFrame, Y: pd.DataFrame) -> dict:
+    """
+    Test metrics of one walk-forward fold (folds.Fold): date bounds,
+    MSE / MAE / R^2 and Pearson / Spearman IC of the stacked predictions.
+    """
+    stack_true, stack_pred = Y.stack(), P.stack()
+    reg = regression_report(stack_true, stack_pred)
+    ic = information_coefficient(stack_true, stack_pred)
+    return {
+        "fold": fold.fold,
+        **fold.bounds(),
+        "MSE": reg["MSE"],
+        "MAE": reg["MAE"],
+        "R2":  reg["R2"],
+        "IC_pearson":  ic["pearson"],
+        "IC_spearman": ic["spearman"],
+    }
+
+def max_drawdown(equity, axis: int = 0):
+    """
+    Largest peak-to-trough loss (<= 0) of equity curves along `axis`. The
+    running peak starts at 1.0, the initial capital, so a loss from the
+    first point on counts as a drawdown.
+    """
+    eq = np.asarray(equity, dtype=np.float64)
+    peak = np.maximum(np.maximum.accumulate(eq, axis=axis), 1.0)
+    return (eq / peak - 1.0).min(axis=axis)
+
+def equity_stats(ec: pd.Series, periods_per_year: float) -> dict:
+    """
+    Summary statistics of an equity curve (cumulative growth, starting from 1.0).
+    `periods_per_year` is the number of curve points per year (e.g. 252 / rebalance_every).
+    """
+    if ec is None or len(ec) == 0:
+        return {"final_equity": np.nan, "ann_return": np.nan, "ann_vol": np.nan,
+                "sharpe": np.nan, "max_drawdown": np.nan, "n_periods": 0}
+    rets = ec.pct_change()
+    rets.iloc[0] = ec.iloc[0] - 1.0                                      # first period starts from 1.0
+    mean, vol = rets.mean(), rets.std(ddof=1)
+    return {
+        "final_equity": float(ec.iloc[-1]),
+        "ann_return": float(mean * periods_per_year),
+        "ann_vol": float(vol * np.sqrt(periods_per_year)),
+        "sharpe": float(mean / vol * np.sqrt(periods_per_year)) if vol > 0 else np.nan,
+        "max_drawdown": float(max_drawdown(ec)),
+        "n_periods": int(len(ec)),
+    }
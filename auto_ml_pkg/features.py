@@ -3,6 +3,8 @@ import pandas as pd
 import sys, os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from auto_ml_pkg.profiling import traced
+
 def rsi(px: pd.Series, period: int = 14) -> pd.Series: # to compute RSI indicator for a price series
     """
     Computes a standard RSI using exponential moving averages of gains/losses.
@@ -16,7 +18,8 @@ def rsi(px: pd.Series, period: int = 14) -> pd.Series: # to compute RSI indicato
     return 100 - 100 / (1 + rs)
 
 
-def make_features(prices: pd.DataFrame) -> pd.DataFrame: # to create technical features from price data
+@traced(cat="features")
+def make_features(prices: pd.DataFrame, dtype=None) -> pd.DataFrame: # to create technical features from price data
     """
     Constructs technical features per ticker using only past information:
     - Momentum over 5/20/60 days
@@ -24,11 +27,16 @@ def make_features(prices: pd.DataFrame) -> pd.DataFrame: # to create technical f
     - Price / MA20 ratio
     - RSI(14)
     Returns a wide DataFrame with feature columns for each ticker.
+
+    Rolling statistics are computed in float64 for every ticker; each
+    ticker's block is then stored as `dtype` (default float64) before the
+    blocks are combined, so a float32 panel never exists as float64 in full.
     """
+    dtype = np.dtype(dtype or np.float64)
     feats = []
 
     for t in prices.columns:
-        px = prices[t]
+        px = prices[t].astype(np.float64)                   # explicit promotion for rolling sums
         df = pd.DataFrame(index=prices.index)
 
         # Momentum features
@@ -46,7 +54,7 @@ def make_features(prices: pd.DataFrame) -> pd.DataFrame: # to create technical f
 
         # Replace inf / -inf by NaN and drop rows with all-NaN
         df.replace([np.inf, -np.inf], np.nan, inplace=True)
-        feats.append(df)
+        feats.append(df.astype(dtype))
 
     # Combine all tickers’ features
     F = pd.concat(feats, axis=1)
@@ -56,15 +64,17 @@ def make_features(prices: pd.DataFrame) -> pd.DataFrame: # to create technical f
     return F
 
 
-def make_targets_excess(prices: pd.DataFrame, bench: pd.Series, horizon: int) -> pd.DataFrame:
+@traced(cat="features")
+def make_targets_excess(prices: pd.DataFrame, bench: pd.Series, horizon: int, dtype=None) -> pd.DataFrame:
     """
     Creates the regression targets: future log-return (asset) minus future log-return (benchmark)
     aggregated over the next 'horizon' days (t+1 ... t+h).
     Using log-returns ensures additivity over the window.
+    Log-returns and their rolling sums are computed in float64; the result is stored as `dtype`.
     """
-    # Compute daily log-returns
-    lr_assets = np.log1p(prices.pct_change(fill_method=None))
-    lr_bench = np.log1p(bench.pct_change(fill_method=None))
+    # Compute daily log-returns (explicitly promoted to float64)
+    lr_assets = np.log1p(prices.astype(np.float64).pct_change(fill_method=None))
+    lr_bench = np.log1p(bench.astype(np.float64).pct_change(fill_method=None))
 
     # Sum of future log-returns over next 'horizon' days
     y_assets = lr_assets.shift(-1).rolling(horizon, min_periods=1).sum()
@@ -79,5 +89,5 @@ def make_targets_excess(prices: pd.DataFrame, bench: pd.Series, horizon: int) ->
     # Clean infinities, keep NaN (they’ll be dropped later per-ticker)
     Y.replace([np.inf, -np.inf], np.nan, inplace=True)
 
-    return Y
+    return Y.astype(np.dtype(dtype or np.float64))
 
@@ -0,0 +1,129 @@
+from dataclasses import dataclass
+from typing import Iterator
+import pandas as pd
+import sys, os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Refit cadence → pandas frequency of test-period starts
+CADENCES = {
+    "annual": "YS",
+    "quarterly": "QS",
+    "monthly": "MS",
+    "weekly": "W-MON",
+}
+WINDOWS = ("expanding", "rolling")
+
+
+@dataclass(frozen=True)
+class Fold:
+    """
+    One walk-forward fold as integer row ranges over a shared, sorted date index.
+    Use `df.iloc[fold.train]` / `df.iloc[fold.test]` to get views without masks.
+    """
+    fold: int
+    train: slice
+    test: slice
+    train_start: pd.Timestamp
+    train_end: pd.Timestamp
+    test_start: pd.Timestamp
+    test_end: pd.Timestamp
+
+    @property
+    def n_train(self) -> int:
+        return self.train.stop - self.train.start
+
+    @property
+    def n_test(self) -> int:
+        return self.test.stop - self.test.start
+
+    def bounds(self) -> dict:
+        """Actual first / last dates of the train and test rows (as strings)."""
+        return {
+            "train_start": str(self.train_start.date()),
+            "train_end":   str(self.train_end.date()),
+            "test_start":  str(self.test_start.date()),
+            "test_end":    str(self.test_end.date()),
+        }
+
+
+def walkforward_folds(                          # to generate walk-forward folds lazily
+    index: pd.DatetimeIndex,                    # sorted dates shared by features and targets
+    start: str,                                 # first date usable for training
+    first_test: str,                            # start of the first test period
+    end: str,                                   # last date of the last test period
+    cadence: str = "annual",                    # refit cadence: annual / quarterly / monthly / weekly
+    window: str = "expanding",                  # 'expanding' or 'rolling' training window
+    train_days: int | None = None,              # rolling window length in rows (required for 'rolling')
+    purge: int = 0,                             # rows dropped before each test period (target horizon)
+    embargo: int = 0,                           # extra gap rows between the purge and the test period
+    min_train: int = 1,                         # folds with fewer training rows are skipped
+) -> Iterator[Fold]:
+    """
+    Yield walk-forward folds with non-overlapping test periods.
+
+    Test periods start at every `cadence` boundary from `first_test` to `end`.
+    Training rows end `purge + embargo` rows before the test period, so that
+    targets looking `purge` rows ahead never overlap the test window; the
+    training window either expands from `start` or keeps the last `train_days`
+    rows. Only row positions are computed (binary searches on the index), so
+    schedules with hundreds of folds are cheap to set up.
+    """
+    if cadence not in CADENCES:
+        raise ValueError(f"Unknown cadence '{cadence}'. Use one of {sorted(CADENCES)}.")
+    if window not in WINDOWS:
+        raise ValueError(f"Unknown window '{window}'. Use one of {WINDOWS}.")
+    if window == "rolling" and not train_days:
+        raise ValueError("A rolling window requires train_days.")
+
+    first_test, end = pd.Timestamp(first_test), pd.Timestamp(end)
+    starts = pd.date_range(first_test, end, freq=CADENCES[cadence])
+    if len(starts) == 0 or starts[0] != first_test:
+        starts = starts.insert(0, first_test)                            # first period starts exactly at first_test
+
+    lo_all = int(index.searchsorted(pd.Timestamp(start), side="left"))
+    hi_all = int(index.searchsorted(end, side="right"))
+    gap = purge + embargo
+
+    n = 0
+    for i, period_start in enumerate(starts):
+        test_lo = max(int(index.searchsorted(period_start, side="left")), lo_all)
+        test_hi = int(index.searchsorted(starts[i + 1], side="left")) if i + 1 < len(starts) else hi_all
+        test_hi = min(test_hi, hi_all)
+        if test_hi <= test_lo:
+            continue                                                    # no trading day in this period
+
+        train_hi = test_lo - gap
+        train_lo = lo_all if window == "expanding" else max(lo_all, train_hi - train_days)
+        if train_hi - train_lo < min_train:
+            continue
+
+        n += 1
+        yield Fold(
+            fold=n,
+            train=slice(train_lo, train_hi),
+            test=slice(test_lo, test_hi),
+            train_start=index[train_lo],
+            train_end=index[train_hi - 1],
+            test_start=index[test_lo],
+            test_end=index[test_hi - 1],
+        )
+
+
+def aggregate_folds(folds: list[dict]) -> dict:
+    """
+    Predict-stage output from per-fold predictions ({"fold", "P", "Y"} items):
+    the folds plus all out-of-sample predictions and realized values stacked
+    over the test periods. Shared by the walk-forward stage, chunked.py and
+    workqueue.py.
+    """
+    if not folds:
+        raise RuntimeError("No predictions created in any fold. Check folds or data availability.")
+
+    # Aggregate all out-of-sample predictions (all test periods)
+    P_all = pd.concat([f["P"] for f in folds], axis=0).sort_index()
+    Y_all = pd.concat([f["Y"] for f in folds], axis=0).sort_index()
+
+    # Align indices just in case
+    Y_all = Y_all.reindex(P_all.index).ffill().bfill()
+    return {"folds": folds, "P_all": P_all, "Y_all": Y_all}
+
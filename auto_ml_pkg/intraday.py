@@ -0,0 +1,341 @@
+import argparse
+import json
+import os
+import sys
+from dataclasses import dataclass, fields
+
+import numpy as np
+import pandas as pd
+
+# Add project root (/files/auto_ml) to sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))   # folder: auto_ml/auto_ml_pkg
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                # folder: auto_ml
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Intraday bar store: data/bars/<interval>/{manifest.json, <TICKER>.npz}
+BARS_DIR = os.path.join(PROJECT_ROOT, "data", "bars")
+BAR_COLUMNS = ("open", "high", "low", "close", "volume")
+RESAMPLE_FREQS = ("D", "W")
+
+from auto_ml_pkg.artifacts import write_frame, read_frame
+from auto_ml_pkg.profiling import traced
+
+# Usage:
+#   python auto_ml_pkg/intraday.py ingest data/raw_bars/ --interval 5m      # one CSV / parquet file per ticker
+#   python auto_ml_pkg/intraday.py stub --tickers 100 --days 250 --interval 5m
+#   python auto_ml_pkg/intraday.py resample --interval 5m --freq D         # daily bars + features → outputs/runs/
+#
+#   bars = BarStore("5m").load(["TSLA", "F"], start="2024-01-01")        # long format, one row per bar
+#   daily = resample_bars(bars, "D")                                    # wide (dates × tickers) OHLCV + RV
+#   X_intraday = intraday_features(daily)                               # rv_/cc_/oc_ columns per ticker
+#
+# Long bar format (all functions of this module): 'timestamp' DatetimeIndex
+# and columns ticker, open, high, low, close, volume; any row order.
+
+
+# ============================================================
+# Ingestion: local files / stub source → binary bar store
+# ============================================================
+
+def read_bar_file(path: str) -> pd.DataFrame:
+    """
+    One ticker's bars from a CSV or parquet export. Column names are matched
+    case-insensitively (Datetime / Date / Timestamp, Open, High, Low, Close,
+    Volume); timestamps are made timezone-free.
+
+    Returns
+    -------
+    pd.DataFrame
+        'timestamp' index, columns open, high, low, close, volume (float64), sorted.
+    """
+    df = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    time_col = next((c for c in ("timestamp", "datetime", "date", "time") if c in df.columns), None)
+    if time_col is None:
+        raise ValueError(f"{path}: no timestamp column (expected Datetime, Date or Timestamp).")
+    missing = [c for c in BAR_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"{path}: missing bar columns {missing}.")
+
+    index = pd.DatetimeIndex(pd.to_datetime(df[time_col]), name="timestamp")
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    out = pd.DataFrame(df[list(BAR_COLUMNS)].to_numpy(dtype=float), index=index, columns=list(BAR_COLUMNS))
+    return out[~out.index.duplicated(keep="last")].sort_index()
+
+
+class BarStore:
+    """
+    Intraday bars of one interval, stored per ticker as columnar .npz files
+    (same layout as the run-artifact store) with their metadata in
+    `manifest.json`. A time window of one ticker is read without loading the
+    others.
+    """
+
+    def __init__(self, interval: str = "5m", root: str = BARS_DIR):
+        self.interval = interval
+        self.path = os.path.join(root, interval)
+        manifest = os.path.join(self.path, "manifest.json")
+        self.manifest = {"interval": interval, "tickers": {}}
+        if os.path.exists(manifest):
+            with open(manifest, "r", encoding="utf-8") as fh:
+                self.manifest = json.load(fh)
+
+    def _file(self, ticker: str) -> str:
+        return f"{ticker.replace('.', '_')}.npz"
+
+    def write(self, ticker: str, bars: pd.DataFrame) -> str:
+        """Store (replace) the bars of one ticker; `bars` has a timestamp index and the OHLCV columns."""
+        os.makedirs(self.path, exist_ok=True)
+        frame = bars[list(BAR_COLUMNS)].astype(float).sort_index()
+        path = os.path.join(self.path, self._file(ticker))
+        meta = write_frame(path, frame)
+        self.manifest["tickers"][ticker] = {
+            **meta, "file": self._file(ticker),
+            "first": str(frame.index[0]) if len(frame) else None,
+            "last": str(frame.index[-1]) if len(frame) else None,
+        }
+        self._write_manifest()
+        return path
+
+    def write_long(self, bars: pd.DataFrame) -> list[str]:
+        """Store every ticker of a long-format bar frame (e.g. synthetic.synthetic_bars)."""
+        return [self.write(str(t), g) for t, g in bars.groupby("ticker", observed=True, sort=False)]
+
+    def _write_manifest(self) -> None:
+        path = os.path.join(self.path, "manifest.json")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self.manifest, fh, indent=2)
+        os.replace(tmp, path)
+
+    def tickers(self) -> list[str]:
+        return list(self.manifest["tickers"])
+
+    def read(self, ticker: str, start=None, end=None) -> pd.DataFrame:
+        """Bars of one ticker between `start` and `end` (inclusive)."""
+        meta = self.manifest["tickers"][ticker]
+        return read_frame(os.path.join(self.path, meta["file"]), meta, start=start, end=end)
+
+    def load(self, tickers=None, start=None, end=None) -> pd.DataFrame:
+        """Bars of several tickers (default: all) in long format, ticker-major."""
+        tickers = [t for t in (tickers or self.tickers()) if t in self.manifest["tickers"]]
+        if not tickers:
+            raise RuntimeError(f"No bars stored for these tickers under {self.path}.")
+        parts = [self.read(t, start, end) for t in tickers]
+        bars = pd.concat(parts, axis=0)
+        bars.insert(0, "ticker", pd.Categorical(np.repeat(tickers, [len(p) for p in parts]), categories=tickers))
+        bars.index.name = "timestamp"
+        return bars
+
+
+def ingest_dir(src_dir: str, interval: str = "5m", root: str = BARS_DIR) -> list[str]:
+    """
+    Ingest every `<TICKER>.csv` / `<TICKER>.parquet` file of a folder (the
+    ticker is the file stem, '_' read back as '.') into the bar store.
+    """
+    store = BarStore(interval, root)
+    done = []
+    for name in sorted(os.listdir(src_dir)):
+        stem, ext = os.path.splitext(name)
+        if ext not in (".csv", ".parquet"):
+            continue
+        ticker = stem.replace("_", ".")
+        try:
+            bars = read_bar_file(os.path.join(src_dir, name))
+        except (ValueError, OSError) as e:
+            print(f"[SKIP] {name}: {e}")
+            continue
+        store.write(ticker, bars)
+        print(f"[INFO] Ingested {len(bars):,} bars for '{ticker}' ({interval}).")
+        done.append(ticker)
+    return done
+
+
+# ============================================================
+# Resampling kernel: all tickers at once, no per-ticker loop
+# ============================================================
+
+@dataclass
+class BarPanels:
+    """Resampled bars as wide (period × ticker) panels."""
+    open: pd.DataFrame
+    high: pd.DataFrame
+    low: pd.DataFrame
+    close: pd.DataFrame
+    volume: pd.DataFrame
+    rv: pd.DataFrame            # realized variance: sum of squared intraday log-returns (overnight gap excluded)
+    n_bars: pd.DataFrame        # bars aggregated into each period
+
+    def as_dict(self) -> dict:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+def _period_ids(ns: np.ndarray, freq: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Integer period of each timestamp (int64 ns) and the period label (datetime64[ns]):
+    the calendar day for 'D', the week ending on Friday for 'W' (as pandas 'W-FRI').
+    """
+    day = np.floor_divide(ns, 86_400_000_000_000)                     # days since 1970-01-01 (a Thursday)
+    if freq == "D":
+        return day, day.astype("datetime64[D]").astype("datetime64[ns]")
+    if freq == "W":
+        week = np.floor_divide(day - 2, 7)                            # Saturday → Friday weeks
+        friday = week * 7 + 8
+        return week, friday.astype("datetime64[D]").astype("datetime64[ns]")
+    raise ValueError(f"Unknown resampling frequency '{freq}'. Use one of {RESAMPLE_FREQS}.")
+
+
+@traced(cat="features")
+def resample_bars(bars: pd.DataFrame, freq: str = "D") -> BarPanels:
+    """
+    Aggregate intraday bars of all tickers into daily ('D') or weekly ('W')
+    bars in one vectorized pass.
+
+    Rows are sorted once by (ticker, timestamp); period boundaries are the
+    positions where the ticker or the period changes, and every statistic is
+    a segment reduction over those boundaries (first open, max high, min
+    low, last close, summed volume and squared log-returns). The realized
+    variance only uses returns between bars of the same day, so overnight
+    gaps are excluded (they show up in the close-to-close return) and the
+    weekly realized variance is the sum of the daily ones.
+
+    Returns
+    -------
+    BarPanels
+        Wide panels indexed by period label, one column per ticker; NaN
+        where a ticker has no bar in a period.
+    """
+    bars = bars[np.isfinite(bars["close"].to_numpy(dtype=float))]
+    codes, tickers = pd.factorize(bars["ticker"], sort=True)
+    ns = bars.index.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    order = np.lexsort((ns, codes))
+    codes, ns = codes[order], ns[order]
+    o, h, l, c, v = (bars[col].to_numpy(dtype=np.float64)[order] for col in BAR_COLUMNS)
+
+    period, label = _period_ids(ns, freq)
+    n = len(codes)
+    first = np.ones(n, dtype=bool)
+    first[1:] = (codes[1:] != codes[:-1]) | (period[1:] != period[:-1])
+    starts = np.flatnonzero(first)
+    ends = np.r_[starts[1:], n] - 1
+
+    # Intraday log-returns, zeroed at the first bar of every (ticker, day): no overnight gaps, even in weekly bars
+    day, _ = _period_ids(ns, "D")
+    new_day = first.copy()
+    new_day[1:] |= day[1:] != day[:-1]
+    log_c = np.log(c)
+    r = np.empty(n)
+    r[0] = 0.0
+    r[1:] = log_c[1:] - log_c[:-1]
+    r[new_day] = 0.0
+
+    stats = {
+        "open": o[starts],
+        "high": np.maximum.reduceat(h, starts),
+        "low": np.minimum.reduceat(l, starts),
+        "close": c[ends],
+        "volume": np.add.reduceat(v, starts),
+        "rv": np.add.reduceat(r * r, starts),
+        "n_bars": (ends - starts + 1).astype(float),
+    }
+
+    # Scatter the segments into (period × ticker) panels
+    dates, row = np.unique(label[starts], return_inverse=True)
+    col = codes[starts]
+    index = pd.DatetimeIndex(dates, name="Date")
+    columns = pd.Index([str(t) for t in tickers])
+    panels = {}
+    for name, values in stats.items():
+        grid = np.full((len(dates), len(columns)), np.nan)
+        grid[row, col] = values
+        panels[name] = pd.DataFrame(grid, index=index, columns=columns)
+    return BarPanels(**panels)
+
+
+def bar_returns(panels: BarPanels) -> dict:
+    """
+    Close-to-close, open-to-close (intraday) and close-to-open (overnight)
+    simple returns of resampled bars; cc = (1 + co) · (1 + oc) − 1.
+    """
+    prev_close = panels.close.shift(1)
+    return {
+        "cc": panels.close / prev_close - 1.0,
+        "oc": panels.close / panels.open - 1.0,
+        "co": panels.open / prev_close - 1.0,
+    }
+
+
+@traced(cat="features")
+def intraday_features(panels: BarPanels, windows=(1, 20)) -> pd.DataFrame:
+    """
+    Intraday-derived features of daily bars, computed on the wide panels
+    (one rolling pass per statistic for all tickers):
+    - rv_<t>_<w>: realized volatility, sqrt of the mean daily realized variance over w days
+    - cc_<t>_<w>: close-to-close return over w days
+    - oc_<t>_<w>: sum of open-to-close (intraday) returns over w days
+
+    Returns a wide DataFrame (dates × features), tickers grouped together.
+    """
+    ret = bar_returns(panels)
+    log_cc = np.log1p(ret["cc"])
+    names, blocks = [], []
+    for w in windows:
+        names += [f"rv_{{t}}_{w}", f"cc_{{t}}_{w}", f"oc_{{t}}_{w}"]
+        blocks += [
+            np.sqrt(panels.rv.rolling(w).mean()).to_numpy(),
+            np.expm1(log_cc.rolling(w).sum()).to_numpy(),
+            ret["oc"].rolling(w).sum().to_numpy(),
+        ]
+
+    # (dates, tickers, features) → columns grouped by ticker
+    tickers = panels.close.columns
+    cube = np.stack(blocks, axis=-1)
+    columns = [name.format(t=t) for t in tickers for name in names]
+    F = pd.DataFrame(cube.reshape(len(panels.close), -1), index=panels.close.index, columns=columns)
+    F = F.replace([np.inf, -np.inf], np.nan).dropna(how="all")
+    return F
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Ingest intraday bars and resample them into daily / weekly bars.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ing = sub.add_parser("ingest", help="Ingest one CSV / parquet file per ticker from a folder.")
+    ing.add_argument("src_dir")
+    ing.add_argument("--interval", default="5m")
+    stub = sub.add_parser("stub", help="Store synthetic bars (offline stub source).")
+    stub.add_argument("--tickers", type=int, default=13)
+    stub.add_argument("--days", type=int, default=60)
+    stub.add_argument("--interval", default="5m")
+    stub.add_argument("--seed", type=int, default=42)
+    res = sub.add_parser("resample", help="Resample stored bars; panels and features go to the run store.")
+    res.add_argument("--interval", default="5m")
+    res.add_argument("--freq", choices=RESAMPLE_FREQS, default="D")
+    res.add_argument("--start", default=None)
+    res.add_argument("--end", default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "ingest":
+        ingest_dir(args.src_dir, args.interval)
+    elif args.command == "stub":
+        from auto_ml_pkg.synthetic import synthetic_bars
+        # '5m' / '1m' (Yahoo-style intervals) → pandas offsets
+        bars = synthetic_bars(args.tickers, args.days, args.interval.replace("m", "min"), seed=args.seed)
+        BarStore(args.interval).write_long(bars)
+        print(f"[INFO] Stored {len(bars):,} synthetic bars ({args.tickers} tickers, {args.interval}).")
+    else:
+        from auto_ml_pkg.artifacts import store_run
+        bars = BarStore(args.interval).load(start=args.start, end=args.end)
+        panels = resample_bars(bars, args.freq)
+        artifacts = {f"{args.freq}_{name}": df for name, df in panels.as_dict().items()}
+        if args.freq == "D":
+            artifacts["intraday_features"] = intraday_features(panels)
+        run_id = store_run("bars", {"interval": args.interval, "freq": args.freq}, artifacts)
+        print(f"[INFO] {len(bars):,} bars → {panels.close.shape[0]} periods × {panels.close.shape[1]} tickers; "
+              f"stored under run ID '{run_id}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,155 @@
-from sklearn.linear_model import Ridge
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import StandardScaler
+import numpy as np
+import pandas as pd
 import sys, os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from auto_ml_pkg.profiling import span
+
+# Feature name prefixes produced by features.make_features and intraday.intraday_features
+# (f"{prefix}{ticker}_{window}")
+FEATURE_PREFIXES = ("mom_", "vol_", "ma_ratio_", "rsi_", "rv_", "cc_", "oc_")
+
+
 def make_ridge(alpha=2.0):
     """
     Ridge regression baseline wrapped in a pipeline with standardization.
+    (scikit-learn is imported here so that importing this module stays cheap.)
     """
+    from sklearn.linear_model import Ridge
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
     return Pipeline([
         ("scaler", StandardScaler()),
         ("model", Ridge(alpha=alpha, random_state=42))
-    ])
\ No newline at end of file
+    ])
+
+
+def ticker_feature_columns(columns, t: str) -> list[str]:
+    """
+    Feature columns of the wide feature frame that belong to ticker `t`.
+    """
+    prefixes = tuple(f"{p}{t}_" for p in FEATURE_PREFIXES)
+    return [c for c in columns if c.startswith(prefixes)]
+
+
+def _rows(df, rows, cols):
+    """Block of `cols` on rows selected by boolean mask or by integer range (slice), copied once."""
+    if isinstance(rows, slice):
+        return df.iloc[rows, df.columns.get_indexer(cols)]
+    return df.loc[rows, cols]
+
+
+def _ticker_rows(X: pd.DataFrame, Y: pd.DataFrame, t: str, cols: list[str], rows) -> pd.DataFrame:
+    """
+    Complete (features, target) rows of one ticker: target aligned on the
+    feature index, rows with any NaN or infinity dropped. The design matrix
+    keeps the dtype of X (float32 panels stay float32).
+    """
+    X_t = _rows(X, rows, cols)
+    Y_t = Y[t].reindex(X_t.index)
+    ok = np.isfinite(X_t.to_numpy()).all(axis=1) & np.isfinite(Y_t.to_numpy())
+    return pd.concat([X_t[ok], Y_t[ok]], axis=1)
+
+
+def fit_tickers(                                # to fit one Ridge model per ticker on a train window
+    X: pd.DataFrame,                            # wide feature frame
+    Y: pd.DataFrame,                            # targets (dates × tickers)
+    tickers,                                    # tickers to fit
+    train_rows,                                 # boolean mask over X.index or integer row range (slice)
+    test_rows,                                  # boolean mask over X.index or integer row range (slice)
+    alpha: float = 2.0,                         # Ridge regularization
+    label: str = "",                            # suffix for progress bar / log lines (e.g. " (fold 3)")
+    min_train: int = 100,                       # complete train rows required per ticker
+    min_test: int = 20,                         # complete test rows required per ticker (see below)
+) -> dict:
+    """
+    Fit a per-ticker Ridge model on the rows of `train_rows`.
+
+    Tickers without target, without features, or with too little data
+    (fewer than `min_train` complete train rows, or fewer than
+    min(`min_test`, half the test window) complete test rows) are skipped.
+    Capping the test requirement at half the window keeps short walk-forward
+    folds (weekly / monthly cadence) from skipping every ticker.
+
+    Returns
+    -------
+    dict
+        ticker -> (fitted model, feature columns)
+    """
+    from tqdm import tqdm
+
+    n_test = test_rows.stop - test_rows.start if isinstance(test_rows, slice) else int(np.sum(test_rows))
+    min_test = min(min_test, max(1, n_test // 2))
+
+    models = {}
+    for t in tqdm(tickers, desc=f"Per-ticker fit{label}"):  # to iterate over each ticker with progress bar
+        cols = ticker_feature_columns(X.columns, t)         # to filter feature columns for the ticker
+
+        if t not in Y.columns:                              # to check if target column exists
+            print(f"[SKIP] {t}: target column missing in Y.")
+            continue
+        if not cols:                                        # to check if any feature columns were found
+            print(f"[SKIP] {t}: no feature columns found.")
+            continue
+
+        with span("fit_ticker", cat="fit", ticker=t):
+            # Complete rows only (missing features / target dropped)
+            tr = _ticker_rows(X, Y, t, cols, train_rows)
+            te = _ticker_rows(X, Y, t, cols, test_rows)
+
+            # Check minimal data
+            if len(tr) < min_train or len(te) < min_test:
+                print(f"[SKIP] {t}{label}: insufficient data (train={len(tr)}, test={len(te)}).")
+                continue
+
+            model = make_ridge(alpha=alpha)
+            model.fit(tr[cols], tr[t])
+            models[t] = (model, cols)
+    return models
+
+
+def predict_tickers(                            # to predict the test window with fitted per-ticker models
+    models: dict,                               # output of fit_tickers
+    X: pd.DataFrame,                            # wide feature frame
+    Y: pd.DataFrame,                            # targets (dates × tickers)
+    test_rows,                                  # boolean mask over X.index or integer row range (slice)
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Predictions and realized targets on the complete test rows of each ticker.
+
+    Returns
+    -------
+    tuple
+        (P, Yf): predictions and realized values (dates × tickers), sorted by date.
+    """
+    preds, reals = {}, {}
+    for t, (model, cols) in models.items():
+        with span("predict_ticker", cat="fit", ticker=t):
+            te = _ticker_rows(X, Y, t, cols, test_rows)
+
+            preds[t] = pd.Series(model.predict(te[cols]), index=te.index, name=t)
+            reals[t] = te[t]
+
+    return pd.DataFrame(preds).sort_index(), pd.DataFrame(reals).sort_index()
+
+
+def ridge_params(models: dict) -> pd.DataFrame:
+    """
+    Fitted parameters of per-ticker Ridge pipelines in long format, one row
+    per (ticker, feature): coefficient and the standardization mean / scale.
+    The intercept is stored as feature 'intercept' (mean 0, scale 1).
+    """
+    rows = []
+    for t, (model, cols) in models.items():
+        scaler, ridge = model.named_steps["scaler"], model.named_steps["model"]
+        rows.append(pd.DataFrame({
+            "ticker": t,
+            "feature": list(cols) + ["intercept"],
+            "coef": np.append(ridge.coef_, ridge.intercept_),
+            "mean": np.append(scaler.mean_, 0.0),
+            "scale": np.append(scaler.scale_, 1.0),
+        }))
+    if not rows:
+        return pd.DataFrame(columns=["ticker", "feature", "coef", "mean", "scale"])
+    return pd.concat(rows, ignore_index=True)
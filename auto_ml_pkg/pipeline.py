@@ -0,0 +1,231 @@
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import pickle
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+import pandas as pd
+
+# Add project root (/files/auto_ml) to sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))   # folder: auto_ml/auto_ml_pkg
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                # folder: auto_ml
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Content-addressed stage outputs: outputs/cache/<stage>/<key>.pkl
+CACHE_DIR = os.path.join(PROJECT_ROOT, "outputs", "cache")
+
+from auto_ml_pkg.config import Config
+from auto_ml_pkg.profiling import span
+
+
+@dataclass
+class Stage:
+    """
+    One pipeline step.
+
+    - `func(cfg, *inputs)` receives the outputs of `inputs` (other stage names) in order.
+    - `params` lists the Config fields the stage reads; they are part of its cache key.
+    - `modules` lists the modules whose source code is part of its code version.
+    - `cache=False` for stages with side effects (e.g. writing reports): they always run.
+    """
+    name: str
+    func: Callable
+    inputs: tuple = ()
+    params: tuple = ()
+    modules: tuple = ()
+    cache: bool = True
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def code_version(stage: Stage) -> str:
+    """Hash of the stage function source and of the source of its declared modules."""
+    parts = [inspect.getsource(stage.func)]
+    for name in stage.modules:
+        parts.append(inspect.getsource(importlib.import_module(name)))
+    return _sha256("\n".join(parts))
+
+
+class ArtifactCache:
+    """
+    Pickled stage outputs stored under `root/<stage>/<key>.pkl`.
+    Writes go to a temporary file first and are moved into place atomically.
+    """
+
+    def __init__(self, root: str = CACHE_DIR):
+        self.root = root
+
+    def path(self, stage: str, key: str) -> str:
+        return os.path.join(self.root, stage.replace(".", "_"), f"{key}.pkl")
+
+    def load(self, stage: str, key: str) -> tuple[bool, Any]:
+        path = self.path(stage, key)
+        if not os.path.exists(path):
+            return False, None
+        try:
+            with open(path, "rb") as fh:
+                return True, pickle.load(fh)
+        except Exception as e:
+            print(f"[WARN] Unreadable cache entry for stage '{stage}' ({e}); recomputing.")
+            return False, None
+
+    def save(self, stage: str, key: str, value: Any) -> None:
+        path = self.path(stage, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+
+class Pipeline:
+    """
+    Runs named stages on demand, resolving their inputs first.
+
+    A stage's cache key is a hash of its name, code version, the values of its
+    Config `params` and the keys of its inputs, so a change anywhere upstream
+    invalidates everything downstream while untouched stages are loaded from
+    the cache. Outputs are also memoized in memory, so several experiments
+    sharing one Pipeline compute each upstream stage once.
+    """
+
+    def __init__(self, cfg: Config | None = None, stages=(), cache: ArtifactCache | None = None, use_cache: bool = True):
+        self.cfg = cfg or Config()
+        self.stages: dict[str, Stage] = {}
+        self.cache = cache or ArtifactCache()
+        self.use_cache = use_cache
+        self._values: dict[str, Any] = {}
+        self._keys: dict[str, str] = {}
+        for s in stages:
+            self.add(s)
+
+    def add(self, stage: Stage) -> Stage:
+        if stage.name in self.stages:
+            raise ValueError(f"Stage '{stage.name}' is already defined.")
+        self.stages[stage.name] = stage
+        return stage
+
+    def stage(self, name: str, inputs=(), params=(), modules=(), cache: bool = True):
+        """Decorator form of `add`."""
+        def register(func):
+            self.add(Stage(name, func, tuple(inputs), tuple(params), tuple(modules), cache))
+            return func
+        return register
+
+    def key(self, name: str) -> str:
+        """Content address of a stage output (computed without running anything)."""
+        if name not in self._keys:
+            stage = self.stages[name]
+            payload = {
+                "stage": name,
+                "code": code_version(stage),
+                "params": {p: getattr(self.cfg, p) for p in stage.params},
+                "inputs": [self.key(i) for i in stage.inputs],
+            }
+            self._keys[name] = _sha256(json.dumps(payload, sort_keys=True, default=str))
+        return self._keys[name]
+
+    def run(self, name: str) -> Any:
+        """Output of stage `name`, from memory, the cache, or by running it."""
+        if name in self._values:
+            return self._values[name]
+        if name not in self.stages:
+            raise KeyError(f"Unknown stage '{name}'. Known stages: {sorted(self.stages)}")
+
+        stage = self.stages[name]
+        if stage.cache and self.use_cache:
+            with span(f"{name} (cache)", cat="cache"):
+                hit, value = self.cache.load(name, self.key(name))
+            if hit:
+                print(f"[CACHE] {name}: loaded ({self.key(name)[:12]}).")
+                self._values[name] = value
+                return value
+
+        args = [self.run(i) for i in stage.inputs]
+        with span(name, cat="stage"):
+            value = stage.func(self.cfg, *args)
+        if stage.cache and self.use_cache:
+            self.cache.save(name, self.key(name), value)
+        self._values[name] = value
+        return value
+
+    __getitem__ = run
+
+
+# ============================================================
+# Shared data stages: fetch → align → benchmark → features → targets (+ volume for the cost model)
+# ============================================================
+
+def _fetch(cfg: Config) -> pd.DataFrame:
+    from auto_ml_pkg.data import fetch_prices
+    return fetch_prices(cfg.tickers, cfg.train_start, cfg.test_end)
+
+
+def _align(cfg: Config, prices: pd.DataFrame) -> pd.DataFrame:
+    # Prices stay float64; features and targets are cast to the Config dtype (see precision.py)
+    return prices.dropna(how="all").astype(float)
+
+
+def _volume(cfg: Config, prices: pd.DataFrame) -> pd.DataFrame | None:
+    # Only the volume cost model reads volumes (flat costs: nothing to load)
+    if cfg.cost_model == "flat":
+        return None
+    from auto_ml_pkg.data import fetch_volumes
+    # Read from the CSV cache written by the 'fetch' stage (Volume is stored next to Close)
+    volumes = fetch_volumes(prices.columns, cfg.train_start, cfg.test_end)
+    return volumes.reindex(index=prices.index, columns=prices.columns)
+
+
+def _benchmark(cfg: Config, prices: pd.DataFrame) -> pd.Series:
+    from auto_ml_pkg.data import fetch_benchmark
+    # Try the Config benchmark (e.g. CARZ); fall back to an equal-weight universe index.
+    return fetch_benchmark(
+        symbol=cfg.benchmark,
+        start=cfg.train_start,
+        end=cfg.test_end,
+        fallback_from=prices,
+    )
+
+
+def _features(cfg: Config, prices: pd.DataFrame) -> pd.DataFrame:
+    from auto_ml_pkg.features import make_features
+    return make_features(prices, dtype=cfg.dtype)
+
+
+def _targets(cfg: Config, prices: pd.DataFrame, bench: pd.Series) -> pd.DataFrame:
+    from auto_ml_pkg.features import make_targets_excess
+    return make_targets_excess(prices, bench, cfg.horizon_days, dtype=cfg.dtype)
+
+
+DATA_STAGES = (
+    Stage("fetch", _fetch, params=("tickers", "train_start", "test_end"), modules=("auto_ml_pkg.data",)),
+    Stage("align", _align, inputs=("fetch",)),
+    Stage("volume", _volume, inputs=("align",), params=("train_start", "test_end", "cost_model"),
+          modules=("auto_ml_pkg.data",)),
+    Stage("benchmark", _benchmark, inputs=("align",), params=("benchmark", "train_start", "test_end"),
+          modules=("auto_ml_pkg.data",)),
+    Stage("features", _features, inputs=("align",), params=("dtype",), modules=("auto_ml_pkg.features",)),
+    Stage("targets", _targets, inputs=("align", "benchmark"), params=("horizon_days", "dtype"),
+          modules=("auto_ml_pkg.features",)),
+)
+
+
+def make_pipeline(cfg: Config | None = None, use_cache: bool | None = None) -> Pipeline:
+    """Pipeline with the shared data stages registered; experiments add their own stages."""
+    cfg = cfg or Config()
+    return Pipeline(cfg, DATA_STAGES, use_cache=cfg.pipeline_cache if use_cache is None else use_cache)
+
+
+def ensure_stages(pipe: Pipeline, stages) -> None:
+    """Register experiment stages unless the pipeline already has them."""
+    for s in stages:
+        if s.name not in pipe.stages:
+            pipe.add(s)
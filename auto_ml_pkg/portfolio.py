@@ -0,0 +1,292 @@
+import numpy as np
+import pandas as pd
+import sys, os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from auto_ml_pkg.backtest import align_panels, topk_weights, weights_returns
+from auto_ml_pkg.evaluate import equity_stats
+
+# Long-only constructions: weights ≥ 0 summing to 1 on every used row.
+# Long-short constructions: long leg sums to +1, short leg to −1 (dollar neutral).
+LONG_ONLY = ("topk", "rank", "score")
+LONG_SHORT = ("rank_ls", "score_ls", "long_short")
+CONSTRUCTIONS = LONG_ONLY + LONG_SHORT
+NEUTRALITY = ("none", "dollar", "beta")
+
+# All builders work on (..., n_rows, n_tickers) arrays of scores and a tradable
+# mask, and return weights of the same shape; rows without a position are all
+# zero (no rebalance), as in backtest.topk_weights.
+
+
+def _ranks(S: np.ndarray, valid: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Ascending rank of each valid name in its row (0 = lowest score) and the valid count per row."""
+    order = np.argsort(np.where(valid, S, np.inf), axis=-1, kind="stable")
+    rank = np.empty_like(order)
+    np.put_along_axis(rank, order, np.broadcast_to(np.arange(S.shape[-1]), S.shape), axis=-1)
+    return rank, valid.sum(axis=-1)
+
+
+def scale_legs(W: np.ndarray, long_only: bool) -> np.ndarray:
+    """Normalize every row: long-only to a unit sum, long-short to a +1 long and a −1 short leg."""
+    long = np.where(W > 0, W, 0.0)
+    short = np.where(W < 0, W, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        long = np.nan_to_num(long / long.sum(axis=-1, keepdims=True))
+        short = np.nan_to_num(short / -short.sum(axis=-1, keepdims=True))
+    if long_only:
+        return long
+    ok = (long.sum(axis=-1) > 0) & (short.sum(axis=-1) < 0)            # a one-sided row is not a long-short book
+    return np.where(ok[..., None], long + short, 0.0)
+
+
+def rank_weights(S: np.ndarray, valid: np.ndarray, long_only: bool = True) -> np.ndarray:
+    """
+    Rank-linear weights. Long-only: w ∝ rank + 1 (the best name gets n times
+    the weight of the worst). Long-short: w ∝ rank − (n − 1) / 2, centred
+    on the cross-sectional median.
+    """
+    rank, n = _ranks(S, valid)
+    centre = 0.0 if long_only else (n[..., None] - 1) / 2.0
+    raw = rank + (1.0 if long_only else 0.0) - centre
+    return scale_legs(np.where(valid, raw, 0.0), long_only)
+
+
+def score_weights(S: np.ndarray, valid: np.ndarray, long_only: bool = True) -> np.ndarray:
+    """
+    Score-proportional weights. Long-only: w ∝ max(score, 0), so only names
+    with a positive predicted excess return are held (rows without one are
+    skipped). Long-short: w ∝ score − cross-sectional mean.
+    """
+    S0 = np.where(valid, S, 0.0)
+    if long_only:
+        raw = np.clip(S0, 0.0, None)
+    else:
+        n = np.maximum(valid.sum(axis=-1, keepdims=True), 1)
+        raw = np.where(valid, S0 - S0.sum(axis=-1, keepdims=True) / n, 0.0)
+    return scale_legs(raw, long_only)
+
+
+def long_short_weights(S: np.ndarray, valid: np.ndarray, top_k: int) -> np.ndarray:
+    """Top-k names at +1/k and bottom-k names at −1/k; rows with fewer than 2k valid names are skipped."""
+    W_long, used, _ = topk_weights(S, valid, top_k)
+    W_short, _, _ = topk_weights(np.where(valid, -S, np.nan), valid, top_k)
+    used &= valid.sum(axis=-1) >= 2 * top_k
+    return np.where(used[..., None], W_long - W_short, 0.0)
+
+
+def rolling_betas(                              # to estimate every ticker's beta in one rolling pass
+    returns: pd.DataFrame,                      # daily returns (dates × tickers)
+    window: int = 60,                           # rolling window (trading days)
+    market: pd.Series | None = None,            # market returns (default: equal-weight mean of `returns`)
+) -> pd.DataFrame:
+    """
+    Rolling beta of every ticker against the market, using returns up to
+    and including each date: cov(r, m) / var(m) from rolling means of r·m,
+    r, m and m², all tickers at once.
+    """
+    m = returns.mean(axis=1) if market is None else market.reindex(returns.index)
+    minp = max(window // 2, 2)
+    mean_rm = returns.mul(m, axis=0).rolling(window, min_periods=minp).mean()
+    mean_r = returns.rolling(window, min_periods=minp).mean()
+    mean_m = m.rolling(window, min_periods=minp).mean()
+    var_m = m.rolling(window, min_periods=minp).var(ddof=0)
+    return (mean_rm - mean_r.mul(mean_m, axis=0)).div(var_m, axis=0)
+
+
+def neutralize(W: np.ndarray, valid: np.ndarray, betas: np.ndarray | None = None) -> np.ndarray:
+    """
+    Remove the dollar exposure (Σw) and, with `betas`, the beta exposure
+    (Σwβ) of every row: w is projected on the orthogonal complement of
+    [1, β] over the valid names with one batched least-squares solve, then
+    the legs are rescaled to +1 / −1. Names with an unknown beta are not held.
+    """
+    ok = valid & (np.isfinite(betas) if betas is not None else True)
+    cols = [np.ones(W.shape)] + ([np.nan_to_num(betas)] if betas is not None else [])
+    Xe = np.stack(cols, axis=-1) * ok[..., None]                        # (..., n_tickers, p) exposures
+    w = np.where(ok, W, 0.0)
+    A = np.einsum("...np,...nq->...pq", Xe, Xe)
+    b = np.einsum("...np,...n->...p", Xe, w)
+    c = np.einsum("...pq,...q->...p", np.linalg.pinv(A), b)
+    w = w - np.einsum("...np,...p->...n", Xe, c)
+    return scale_legs(np.where(ok, w, 0.0), long_only=False)
+
+
+def blend_weights(                              # to cap turnover by partial rebalancing toward the target
+    W: np.ndarray,                              # target weights on rebalance rows (n_rows, n_tickers)
+    valid: np.ndarray,                          # tradable mask
+    max_turnover: float,                        # cap on the turnover of each rebalance
+    long_only: bool = True,                     # book type (sets the largest possible turnover: 1 or 2)
+) -> np.ndarray:
+    """
+    Move from the held book toward the target on each rebalance,
+    W_t = (1 − s_t)·P_t + s_t·T_t, by the largest step s_t ≤ 1 whose
+    turnover stays within `max_turnover`. P_t is the held book restricted to
+    today's tradable names and rescaled to full legs (names that left the
+    universe are sold, the proceeds spread over the remaining holdings), or
+    the target itself when none of its legs is left.
+
+    Turnover is measured as in backtest._turnover (against the previous
+    weights on today's universe), so (1 − s)·rescale + s·full bounds it,
+    where rescale and full are the turnovers of P_t and T_t. It stays within
+    `max_turnover` on every rebalance unless rescaling after a universe
+    change costs more on its own; the book then moves to whichever of P_t
+    and T_t trades less. The book starts at the first target; a cap at or
+    above the largest possible turnover (1 long-only, 2 long-short) never
+    binds and returns the targets unchanged.
+
+    The step is not vectorized over rows: s_t depends on the distance
+    between T_t and the previous blended book, and P_t rescales that book,
+    so the recursion is nonlinear (a linear filter such as lfilter only
+    applies to a fixed step, which breaks the cap). Rows are walked in
+    order, each step vectorized over tickers. The loop only runs for a
+    capped book and adds milliseconds per backtest, small next to the model
+    fits (run_benchmarks.py: portfolio_weights_capped vs portfolio_weights).
+
+    Blends of dollar-neutral targets stay dollar neutral but are not
+    rescaled: a long-short book runs below gross 2 while names cross
+    sides, and beta neutrality holds only for the targets' own betas.
+    """
+    used = (W != 0.0).any(axis=-1)
+    cap = max(0.0, max_turnover)
+    if used.sum() < 2 or cap >= (1.0 if long_only else 2.0):
+        return W
+
+    out = np.zeros_like(W)
+    held = None
+    for t in np.flatnonzero(used):
+        target = W[t]
+        if held is None:
+            out[t] = held = target
+            continue
+        prev = np.where(valid[t], held, 0.0)                            # previous book on today's universe
+        base = scale_legs(prev, long_only)
+        if not base.any():                                              # no full book left to keep
+            base = target
+        full = np.abs(target - prev).sum() / 2.0
+        rescale = np.abs(base - prev).sum() / 2.0
+        if full <= cap:
+            step = 1.0
+        elif rescale >= cap:
+            step = 1.0 if full <= rescale else 0.0                      # cap unreachable: trade the least
+        else:
+            step = (cap - rescale) / (full - rescale)
+        out[t] = held = (1.0 - step) * base + step * target
+    return out
+
+
+def construct_weights(                          # to turn a score matrix into portfolio weights for all rows at once
+    S: np.ndarray,                              # predicted scores on rebalance rows (n_rows, n_tickers)
+    valid: np.ndarray,                          # tradable mask
+    construction: str = "topk",                 # one of CONSTRUCTIONS
+    top_k: int = 5,                             # names per leg for 'topk' / 'long_short'
+    neutral: str = "none",                      # 'none', 'dollar' or 'beta' (long-short constructions only)
+    betas: np.ndarray | None = None,            # betas on the same grid (required for neutral='beta')
+    max_turnover: float | None = None,          # turnover cap per rebalance (None = full rebalance)
+) -> np.ndarray:
+    """Weights of a construction scheme (see the module constants for the conventions)."""
+    if construction not in CONSTRUCTIONS:
+        raise ValueError(f"Unknown construction '{construction}'. Use one of {CONSTRUCTIONS}.")
+    if neutral not in NEUTRALITY:
+        raise ValueError(f"Unknown neutrality '{neutral}'. Use one of {NEUTRALITY}.")
+    long_only = construction in LONG_ONLY
+    if long_only and neutral != "none":
+        raise ValueError(f"neutral='{neutral}' needs a long-short construction {LONG_SHORT}.")
+
+    if construction == "topk":
+        W = topk_weights(S, valid, top_k)[0]
+    elif construction == "long_short":
+        W = long_short_weights(S, valid, top_k)
+    elif construction.startswith("rank"):
+        W = rank_weights(S, valid, long_only)
+    else:
+        W = score_weights(S, valid, long_only)
+
+    if neutral == "dollar":
+        W = neutralize(W, valid)
+    elif neutral == "beta":
+        if betas is None:
+            raise ValueError("neutral='beta' requires betas.")
+        W = neutralize(W, valid, betas)
+
+    if max_turnover is not None:
+        W = blend_weights(W, valid, max_turnover, long_only)
+    return W
+
+
+def _grid(pred_scores, future_excess, rebalance_every, returns, beta_window):
+    """Rebalance-row scores, realized returns, mask and (optionally) betas on the aligned grid."""
+    dates, tickers, S, R = align_panels(pred_scores, future_excess)
+    rows = np.arange(0, len(dates), rebalance_every)
+    S, R = S[rows], R[rows]
+    betas = None
+    if returns is not None:
+        betas = rolling_betas(returns.reindex(columns=tickers), beta_window).reindex(dates[rows]).to_numpy()
+    return dates[rows], tickers, S, R, ~np.isnan(S) & ~np.isnan(R), betas
+
+
+def portfolio_weights(                          # to build the weights of one construction scheme
+    pred_scores: pd.DataFrame,                  # predicted excess returns
+    future_excess: pd.DataFrame,                # realized excess returns (tradable universe per date)
+    construction: str = "topk",                 # one of CONSTRUCTIONS
+    top_k: int = 5,                             # names per leg for 'topk' / 'long_short'
+    rebalance_every: int = 5,                   # rebalance frequency (in days)
+    neutral: str = "none",                      # 'none', 'dollar' or 'beta'
+    returns: pd.DataFrame | None = None,        # daily returns for the betas (required for neutral='beta')
+    beta_window: int = 60,                      # beta estimation window (trading days)
+    max_turnover: float | None = None,          # turnover cap per rebalance
+) -> pd.DataFrame:
+    """
+    Weights on the rebalance dates of `equity_curve` (every `rebalance_every`
+    aligned date), computed for all dates in one pass.
+
+    Returns
+    -------
+    pd.DataFrame
+        Weights on rebalance dates (rows without a position are all zero),
+        ready for `backtest.weights_equity_curve`.
+    """
+    if neutral == "beta" and returns is None:
+        raise ValueError("neutral='beta' requires daily returns for the beta estimate.")
+    reb_dates, tickers, S, _, valid, betas = _grid(pred_scores, future_excess, rebalance_every,
+                                                  returns if neutral == "beta" else None, beta_window)
+    W = construct_weights(S, valid, construction, top_k, neutral, betas, max_turnover)
+    return pd.DataFrame(W, index=reb_dates, columns=tickers)
+
+
+def compare_constructions(                      # to backtest several construction schemes in one batch
+    pred_scores: pd.DataFrame,                  # predicted excess returns
+    future_excess: pd.DataFrame,                # realized excess returns
+    schemes: dict,                              # name -> keyword arguments of construct_weights
+    rebalance_every: int = 5,                   # rebalance frequency (in days)
+    transaction_cost_bps: float = 0.0,          # transaction cost in basis points
+    returns: pd.DataFrame | None = None,        # daily returns (needed by beta-neutral schemes)
+    beta_window: int = 60,                      # beta estimation window
+    cost_model=None,                            # costs.CostModel (per-ticker spread / FX / impact costs)
+) -> pd.DataFrame:
+    """
+    Build the weights of every scheme on the same grid, stack them along a
+    leading axis and run the array backtest once for all of them.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per scheme: equity statistics (see evaluate.equity_stats),
+        average turnover, average gross and net exposure.
+    """
+    reb_dates, tickers, S, R, valid, betas = _grid(pred_scores, future_excess, rebalance_every, returns, beta_window)
+    names = list(schemes)
+    W = np.stack([construct_weights(S, valid, betas=betas, **schemes[n]) for n in names])
+    costs = cost_model.arrays(reb_dates, tickers) if cost_model is not None else None
+    net, turnover, used, _ = weights_returns(W, R, transaction_cost_bps, costs)
+
+    rows = []
+    for i, name in enumerate(names):
+        eq = (1 + pd.Series(net[i][used[i]], index=reb_dates[used[i]], dtype=float)).cumprod()
+        rows.append({
+            "scheme": name,
+            **equity_stats(eq, 252.0 / rebalance_every),
+            "avg_turnover": float(turnover[i][used[i]].mean()) if used[i].any() else np.nan,
+            "avg_gross": float(np.abs(W[i][used[i]]).sum(axis=-1).mean()) if used[i].any() else np.nan,
+            "avg_net": float(W[i][used[i]].sum(axis=-1).mean()) if used[i].any() else np.nan,
+        })
+    return pd.DataFrame(rows).set_index("scheme")
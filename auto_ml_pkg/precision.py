@@ -0,0 +1,147 @@
+import argparse
+import os
+import sys
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+
+# Add project root (/files/auto_ml) to sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))   # folder: auto_ml/auto_ml_pkg
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                # folder: auto_ml
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Validation reports: outputs/precision/<experiment>_{panels,metrics}.csv
+PRECISION_DIR = os.path.join(PROJECT_ROOT, "outputs", "precision")
+
+from auto_ml_pkg.config import Config
+from auto_ml_pkg.pipeline import make_pipeline, ensure_stages
+from auto_ml_pkg.evaluate import equity_stats
+
+# Usage:
+#   python auto_ml_pkg/precision.py                    # single split, float32 vs float64
+#   python auto_ml_pkg/precision.py --experiment walkforward
+
+# Dtype policy (Config.dtype):
+# - prices stay float64 (the 'align' stage does not depend on the dtype);
+# - features, targets and predictions are stored in the Config dtype;
+# - features and targets are computed from float64 prices and cast once at the end;
+# - reductions that accumulate many terms (equity cumprod, benchmark index,
+#   regression metrics, IC) are explicitly promoted to float64.
+DTYPES = ("float64", "float32")
+
+
+@dataclass
+class DtypeReport:
+    """float32 vs float64 comparison of one experiment."""
+    panels: pd.DataFrame        # one row per intermediate (features, targets, predictions, equity)
+    metrics: pd.DataFrame       # evaluation metrics under both dtypes, with absolute differences
+
+
+def compare_frames(ref, low) -> dict:
+    """
+    Difference of a low-precision frame / series against its float64 reference
+    on their common index and columns.
+
+    Returns
+    -------
+    dict
+        max_abs_diff, max_rel_diff, rmse, nan_mismatch (cells NaN in only one
+        of the two), bytes_float64, bytes_low and the low-precision dtype.
+    """
+    ref_df, low_df = pd.DataFrame(ref), pd.DataFrame(low)
+    idx = ref_df.index.intersection(low_df.index)
+    cols = ref_df.columns.intersection(low_df.columns)
+    a = ref_df.reindex(index=idx, columns=cols).to_numpy(dtype=np.float64)
+    b = low_df.reindex(index=idx, columns=cols).to_numpy(dtype=np.float64)
+
+    both = np.isfinite(a) & np.isfinite(b)
+    diff = np.abs(a - b)[both]
+    scale = np.abs(a)[both]
+    rel = diff / np.where(scale > 0, scale, np.nan)
+    return {
+        "cells": int(a.size),
+        "max_abs_diff": float(diff.max()) if diff.size else np.nan,
+        "max_rel_diff": float(np.nanmax(rel)) if np.isfinite(rel).any() else np.nan,
+        "rmse": float(np.sqrt(np.mean(diff ** 2))) if diff.size else np.nan,
+        "nan_mismatch": int((np.isnan(a) != np.isnan(b)).sum()),
+        "bytes_float64": int(ref_df.memory_usage(index=False).sum()),
+        "bytes_low": int(low_df.memory_usage(index=False).sum()),
+        "dtype_low": str(np.result_type(*low_df.dtypes)) if low_df.shape[1] else "",
+    }
+
+
+def _outputs(pipe, experiment: str) -> tuple[dict, dict]:
+    """Intermediates and evaluation metrics of one run of the experiment stages."""
+    cfg = pipe.cfg
+    if experiment == "single":
+        from auto_ml_pkg.run_experiment_single_split import STAGES
+        prefix = "single"
+    else:
+        from auto_ml_pkg.run_experiment_walkforward import STAGES
+        prefix = "walkforward"
+    ensure_stages(pipe, [s for s in STAGES if not s.name.endswith(".report")])
+
+    pred = pipe[f"{prefix}.predict"]
+    P = pred[0] if experiment == "single" else pred["P_all"]
+    ec = pipe[f"{prefix}.backtest"]["ec"]
+    panels = {
+        "features": pipe["features"],
+        "targets": pipe["targets"],
+        "predictions": P,
+        "equity": ec,
+    }
+
+    m = pipe[f"{prefix}.evaluate"]
+    per_year = 252.0 if cfg.tranche_mode else 252.0 / cfg.horizon_days
+    metrics = {**m["reg"], **{f"IC_{k}": v for k, v in m["ic"].items()}, **equity_stats(ec, per_year)}
+    return panels, metrics
+
+
+def dtype_report(cfg: Config | None = None, experiment: str = "single", low: str = "float32") -> DtypeReport:
+    """
+    Run the experiment (without its report stage) under float64 and under
+    `low`, and compare every intermediate and metric.
+
+    Downloads and cached stages are shared between the two runs; only the
+    features, targets and the stages built on them are recomputed for the
+    low-precision dtype.
+    """
+    cfg = cfg or Config()
+    ref_panels, ref_metrics = _outputs(make_pipeline(replace(cfg, dtype="float64")), experiment)
+    low_panels, low_metrics = _outputs(make_pipeline(replace(cfg, dtype=low)), experiment)
+
+    panels = pd.DataFrame({name: compare_frames(ref_panels[name], low_panels[name]) for name in ref_panels}).T
+    panels.index.name = "panel"
+
+    metrics = pd.DataFrame({"float64": pd.Series(ref_metrics), low: pd.Series(low_metrics)})
+    metrics["abs_diff"] = (metrics[low] - metrics["float64"]).abs()
+    metrics.index.name = "metric"
+    return DtypeReport(panels=panels, metrics=metrics)
+
+
+def main(argv=None) -> DtypeReport:
+    parser = argparse.ArgumentParser(description="Compare a float32 run of an experiment against float64.")
+    parser.add_argument("--experiment", choices=("single", "walkforward"), default="single")
+    parser.add_argument("--dtype", choices=DTYPES[1:], default="float32", help="Low-precision dtype to validate.")
+    args = parser.parse_args(argv)
+
+    report = dtype_report(experiment=args.experiment, low=args.dtype)
+
+    os.makedirs(PRECISION_DIR, exist_ok=True)
+    report.panels.to_csv(os.path.join(PRECISION_DIR, f"{args.experiment}_panels.csv"))
+    report.metrics.to_csv(os.path.join(PRECISION_DIR, f"{args.experiment}_metrics.csv"))
+
+    with pd.option_context("display.width", 160, "display.max_columns", 20):
+        print(f"\n=== {args.dtype.upper()} vs FLOAT64: intermediates ({args.experiment}) ===")
+        print(report.panels)
+        print(f"\n=== {args.dtype.upper()} vs FLOAT64: metrics ===")
+        print(report.metrics)
+    print(f"\n[INFO] Report written to {PRECISION_DIR}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
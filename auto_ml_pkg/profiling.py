@@ -0,0 +1,250 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+try:                                            # not available on Windows
+    import resource
+except ImportError:
+    resource = None
+
+# Spans are only recorded between enable() and disable(); when disabled,
+# span() returns a shared no-op context and traced functions are called directly.
+_TRACER = None
+_NULL_SPAN = nullcontext()
+_MB = 1024.0 * 1024.0
+
+
+def _rss_peak_mb() -> float:
+    """High-water mark of the process resident set size (MB), NaN if unknown."""
+    if resource is None:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / _MB if sys.platform == "darwin" else peak / 1024.0   # bytes on macOS, KB on Linux
+
+
+@dataclass
+class SpanRecord:
+    """One finished span (times in microseconds since the tracer started)."""
+    name: str
+    cat: str
+    start_us: float
+    wall_us: float
+    cpu_us: float
+    peak_mem_mb: float                          # tracemalloc peak inside the span (NaN if memory tracing is off)
+    rss_peak_mb: float                          # process RSS high-water mark when the span ended
+    tid: int
+    args: dict = field(default_factory=dict)
+
+
+class _Span:
+    """Context manager measuring wall time, CPU time and peak traced memory of a block."""
+
+    __slots__ = ("tracer", "name", "cat", "args", "t0", "c0", "mem0", "peak")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: dict):
+        self.tracer, self.name, self.cat, self.args = tracer, name, cat, args
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        if self.tracer.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:                                                   # keep the parent's peak before resetting
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            self.mem0, self.peak = current, current
+        stack.append(self)
+        self.c0 = time.process_time_ns()
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        t1 = time.perf_counter_ns()
+        c1 = time.process_time_ns()
+        stack = self.tracer._stack()
+        stack.pop()
+
+        peak_mb = float("nan")
+        if self.tracer.memory:
+            _, peak = tracemalloc.get_traced_memory()
+            self.peak = max(self.peak, peak)
+            peak_mb = (self.peak - self.mem0) / _MB
+            if stack:                                                   # a child's peak is also the parent's
+                stack[-1].peak = max(stack[-1].peak, self.peak)
+
+        self.tracer.records.append(SpanRecord(
+            name=self.name,
+            cat=self.cat,
+            start_us=(self.t0 - self.tracer.t0) / 1e3,
+            wall_us=(t1 - self.t0) / 1e3,
+            cpu_us=(c1 - self.c0) / 1e3,
+            peak_mem_mb=peak_mb,
+            rss_peak_mb=_rss_peak_mb(),
+            tid=threading.get_ident(),
+            args=self.args,
+        ))
+        return False
+
+
+class Tracer:
+    """
+    Collects spans of one run.
+
+    With `memory=True`, tracemalloc is started and each span reports the peak
+    of Python/numpy allocations above its starting level (nested spans are
+    handled by folding every child's peak into its parent). Memory tracing
+    slows allocation-heavy code; use `memory=False` for timing only.
+    """
+
+    def __init__(self, memory: bool = True):
+        self.memory = memory
+        self.records: list[SpanRecord] = []
+        self.t0 = time.perf_counter_ns()
+        self._local = threading.local()
+        self._started_tracemalloc = False
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def span(self, name: str, cat: str = "run", **args) -> _Span:
+        return _Span(self, name, cat, args)
+
+    def close(self) -> None:
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Per-span-name totals, sorted by total wall time.
+
+        Returns
+        -------
+        pd.DataFrame
+            Columns: cat, calls, wall_s, wall_mean_ms, cpu_s, cpu_ratio,
+            peak_mem_mb (max over calls), rss_peak_mb.
+        """
+        cols = ["cat", "calls", "wall_s", "wall_mean_ms", "cpu_s", "cpu_ratio", "peak_mem_mb", "rss_peak_mb"]
+        if not self.records:
+            return pd.DataFrame(columns=cols)
+
+        df = pd.DataFrame([{
+            "name": r.name, "cat": r.cat, "wall_us": r.wall_us, "cpu_us": r.cpu_us,
+            "peak_mem_mb": r.peak_mem_mb, "rss_peak_mb": r.rss_peak_mb,
+        } for r in self.records])
+        g = df.groupby("name", sort=False)
+        out = pd.DataFrame({
+            "cat": g["cat"].first(),
+            "calls": g.size(),
+            "wall_s": g["wall_us"].sum() / 1e6,
+            "wall_mean_ms": g["wall_us"].mean() / 1e3,
+            "cpu_s": g["cpu_us"].sum() / 1e6,
+            "peak_mem_mb": g["peak_mem_mb"].max(),
+            "rss_peak_mb": g["rss_peak_mb"].max(),
+        })
+        out["cpu_ratio"] = out["cpu_s"] / out["wall_s"].where(out["wall_s"] > 0)
+        return out[cols].sort_values("wall_s", ascending=False)
+
+    def chrome_trace(self) -> dict:
+        """Spans as Chrome trace 'complete' events (open in chrome://tracing or Perfetto)."""
+        pid = os.getpid()
+        events = []
+        for r in self.records:
+            args = {"cpu_ms": round(r.cpu_us / 1e3, 3), "rss_peak_mb": round(r.rss_peak_mb, 1)}
+            if r.peak_mem_mb == r.peak_mem_mb:                          # not NaN
+                args["peak_mem_mb"] = round(r.peak_mem_mb, 3)
+            args.update({k: str(v) for k, v in r.args.items()})
+            events.append({
+                "name": r.name, "cat": r.cat, "ph": "X", "pid": pid, "tid": r.tid,
+                "ts": round(r.start_us, 1), "dur": round(r.wall_us, 1), "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, out_dir: str, name: str = "run") -> tuple[str, str]:
+        """
+        Write `<name>_trace.json` (Chrome trace) and `<name>_summary.csv` to `out_dir`.
+
+        Returns
+        -------
+        tuple
+            (trace path, summary path)
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        trace_path = os.path.join(out_dir, f"{name}_trace.json")
+        summary_path = os.path.join(out_dir, f"{name}_summary.csv")
+        with open(trace_path, "w") as fh:
+            json.dump(self.chrome_trace(), fh)
+        self.summary().to_csv(summary_path)
+        return trace_path, summary_path
+
+
+def enable(memory: bool = True) -> Tracer:
+    """Start recording spans (replaces any active tracer)."""
+    global _TRACER
+    if _TRACER is not None:
+        _TRACER.close()
+    _TRACER = Tracer(memory=memory)
+    return _TRACER
+
+
+def disable() -> Tracer | None:
+    """Stop recording; returns the tracer with the spans recorded so far."""
+    global _TRACER
+    tracer, _TRACER = _TRACER, None
+    if tracer is not None:
+        tracer.close()
+    return tracer
+
+
+def is_enabled() -> bool:
+    return _TRACER is not None
+
+
+def span(name: str, cat: str = "run", **args):
+    """
+    Context manager timing a block:
+
+        with span("fit", cat="model", ticker=t):
+            ...
+
+    Costs one global lookup when tracing is disabled.
+    """
+    if _TRACER is None:
+        return _NULL_SPAN
+    return _TRACER.span(name, cat, **args)
+
+
+def traced(name: str | None = None, cat: str = "run"):
+    """Decorator form of `span` (defaults to the function's qualified name)."""
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*a, **kw):
+            if _TRACER is None:
+                return func(*a, **kw)
+            with _TRACER.span(label, cat):
+                return func(*a, **kw)
+        return wrapper
+    return decorate
+
+
+def print_summary(tracer: Tracer, top: int = 20) -> None:
+    """Print the slowest spans of a run."""
+    table = tracer.summary().head(top)
+    with pd.option_context("display.width", 140, "display.max_columns", 20, "display.float_format", "{:.3f}".format):
+        print("\n=== TRACE SUMMARY (slowest spans) ===")
+        print(table)
@@ -0,0 +1,206 @@
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+import sys, os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from auto_ml_pkg.backtest import align_panels, topk_weights
+
+WEIGHTINGS = ("equal", "inverse_vol", "min_variance", "risk_parity")
+
+
+@dataclass
+class CovarianceSeries:
+    """Covariance matrices of the universe, stored only at the requested dates."""
+    dates: pd.DatetimeIndex
+    tickers: pd.Index
+    cov: np.ndarray             # (n_dates, n_tickers, n_tickers), NaN where history is too short
+
+    def at(self, date) -> pd.DataFrame:
+        """Covariance matrix at one stored date."""
+        i = self.dates.get_loc(pd.Timestamp(date))
+        return pd.DataFrame(self.cov[i], index=self.tickers, columns=self.tickers)
+
+
+def rolling_covariance(                         # to estimate covariances for the whole universe in one pass
+    returns: pd.DataFrame,                      # daily returns (dates × tickers)
+    at_dates,                                   # dates at which to store the covariance (e.g. rebalance dates)
+    window: int = 60,                           # rolling window length (ignored if halflife is set)
+    halflife: float | None = None,              # exponential weighting half-life in days
+    min_periods: int = 20,                      # minimum overlapping observations per pair
+    shrinkage: float = 0.0,                     # intensity of shrinkage towards a scaled identity
+) -> CovarianceSeries:
+    """
+    Pairwise-complete covariance of daily returns, rolling (`window` rows) or
+    exponentially weighted (`halflife`), estimated with a single incremental
+    pass over the dates. Running sums of x·xᵀ, x·maskᵀ and mask·maskᵀ are
+    updated row by row (added / removed for the rolling window, decayed for
+    the EW version) and a covariance is only materialized at `at_dates`.
+
+    The covariance stored at date t uses returns up to and including t.
+    With `shrinkage` δ, Σ ← (1 - δ)·Σ + δ·mean(diag Σ)·I.
+    """
+    if not 0.0 <= shrinkage <= 1.0:
+        raise ValueError(f"shrinkage must be in [0, 1], got {shrinkage}.")
+
+    X = returns.to_numpy(dtype=float)
+    M = ~np.isnan(X)
+    X = np.where(M, X, 0.0)
+    Mf = M.astype(float)
+    n, N = X.shape
+
+    at_dates = pd.DatetimeIndex(at_dates)
+    pos = returns.index.get_indexer(at_dates)
+    store = np.full(n, -1)
+    store[pos[pos >= 0]] = np.flatnonzero(pos >= 0)                     # row → slot in the output
+
+    out = np.full((len(at_dates), N, N), np.nan)
+    Sxx = np.zeros((N, N))      # Σ x_i x_j over pairs observed together
+    Sx = np.zeros((N, N))       # Σ x_i over rows where j is also observed
+    C = np.zeros((N, N))        # (weighted) count of joint observations
+    n_obs = np.zeros((N, N))    # unweighted count of joint observations (EW only)
+    decay = None if halflife is None else 0.5 ** (1.0 / halflife)
+    last = pos.max() if (pos >= 0).any() else -1                        # no need to go past the last stored date
+
+    for t in range(last + 1):
+        x, mk = X[t], Mf[t]
+        if decay is None:
+            Sxx += np.outer(x, x)
+            Sx += np.outer(x, mk)
+            C += np.outer(mk, mk)
+            if t >= window:
+                xo, mo = X[t - window], Mf[t - window]
+                Sxx -= np.outer(xo, xo)
+                Sx -= np.outer(xo, mo)
+                C -= np.outer(mo, mo)
+        else:
+            Sxx *= decay
+            Sx *= decay
+            C *= decay
+            Sxx += np.outer(x, x)
+            Sx += np.outer(x, mk)
+            C += np.outer(mk, mk)
+            n_obs += np.outer(mk, mk)
+
+        if store[t] < 0:
+            continue
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if decay is None:
+                cov = (Sxx - Sx * Sx.T / C) / (C - 1.0)
+            else:
+                cov = Sxx / C - (Sx / C) * (Sx.T / C)
+        cov = np.where((C if decay is None else n_obs) >= min_periods, cov, np.nan)
+
+        if shrinkage > 0.0:
+            mu = np.nanmean(np.diag(cov)) if np.isfinite(np.diag(cov)).any() else np.nan
+            cov = (1.0 - shrinkage) * cov + shrinkage * mu * np.eye(N)
+        out[store[t]] = cov
+
+    return CovarianceSeries(at_dates, returns.columns, out)
+
+
+def _sub_covariance(cov: np.ndarray, picks: np.ndarray) -> np.ndarray:
+    """Gather the (n_rows, k, k) covariance of the picked names for every row."""
+    rows = np.arange(cov.shape[0])[:, None, None]
+    return cov[rows, picks[:, :, None], picks[:, None, :]]
+
+
+def inverse_vol_weights(cov_sub: np.ndarray) -> np.ndarray:
+    """Weights ∝ 1 / σ for each row of a (n_rows, k, k) covariance batch."""
+    inv = 1.0 / np.sqrt(np.diagonal(cov_sub, axis1=-2, axis2=-1))
+    return inv / inv.sum(axis=-1, keepdims=True)
+
+
+def min_variance_weights(cov_sub: np.ndarray, long_only: bool = True) -> np.ndarray:
+    """
+    Minimum-variance weights Σ⁻¹1 / 1ᵀΣ⁻¹1 with one batched solve over all rows.
+    With `long_only`, negative weights are clipped to zero and the rest renormalized.
+    """
+    ones = np.ones(cov_sub.shape[:-1] + (1,))
+    try:
+        w = np.linalg.solve(cov_sub, ones)[..., 0]
+    except np.linalg.LinAlgError:                                       # a singular matrix in the batch
+        w = (np.linalg.pinv(cov_sub) @ ones)[..., 0]
+    w = w / w.sum(axis=-1, keepdims=True)
+    if long_only:
+        w = np.clip(w, 0.0, None)
+        w = w / w.sum(axis=-1, keepdims=True)
+    return w
+
+
+def risk_parity_weights(cov_sub: np.ndarray, n_iter: int = 200, tol: float = 1e-10) -> np.ndarray:
+    """
+    Equal-risk-contribution weights by cyclical coordinate descent, vectorized
+    over rows: each update solves σ_ii x_i² + (Σ_{j≠i} σ_ij x_j) x_i - 1/k = 0.
+    """
+    k = cov_sub.shape[-1]
+    diag = np.diagonal(cov_sub, axis1=-2, axis2=-1)
+    x = 1.0 / np.sqrt(diag)                                             # inverse-vol starting point
+    x = x / x.sum(axis=-1, keepdims=True)
+    b = 1.0 / k
+
+    for _ in range(n_iter):
+        x_old = x.copy()
+        for i in range(k):
+            others = np.einsum("...j,...j->...", cov_sub[..., i, :], x) - diag[..., i] * x[..., i]
+            x[..., i] = (-others + np.sqrt(others ** 2 + 4.0 * diag[..., i] * b)) / (2.0 * diag[..., i])
+        if np.nanmax(np.abs(x - x_old)) < tol:
+            break
+    return x / x.sum(axis=-1, keepdims=True)
+
+
+def topk_risk_weights(                          # to weight the top-k picks with a risk model
+    pred_scores: pd.DataFrame,                  # predicted excess returns
+    future_excess: pd.DataFrame,                # realized excess returns (tradable universe per date)
+    returns: pd.DataFrame,                      # daily returns used for the covariance
+    top_k: int = 5,                             # number of top tickers to hold
+    rebalance_every: int = 5,                   # rebalance frequency (in days)
+    weighting: str = "risk_parity",             # 'equal', 'inverse_vol', 'min_variance' or 'risk_parity'
+    window: int = 60,                           # covariance window (see rolling_covariance)
+    halflife: float | None = None,              # covariance half-life (see rolling_covariance)
+    shrinkage: float = 0.0,                     # covariance shrinkage (see rolling_covariance)
+) -> pd.DataFrame:
+    """
+    Same top-k selection as `equity_curve`, but the picked names are weighted
+    with a covariance estimated up to each rebalance date. Rows whose picked
+    covariance is not available (short history) fall back to equal weights.
+
+    Returns
+    -------
+    pd.DataFrame
+        Weights on rebalance dates (rows without a position are all zero),
+        ready for `backtest.weights_equity_curve`.
+    """
+    if weighting not in WEIGHTINGS:
+        raise ValueError(f"Unknown weighting '{weighting}'. Use one of {WEIGHTINGS}.")
+
+    dates, tickers, S, R = align_panels(pred_scores, future_excess)
+    rows = np.arange(0, len(dates), rebalance_every)
+    S, R = S[rows], R[rows]
+    valid = ~np.isnan(S) & ~np.isnan(R)
+    W, used, picks = topk_weights(S, valid, top_k)
+    reb_dates = dates[rows]
+
+    if weighting != "equal" and picks.shape[-1] > 0:
+        cs = rolling_covariance(
+            returns.reindex(columns=tickers),
+            reb_dates,
+            window=window,
+            halflife=halflife,
+            shrinkage=shrinkage,
+        )
+        cov_sub = _sub_covariance(cs.cov, picks)
+        ok = used & np.isfinite(cov_sub).all(axis=(-2, -1))
+        if ok.any():
+            builder = {
+                "inverse_vol": inverse_vol_weights,
+                "min_variance": min_variance_weights,
+                "risk_parity": risk_parity_weights,
+            }[weighting]
+            w_sub = builder(cov_sub[ok])
+            finite = np.isfinite(w_sub).all(axis=-1)                    # singular systems keep equal weights
+            idx = np.flatnonzero(ok)[finite]
+            W[idx[:, None], picks[idx]] = w_sub[finite]
+
+    return pd.DataFrame(W, index=reb_dates, columns=tickers)
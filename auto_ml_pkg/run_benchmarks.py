@@ -0,0 +1,225 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Add project root (/files/auto_ml) to sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))   # folder: auto_ml/auto_ml_pkg
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                # folder: auto_ml
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Benchmark results: outputs/benchmarks/<label>.json
+BENCH_DIR = os.path.join(PROJECT_ROOT, "outputs", "benchmarks")
+
+from auto_ml_pkg.synthetic import synthetic_panel
+from auto_ml_pkg.features import make_features, make_targets_excess
+from auto_ml_pkg.models import fit_tickers, predict_tickers
+from auto_ml_pkg.backtest import equity_curve
+from auto_ml_pkg.portfolio import portfolio_weights
+from auto_ml_pkg.evaluate import regression_report, information_coefficient, equity_stats
+
+# Usage:
+#   python auto_ml_pkg/run_benchmarks.py --preset quick --label before
+#   python auto_ml_pkg/run_benchmarks.py --preset quick --label after --compare outputs/benchmarks/before.json
+#   python auto_ml_pkg/run_benchmarks.py --scales 13x2 500x10 --repeat 5
+
+# (n_tickers, years) per preset; 'full' needs several GB of memory at 5000 × 30
+PRESETS = {
+    "quick": [(13, 2), (13, 10), (100, 10)],
+    "default": [(13, 2), (13, 10), (100, 10), (500, 10), (1000, 20)],
+    "full": [(13, 2), (13, 10), (100, 10), (500, 10), (1000, 20), (2000, 30), (5000, 30)],
+}
+
+
+def _time(func, repeat: int) -> tuple[list[float], object]:
+    """Wall times of `repeat` calls (stdout of the function silenced) and the last result."""
+    times, out = [], None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            out = func()
+            times.append(time.perf_counter() - t0)
+    return times, out
+
+
+def bench_scale(                                # to time the hot paths on one synthetic panel
+    n_tickers: int,                             # universe size
+    years: float,                               # panel length
+    repeat: int = 3,                            # timed calls per benchmark (the fit loop runs once)
+    fit_sample: int = 100,                      # tickers fitted in the per-ticker loop (all if smaller)
+    horizon: int = 5,                           # target horizon
+    top_k: int = 5,                             # top-k of the backtest
+    max_turnover: float = 0.2,                  # turnover cap of the capped weights benchmark
+    seed: int = 42,                             # panel seed
+) -> list[dict]:
+    """
+    Generate a panel and time make_features, make_targets_excess, the
+    per-ticker fit / predict loops, equity_curve, portfolio_weights with and
+    without the turnover cap, and the evaluation functions.
+    The fit loop is timed on `fit_sample` tickers (its cost per ticker still
+    depends on the full universe through the feature-column lookup).
+
+    Returns
+    -------
+    list of dict
+        One record per benchmark: name, best_s, median_s, times, plus scale info.
+    """
+    scale = {"scale": f"{n_tickers}x{years:g}", "n_tickers": n_tickers, "years": years}
+    records = []
+
+    def record(name, times, **extra):
+        records.append({
+            **scale, "name": name, "best_s": min(times), "median_s": statistics.median(times),
+            "times": times, **extra,
+        })
+        print(f"  {name:<24s} best {min(times):9.4f}s  median {statistics.median(times):9.4f}s")
+
+    print(f"\n=== Scale {scale['scale']} ({n_tickers} tickers × {years:g} years) ===")
+    t, panel = _time(lambda: synthetic_panel(n_tickers, years, seed=seed), 1)
+    prices, bench = panel.prices, panel.benchmark
+    scale["n_days"] = len(prices)
+    record("synthetic_panel", t)
+
+    t, X = _time(lambda: make_features(prices), repeat)
+    record("make_features", t, n_features=X.shape[1])
+    t, Y = _time(lambda: make_targets_excess(prices, bench, horizon), repeat)
+    record("make_targets_excess", t)
+
+    # Per-ticker fit / predict on a 70 / 30 split of the feature rows
+    cut = int(len(X) * 0.7)
+    train, test = slice(0, cut), slice(cut, len(X))
+    tickers = list(prices.columns[:fit_sample])
+    t, models = _time(lambda: fit_tickers(X, Y, tickers, train, test, alpha=2.0), 1)
+    record("fit_tickers", t, n_fit=len(tickers), per_ticker_s=t[0] / max(len(tickers), 1))
+    t, (P, Yf) = _time(lambda: predict_tickers(models, X, Y, test), repeat)
+    record("predict_tickers", t, n_models=len(models))
+
+    if P.empty:
+        print("  [SKIP] No fitted models; backtest and evaluation not timed.")
+        return records
+
+    t, ec = _time(lambda: equity_curve(P, Yf, top_k=top_k, rebalance_every=horizon, transaction_cost_bps=10.0), repeat)
+    record("equity_curve", t)
+
+    # Rank weights with and without the turnover cap (the capped book walks the rebalance rows)
+    t, _ = _time(lambda: portfolio_weights(P, Yf, "rank", rebalance_every=horizon), repeat)
+    record("portfolio_weights", t)
+    t, _ = _time(lambda: portfolio_weights(P, Yf, "rank", rebalance_every=horizon, max_turnover=max_turnover), repeat)
+    record("portfolio_weights_capped", t, max_turnover=max_turnover)
+
+    stack_true, stack_pred = Yf.stack(), P.stack()
+    t, _ = _time(lambda: regression_report(stack_true, stack_pred), repeat)
+    record("regression_report", t, n_obs=len(stack_true))
+    t, _ = _time(lambda: information_coefficient(stack_true, stack_pred), repeat)
+    record("information_coefficient", t)
+    t, _ = _time(lambda: equity_stats(ec, 252 / horizon), repeat)
+    record("equity_stats", t)
+    return records
+
+
+def _environment() -> dict:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                             capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        rev = ""
+    return {
+        "git_rev": rev or None,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.2) -> pd.DataFrame:
+    """
+    Best times of two result files side by side.
+
+    Returns
+    -------
+    pd.DataFrame
+        Index (scale, name); columns baseline_s, current_s, ratio and
+        regression (ratio > 1 + tolerance).
+    """
+    def best(results):
+        df = pd.DataFrame(results["results"])
+        if df.empty:
+            return pd.Series(dtype=float)
+        return df.set_index(["scale", "name"])["best_s"]
+
+    table = pd.concat([best(baseline), best(current)], axis=1, keys=["baseline_s", "current_s"]).dropna()
+    table["ratio"] = table["current_s"] / table["baseline_s"]
+    table["regression"] = table["ratio"] > 1.0 + tolerance
+    return table
+
+
+def run_benchmarks(scales, repeat: int = 3, fit_sample: int = 100, seed: int = 42, label: str | None = None) -> tuple[dict, str]:
+    """Run every scale and write outputs/benchmarks/<label>.json; returns (results, path)."""
+    label = label or datetime.now().strftime("%Y%m%d-%H%M%S")
+    results = {
+        "label": label,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "settings": {"repeat": repeat, "fit_sample": fit_sample, "seed": seed},
+        "environment": _environment(),
+        "results": [],
+    }
+    for n_tickers, years in scales:
+        results["results"].extend(bench_scale(n_tickers, years, repeat=repeat, fit_sample=fit_sample, seed=seed))
+
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    path = os.path.join(BENCH_DIR, f"{label}.json")
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(results, fh, indent=2)
+    return results, path
+
+
+def _parse_scale(text: str) -> tuple[int, float]:
+    n, y = text.lower().split("x")
+    return int(n), float(y)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks of the hot paths on synthetic panels.")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick", help="Predefined list of scales.")
+    parser.add_argument("--scales", nargs="+", help="Explicit scales as <tickers>x<years> (overrides --preset).")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed calls per benchmark (best and median are kept).")
+    parser.add_argument("--fit-sample", type=int, default=100, help="Tickers fitted in the per-ticker loop.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--label", default=None, help="Result name (default: timestamp).")
+    parser.add_argument("--compare", default=None, help="Baseline result JSON to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before flagging a regression.")
+    args = parser.parse_args(argv)
+
+    scales = [_parse_scale(s) for s in args.scales] if args.scales else PRESETS[args.preset]
+    results, path = run_benchmarks(scales, args.repeat, args.fit_sample, args.seed, args.label)
+    print(f"\n[INFO] Results written to {path}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        table = compare(results, baseline, args.tolerance)
+        with pd.option_context("display.width", 140, "display.max_rows", 200):
+            print(f"\n=== Comparison with '{baseline.get('label')}' (tolerance {args.tolerance:.0%}) ===")
+            print(table)
+        if table["regression"].any():
+            print(f"[WARN] {int(table['regression'].sum())} benchmark(s) slower than the baseline.")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
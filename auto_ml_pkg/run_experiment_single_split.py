@@ -1,7 +1,6 @@
 import os  # to handle file system operations
 import numpy as np  # to handle numerical operations and arrays
 import pandas as pd  # for data manipulation and analysis
-from tqdm import tqdm  # to display progress bars during iterations
 import sys  # to modify Python path for imports
 
 # ============================================================
@@ -24,9 +23,7 @@ OUTPUTS_DIR = os.path.join(PROJECT_ROOT, "outputs")         # auto_ml/outputs
 FIGURES_DIR = os.path.join(OUTPUTS_DIR, "figures")          # auto_ml/outputs/figures
 ARTIFACTS_DIR = os.path.join(OUTPUTS_DIR, "artifacts")      # auto_ml/outputs/artifacts
 
-# Ensure output folders exist for saving figures and CSV artifacts
-os.makedirs(FIGURES_DIR, exist_ok=True)
-os.makedirs(ARTIFACTS_DIR, exist_ok=True)
+# Output folders are created by the report stage (not at import time)
 
 # ============================================================
 # 1) Import project modules
@@ -34,158 +31,58 @@ os.makedirs(ARTIFACTS_DIR, exist_ok=True)
 
 # === Import project modules ===
 from auto_ml_pkg.config import Config  # to load experiment configuration
-from auto_ml_pkg.data import fetch_prices, fetch_benchmark  # to fetch historical price data and benchmark data
-from auto_ml_pkg.features import make_features, make_targets_excess  # to create features and targets
-from auto_ml_pkg.models import make_ridge  # to create Ridge regression model
+from auto_ml_pkg.features import make_targets_excess  # to create excess return targets vs other benchmarks
+from auto_ml_pkg.models import fit_tickers, predict_tickers  # to fit per-ticker Ridge models and predict
 from auto_ml_pkg.evaluate import regression_report, information_coefficient  # to evaluate model performance
-from auto_ml_pkg.backtest import equity_curve  # to compute equity curve for backtesting
-from auto_ml_pkg.viz import plot_equity, scatter_pred_vs_true, plot_multi_equity  # to visualize results
+from auto_ml_pkg.backtest import run_backtest  # to compute equity curve for backtesting
+from auto_ml_pkg.viz import plot_equity, scatter_pred_vs_true, plot_multi_equity, render, wait_plots  # to visualize results
+from auto_ml_pkg.pipeline import Pipeline, Stage, make_pipeline, ensure_stages  # to run cached pipeline stages
+from auto_ml_pkg.artifacts import artifact_targets, store_run  # to store run artifacts in binary form
 
 
-def main():
-    # 0) Load configuration (tickers, dates, top_k, transaction costs, etc.)
-    cfg = Config()
-
-    # 1) Fetch and inspect data (Download or load cached daily close prices for the whole universe)
-    prices = fetch_prices(cfg.tickers, cfg.train_start, cfg.test_end).dropna(how="all")
-    # Basic sanity checks on the raw price data
-    print("\n=== DATA AVAILABILITY CHECK ===")
-    print(f"Date range in prices: {prices.index[0]} → {prices.index[-1]}")
-    print(f"Number of trading days: {len(prices)}")
-    print("Sample preview:")
-    print(prices.head(5), "\n")
-
-    # === 2) Build benchmark (CARZ with equal-weight fallback) ===
-    # First try to fetch the benchmark specified in the Config (e.g. 'CARZ').
-    # If it is not available (e.g. in this environment), fall back to an equal-weight index of the universe.
-    bench = fetch_benchmark(
-        symbol=cfg.benchmark,        # e.g. 'CARZ'
-        start=cfg.train_start,       # e.g. '2016-01-01'
-        end=cfg.test_end,            # e.g. '2025-09-30'
-        fallback_from=prices,        # equal-weight from universe if CARZ unavailable
-    )
+def _split_masks(cfg: Config, index: pd.DatetimeIndex):
+    """Train / test boolean masks of the single split."""
+    train_mask = (index >= pd.Timestamp(cfg.train_start)) & (index <= pd.Timestamp(cfg.train_end))   # to create training data mask
+    test_mask = (index >= pd.Timestamp(cfg.test_start)) & (index <= pd.Timestamp(cfg.test_end))      # to create testing data mask
+    return train_mask, test_mask
 
-    print("=== BENCHMARK CHECK ===")
-    print(f"Benchmark name: {bench.name}")
-    print(f"Benchmark first/last: {bench.iloc[0]} → {bench.iloc[-1]}")
-    print("NaN ratio:", bench.isna().mean(), "\n")
-
-    # === 3) Compute features (X) and targets (Y) ===
-    X = make_features(prices)                                   # to create technical features from price data
-    Y = make_targets_excess(prices, bench, cfg.horizon_days)    # to create excess return targets
-
-    print("=== TARGETS CHECK ===")
-    print(f"Y shape: {Y.shape}")
-    print(f"Y NaN ratio: {Y.isna().mean().mean():.2f}")
-    print("Overlap between X and Y:", len(X.index.intersection(Y.index)))
-    print("First 5 rows of Y:")
-    print(Y.head(), "\n")
 
-    # === 4) Time split ===
-    train_mask = (X.index >= pd.Timestamp(cfg.train_start)) & (X.index <= pd.Timestamp(cfg.train_end))   # to create training data mask
-    test_mask = (X.index >= pd.Timestamp(cfg.test_start)) & (X.index <= pd.Timestamp(cfg.test_end))      # to create testing data mask
+def _fit(cfg: Config, X: pd.DataFrame, Y: pd.DataFrame) -> dict:
+    """Stage 'single.fit': per-ticker Ridge models on the train period."""
+    train_mask, test_mask = _split_masks(cfg, X.index)
+    return fit_tickers(X, Y, cfg.tickers, train_mask, test_mask, alpha=cfg.ridge_alpha,
+                       min_train=cfg.min_train_rows, min_test=cfg.min_test_rows)
 
-    print("=== SPLIT CHECK ===")
-    print("Train days:", train_mask.sum(), "Test days:", test_mask.sum())
 
-    # === 5) Per-ticker model fit ===
-    preds, reals = {}, {}                               # to store predictions and realized values
-
-    for t in tqdm(cfg.tickers, desc="Per-ticker fit"):  # to iterate over each ticker with progress bar
-        # Select relevant feature columns for this ticker
-        cols = [
-            c
-            for c in X.columns
-            if any(
-                c.startswith(p)
-                for p in (f"mom_{t}_", f"vol_{t}_", f"ma_ratio_{t}_", f"rsi_{t}_")
-            )
-        ]  # to filter feature columns for the ticker
-
-        if t not in Y.columns:                          # to check if target column exists
-            print(f"[SKIP] {t}: target column missing in Y.")
-            continue
-        if not cols:                                    # to check if any feature columns were found
-            print(f"[SKIP] {t}: no feature columns found.")
-            continue
-
-        # Align indexes safely and clean data
-        Y_t = Y[t].reindex(X.index)
-        Y_t.replace([np.inf, -np.inf], np.nan, inplace=True)
-        X_clean = X[cols].replace([np.inf, -np.inf], np.nan)
-
-        # Split into train/test
-        Xtr, Xte = X_clean.loc[train_mask], X_clean.loc[test_mask]
-        ytr, yte = Y_t.loc[train_mask], Y_t.loc[test_mask]
-
-        # Drop missing rows
-        tr = pd.concat([Xtr, ytr], axis=1).dropna()
-        te = pd.concat([Xte, yte], axis=1).dropna()
-
-        # Check minimal data
-        if len(tr) < 100 or len(te) < 20:
-            print(f"[SKIP] {t}: insufficient data (train={len(tr)}, test={len(te)}).")
-            continue
-
-        # Train model
-        model = make_ridge(alpha=2.0)
-        model.fit(tr[cols], tr[t])
-
-        # Predict
-        p = pd.Series(model.predict(te[cols]), index=te.index, name=t)
-        preds[t] = p
-        reals[t] = te[t]
-
-    # === 6) Aggregate predictions === (from dict to DataFrame)
-    P = pd.DataFrame(preds).sort_index()                          # to create DataFrame of predictions
-    Yf = pd.DataFrame(reals).sort_index()                         # to create DataFrame of realized values
+def _predict(cfg: Config, models: dict, X: pd.DataFrame, Y: pd.DataFrame):
+    """Stage 'single.predict': test-period predictions P and realized targets Yf."""
+    _, test_mask = _split_masks(cfg, X.index)
+    return predict_tickers(models, X, Y, test_mask)
 
-    if P.empty:
-        raise RuntimeError("No predictions created. Check tickers, target alignment, or data availability.")
 
-    # === 7) Evaluate === (regression metrics and IC)
+def _evaluate(cfg: Config, pred) -> dict:
+    """Stage 'single.evaluate': regression metrics and IC on stacked predictions."""
+    P, Yf = pred
     stack_true = Yf.stack()                                    # to stack realized values
     stack_pred = P.stack()                                     # to stack predicted values
+    return {
+        "reg": regression_report(stack_true, stack_pred),      # to compute regression metrics
+        "ic": information_coefficient(stack_true, stack_pred), # to compute information coefficient
+    }
 
-    reg = regression_report(stack_true, stack_pred)            # to compute regression metrics
-    ic = information_coefficient(stack_true, stack_pred)       # to compute information coefficient
 
-    print("\n==== REGRESSION METRICS ====")
-    for k, v in reg.items():
-        print(f"{k}: {v:.6f}")
-    print("IC:", ic)
-
-    # === 8) Backtest & export === (Top-k long strategy based on predicted excess returns)
-    ec = equity_curve(                                      # to compute equity curve for backtesting
-        P,                                                  # predicted scores
-        Yf,                                                 # realized excess returns
-        top_k=cfg.top_k,                                    # e.g. 5
-        rebalance_every=cfg.horizon_days,                   # normally 5
-        transaction_cost_bps=cfg.transaction_cost_bps,      # for example 10 bps
-    )
+def _backtest(cfg: Config, pred, prices: pd.DataFrame, bench: pd.Series, volumes: pd.DataFrame | None = None) -> dict:
+    """Stage 'single.backtest': strategy equity curve and the CARZ vs Equal-Weight comparisons."""
+    P, Yf = pred
 
-    # Save main artifacts (using global OUTPUTS_DIR structure)
-    ec.to_csv(os.path.join(ARTIFACTS_DIR, "equity_curve.csv"))          # to save equity curve to CSV
-    P.to_csv(os.path.join(ARTIFACTS_DIR, "predictions.csv"))            # to save predictions to CSV
-    Yf.to_csv(os.path.join(ARTIFACTS_DIR, "realized_excess.csv"))       # to save realized excess returns to CSV
-
-    # Plot main diagnostic figures
-    plot_equity(
-        ec,
-        os.path.join(FIGURES_DIR, "equity_curve.png"),                  # to plot equity curve
-        title=f"Top-{cfg.top_k} long — Ridge — h={cfg.horizon_days}",   # plot title
-    )
-    scatter_pred_vs_true(
-        stack_true,
-        stack_pred,
-        os.path.join(FIGURES_DIR, "pred_vs_realized.png"),              # to plot scatter of predictions vs realized
-    )
+    # === 8) Backtest === (Top-k long strategy based on predicted excess returns)
+    ec = run_backtest(P, Yf, cfg, prices, volumes)          # to compute equity curve for backtesting
 
     # === 9) Benchmark comparison: CARZ vs Equal-Weight universe ===
     # We rebuild an equal-weight benchmark from the same automotive universe
     # to compare it with the CARZ ETF (sector benchmark).
 
-    bench_ew_ret = prices.pct_change(fill_method=None).mean(axis=1)  # equal-weight daily returns
+    bench_ew_ret = prices.astype(float).pct_change(fill_method=None).mean(axis=1)  # equal-weight daily returns (float64)
     bench_ew = (1 + bench_ew_ret.fillna(0)).cumprod()                # cumulative returns
     bench_ew = bench_ew / bench_ew.iloc[0] * 100.0                   # rescale to base 100
     bench_ew.name = "EQUAL_WEIGHT_BENCH"
@@ -195,16 +92,7 @@ def main():
     bench_carz = bench / bench.iloc[0] * 100.0
     bench_carz.name = "CARZ"
 
-    bench_df = pd.concat([bench_carz, bench_ew], axis=1).dropna()  # to combine both benchmarks into a DataFrame
-    bench_df.to_csv(
-        os.path.join(ARTIFACTS_DIR, "benchmarks_CARZ_vs_EW_single_split.csv")
-    )  # to save benchmarks comparison to CSV
-
-    plot_multi_equity(  # to plot multiple equity curves
-        bench_df,
-        os.path.join(FIGURES_DIR, "benchmarks_CARZ_vs_EW_single_split.png"),
-        title="CARZ vs Equal-Weight Automotive Benchmark (Single Split)",
-    )
+    bench_df = pd.concat([bench_carz, bench_ew], axis=1, sort=True).dropna()  # to combine both benchmarks into a DataFrame
 
     # === 10) Strategy comparison: excess vs CARZ vs excess vs Equal-Weight ===
     # We keep the same predictions P (trained with CARZ-based targets),
@@ -221,28 +109,166 @@ def main():
     ec_carz = ec.rename("Strategy_excess_vs_CARZ")  # to rename equity curve for CARZ benchmark
 
     # 10.3 Backtest strategy using excess vs Equal-Weight
-    ec_ew = equity_curve(  # to compute equity curve for equal-weight benchmark
-        P,
-        Y_ew_aligned,
-        top_k=cfg.top_k,
-        rebalance_every=cfg.horizon_days,
-        transaction_cost_bps=cfg.transaction_cost_bps,
-    ).rename("Strategy_excess_vs_EW")
-
-    # 10.4 Save and plot both curves
-    strat_df = pd.concat([ec_carz, ec_ew], axis=1).dropna()  # to combine both strategy equity curves into a DataFrame
-    strat_df.to_csv(
-        os.path.join(ARTIFACTS_DIR, "strategy_CARZ_vs_EW_single_split.csv")
+    ec_ew = run_backtest(P, Y_ew_aligned, cfg, prices, volumes).rename("Strategy_excess_vs_EW")  # to compute equity curve for equal-weight benchmark
+
+    strat_df = pd.concat([ec_carz, ec_ew], axis=1, sort=True).dropna()  # to combine both strategy equity curves into a DataFrame
+    return {"ec": ec, "bench_df": bench_df, "strat_df": strat_df}
+
+
+def _report(cfg: Config, pred, bt: dict) -> None:
+    """Stage 'single.report': write run artifacts (binary and / or CSV) and figures (never cached)."""
+    P, Yf = pred
+    ec, bench_df, strat_df = bt["ec"], bt["bench_df"], bt["strat_df"]
+    binary, csv = artifact_targets(cfg.artifacts)
+
+    # Save main artifacts under one run ID (outputs/runs/<run id>, read back with artifacts.RunStore)
+    if binary:
+        run_id = store_run("single", cfg, {
+            "predictions": P,
+            "realized_excess": Yf,
+            "equity_curve": ec,
+            "benchmarks_CARZ_vs_EW": bench_df,
+            "strategy_CARZ_vs_EW": strat_df,
+        })
+        print(f"[INFO] Run artifacts stored under run ID '{run_id}'.")
+
+    # Legacy CSV files (using global OUTPUTS_DIR structure)
+    if csv:
+        os.makedirs(ARTIFACTS_DIR, exist_ok=True)
+        ec.to_csv(os.path.join(ARTIFACTS_DIR, "equity_curve.csv"))          # to save equity curve to CSV
+        P.to_csv(os.path.join(ARTIFACTS_DIR, "predictions.csv"))            # to save predictions to CSV
+        Yf.to_csv(os.path.join(ARTIFACTS_DIR, "realized_excess.csv"))       # to save realized excess returns to CSV
+
+        bench_df.to_csv(
+            os.path.join(ARTIFACTS_DIR, "benchmarks_CARZ_vs_EW_single_split.csv")
+        )  # to save benchmarks comparison to CSV
+
+        # 10.4 Save both strategy curves
+        strat_df.to_csv(
+            os.path.join(ARTIFACTS_DIR, "strategy_CARZ_vs_EW_single_split.csv")
+        )
+
+    # Figures come last: inline, in the background worker or skipped (cfg.plots)
+    if cfg.plots == "off":
+        return
+    os.makedirs(FIGURES_DIR, exist_ok=True)
+
+    # Plot main diagnostic figures
+    render(
+        cfg.plots,
+        plot_equity,
+        ec,
+        os.path.join(FIGURES_DIR, "equity_curve.png"),                  # to plot equity curve
+        title=f"Top-{cfg.top_k} long — Ridge — h={cfg.horizon_days}",   # plot title
+    )
+    render(
+        cfg.plots,
+        scatter_pred_vs_true,
+        Yf.stack(),
+        P.stack(),
+        os.path.join(FIGURES_DIR, "pred_vs_realized.png"),              # to plot scatter of predictions vs realized
+    )
+
+    render(  # to plot multiple equity curves
+        cfg.plots,
+        plot_multi_equity,
+        bench_df,
+        os.path.join(FIGURES_DIR, "benchmarks_CARZ_vs_EW_single_split.png"),
+        title="CARZ vs Equal-Weight Automotive Benchmark (Single Split)",
     )
 
-    plot_multi_equity(  # to plot multiple equity curves for strategies
+    render(  # to plot multiple equity curves for strategies
+        cfg.plots,
+        plot_multi_equity,
         strat_df,
         os.path.join(FIGURES_DIR, "strategy_CARZ_vs_EW_single_split.png"),
         title=f"Strategy vs Two Benchmarks (Top-{cfg.top_k}, h={cfg.horizon_days}, Single Split)",
     )
 
+
+# Experiment stages on top of the shared data stages (fetch → align → benchmark → features → targets)
+_SPLIT = ("tickers", "train_start", "train_end", "test_start", "test_end")
+_BACKTEST = ("top_k", "horizon_days", "transaction_cost_bps", "tranche_mode",
+             "weighting", "cov_window", "cov_halflife", "cov_shrinkage",
+             "construction", "neutral", "beta_window", "max_turnover",
+             "cost_model", "cost_window", "impact_coef", "portfolio_notional", "spread_table")
+
+STAGES = (
+    Stage("single.fit", _fit, inputs=("features", "targets"), params=_SPLIT + ("ridge_alpha", "min_train_rows", "min_test_rows"),
+          modules=("auto_ml_pkg.models",)),
+    Stage("single.predict", _predict, inputs=("single.fit", "features", "targets"), params=_SPLIT,
+          modules=("auto_ml_pkg.models",)),
+    Stage("single.evaluate", _evaluate, inputs=("single.predict",), modules=("auto_ml_pkg.evaluate",)),
+    Stage("single.backtest", _backtest, inputs=("single.predict", "align", "benchmark", "volume"), params=_BACKTEST,
+          modules=("auto_ml_pkg.backtest", "auto_ml_pkg.risk", "auto_ml_pkg.portfolio", "auto_ml_pkg.costs", "auto_ml_pkg.features")),
+    Stage("single.report", _report, inputs=("single.predict", "single.backtest"), cache=False),
+)
+
+
+def main(cfg: Config | None = None, pipeline: Pipeline | None = None):
+    # 0) Load configuration (tickers, dates, top_k, transaction costs, etc.)
+    #    A shared pipeline (e.g. from main.py) reuses its cached upstream stages.
+    pipe = pipeline or make_pipeline(cfg)
+    cfg = pipe.cfg
+    ensure_stages(pipe, STAGES)
+
+    # 1) Fetch and inspect data (Download or load cached daily close prices for the whole universe)
+    prices = pipe["align"]
+    # Basic sanity checks on the raw price data
+    print("\n=== DATA AVAILABILITY CHECK ===")
+    print(f"Date range in prices: {prices.index[0]} → {prices.index[-1]}")
+    print(f"Number of trading days: {len(prices)}")
+    print("Sample preview:")
+    print(prices.head(5), "\n")
+
+    # === 2) Build benchmark (CARZ with equal-weight fallback) ===
+    # First try to fetch the benchmark specified in the Config (e.g. 'CARZ').
+    # If it is not available (e.g. in this environment), fall back to an equal-weight index of the universe.
+    bench = pipe["benchmark"]
+
+    print("=== BENCHMARK CHECK ===")
+    print(f"Benchmark name: {bench.name}")
+    print(f"Benchmark first/last: {bench.iloc[0]} → {bench.iloc[-1]}")
+    print("NaN ratio:", bench.isna().mean(), "\n")
+
+    # === 3) Compute features (X) and targets (Y) ===
+    X = pipe["features"]                                        # to create technical features from price data
+    Y = pipe["targets"]                                         # to create excess return targets
+
+    print("=== TARGETS CHECK ===")
+    print(f"Y shape: {Y.shape}")
+    print(f"Y NaN ratio: {Y.isna().mean().mean():.2f}")
+    print("Overlap between X and Y:", len(X.index.intersection(Y.index)))
+    print("First 5 rows of Y:")
+    print(Y.head(), "\n")
+
+    # === 4) Time split ===
+    train_mask, test_mask = _split_masks(cfg, X.index)
+
+    print("=== SPLIT CHECK ===")
+    print("Train days:", train_mask.sum(), "Test days:", test_mask.sum())
+
+    # === 5-6) Per-ticker model fit and aggregated predictions ===
+    P, Yf = pipe["single.predict"]                              # to get predictions and realized values
+
+    if P.empty:
+        raise RuntimeError("No predictions created. Check tickers, target alignment, or data availability.")
+
+    # === 7) Evaluate === (regression metrics and IC)
+    metrics = pipe["single.evaluate"]
+
+    print("\n==== REGRESSION METRICS ====")
+    for k, v in metrics["reg"].items():
+        print(f"{k}: {v:.6f}")
+    print("IC:", metrics["ic"])
+
+    # === 8-10) Backtest, benchmark comparisons & export ===
+    pipe["single.backtest"]
+    pipe["single.report"]
+
     print(f"\n✅ Experiment completed successfully. Results saved in '{OUTPUTS_DIR}/'.\n")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    wait_plots()
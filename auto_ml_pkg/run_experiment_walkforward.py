@@ -1,8 +1,9 @@
+import argparse
 import os 
 import numpy as np
 import pandas as pd
-from tqdm import tqdm
 import sys
+from typing import Iterator
 
 # Add project root (/files/auto_ml) to sys.path
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))   # folder: auto_ml/auto_ml_pkg
@@ -11,18 +12,20 @@ PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                # folder: auto_ml
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-# Global output directory (shared for single-split & walk-forward)
+# Global output directory (shared for single-split & walk-forward), created by the report stage
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, "outputs")
-os.makedirs(os.path.join(OUTPUT_DIR, "figures"), exist_ok=True)
-os.makedirs(os.path.join(OUTPUT_DIR, "artifacts"), exist_ok=True)
 
 from auto_ml_pkg.config import Config
-from auto_ml_pkg.data import fetch_prices, fetch_benchmark 
-from auto_ml_pkg.features import make_features, make_targets_excess
-from auto_ml_pkg.models import make_ridge
-from auto_ml_pkg.evaluate import regression_report, information_coefficient
-from auto_ml_pkg.backtest import equity_curve
-from auto_ml_pkg.viz import plot_equity, scatter_pred_vs_true
+from auto_ml_pkg.folds import Fold, walkforward_folds, aggregate_folds
+from auto_ml_pkg.models import fit_tickers, predict_tickers
+from auto_ml_pkg.evaluate import regression_report, information_coefficient, fold_report
+from auto_ml_pkg.backtest import run_backtest
+from auto_ml_pkg.costs import cost_model_from_config
+from auto_ml_pkg.significance import placebo_test, placebo_supported
+from auto_ml_pkg.viz import plot_equity, scatter_pred_vs_true, render, wait_plots
+from auto_ml_pkg.pipeline import Pipeline, Stage, make_pipeline, ensure_stages
+from auto_ml_pkg.artifacts import artifact_targets, store_run
+from auto_ml_pkg.checkpoints import FoldCheckpoints
 
 # Difference between run_experiment_single_split.py and run_experiment_walkforward.py
 # - Single split:
@@ -51,35 +54,215 @@ from auto_ml_pkg.viz import plot_equity, scatter_pred_vs_true
 #         from saved fold outputs to avoid slowing the core walk-forward loop.
 
 
-def build_walkforward_folds(cfg: Config) -> list[dict]:    
+def build_walkforward_folds(cfg: Config, index: pd.DatetimeIndex) -> Iterator[Fold]:
     """
-    Defines an expanding-window walk-forward scheme.
-    Folds are non-overlapping in the test period.
+    Walk-forward scheme from the Config (see folds.walkforward_folds).
+    Defaults: expanding window from train_start, annual refits with the first
+    test year starting at wf_first_test, and a purge gap equal to the target
+    horizon. Folds are non-overlapping in the test period.
     """
-    folds = [
-        # train_start,     train_end,     test_start,      test_end
-        {"train_start": "2016-01-01", "train_end": "2019-12-31",
-         "test_start":  "2020-01-01", "test_end":  "2020-12-31"},
-        {"train_start": "2016-01-01", "train_end": "2020-12-31",
-         "test_start":  "2021-01-01", "test_end":  "2021-12-31"},
-        {"train_start": "2016-01-01", "train_end": "2021-12-31",
-         "test_start":  "2022-01-01", "test_end":  "2022-12-31"},
-        {"train_start": "2016-01-01", "train_end": "2022-12-31",
-         "test_start":  "2023-01-01", "test_end":  "2023-12-31"},
-        {"train_start": "2016-01-01", "train_end": "2023-12-31",
-         "test_start":  "2024-01-01", "test_end":  "2024-12-31"},
-        {"train_start": "2016-01-01", "train_end": "2024-12-31",
-         "test_start":  "2025-01-01", "test_end":  cfg.test_end},
-    ]
-    return folds
-
-
-def main():
+    return walkforward_folds(
+        index,
+        start=cfg.train_start,
+        first_test=cfg.wf_first_test,
+        end=cfg.test_end,
+        cadence=cfg.wf_cadence,
+        window=cfg.wf_window,
+        train_days=cfg.wf_train_days,
+        purge=cfg.horizon_days if cfg.wf_purge_days is None else cfg.wf_purge_days,
+        embargo=cfg.wf_embargo_days,
+    )
+
+
+def _fit(cfg: Config, X: pd.DataFrame, Y: pd.DataFrame) -> list[dict]:
+    """
+    Stage 'walkforward.fit': per-ticker Ridge models for every fold.
+
+    With `cfg.checkpoints`, each fold is predicted and scored right after its
+    fit and checkpointed (checkpoints.py); with `cfg.resume`, folds whose
+    checkpoint key still matches are loaded instead of refitted.
+    """
+    ckpt = FoldCheckpoints(cfg) if cfg.checkpoints else None
+    fitted = []
+    for f in build_walkforward_folds(cfg, X.index):
+        i = f.fold
+        print(f"\n==== Fold {i} ====")
+        print(f"Train: {f.train_start.date()} → {f.train_end.date()}")
+        print(f"Test : {f.test_start.date()} → {f.test_end.date()}")
+        print(f"Train days: {f.n_train}, Test days: {f.n_test}")
+
+        key = ckpt.key(f, X, Y) if ckpt else None
+        saved = ckpt.load(i, key) if ckpt and cfg.resume else None
+        if saved is not None:
+            print(f"[RESUME] Fold {i}: inputs unchanged, loaded from {saved.path}")
+            fitted.append({"fold": f, "models": saved.load_models(), "P": saved.predictions, "Y": saved.realized})
+            continue
+
+        # Per-ticker ridge regression for this fold (integer row ranges, no masks)
+        models = fit_tickers(X, Y, cfg.tickers, f.train, f.test, alpha=cfg.ridge_alpha, label=f" (fold {i})",
+                             min_train=cfg.min_train_rows, min_test=cfg.min_test_rows)
+        item = {"fold": f, "models": models}
+        if ckpt:
+            P_fold, Y_fold = predict_tickers(models, X, Y, f.test) if models else (pd.DataFrame(), pd.DataFrame())
+            ckpt.save(f, key, models, P_fold, Y_fold, fold_report(f, P_fold, Y_fold))
+            item.update(P=P_fold, Y=Y_fold)
+        fitted.append(item)
+    return fitted
+
+
+def _predict(cfg: Config, fitted: list[dict], X: pd.DataFrame, Y: pd.DataFrame) -> dict:
+    """Stage 'walkforward.predict': test predictions per fold and aggregated over all folds."""
+    folds = []
+    for item in fitted:
+        f = item["fold"]
+        if not item["models"]:
+            print(f"[INFO] Fold {f.fold}: no predictions created, skipped.")
+            continue
+        if "P" in item:                                                 # predicted with its checkpoint
+            P_fold, Y_fold = item["P"], item["Y"]
+        else:
+            P_fold, Y_fold = predict_tickers(item["models"], X, Y, f.test)
+        folds.append({"fold": f, "P": P_fold, "Y": Y_fold})
+    return aggregate_folds(folds)
+
+
+def _evaluate(cfg: Config, pred: dict) -> dict:
+    """Stage 'walkforward.evaluate': per-fold metrics (test only) and global OOS metrics."""
+    fold_metrics = []
+    for item in pred["folds"]:
+        # Per-fold metrics (on test only)
+        fold_record = fold_report(item["fold"], item["P"], item["Y"])
+        fold_metrics.append(fold_record)
+        print("Fold metrics:", fold_record)
+
+    # Global metrics over all test predictions
+    stack_true_all = pred["Y_all"].stack()
+    stack_pred_all = pred["P_all"].stack()
+
+    return {
+        "fold_metrics": pd.DataFrame(fold_metrics),
+        "reg": regression_report(stack_true_all, stack_pred_all),
+        "ic": information_coefficient(stack_true_all, stack_pred_all),
+    }
+
+
+def _backtest(cfg: Config, pred: dict, prices: pd.DataFrame, volumes: pd.DataFrame | None = None) -> dict:
+    """Stage 'walkforward.backtest': OOS equity curve and optional placebo significance."""
+    P_all, Y_all = pred["P_all"], pred["Y_all"]
+    ec = run_backtest(P_all, Y_all, cfg, prices, volumes)
+
+    # Significance vs placebo signals (optional), through the same top-k engine and costs as `ec`
+    placebo = None
+    if cfg.n_placebos > 0 and not placebo_supported(cfg):
+        print("[SKIP] Placebo test: the null engine only reproduces equal-weight top-k books "
+              "(construction='topk', weighting='equal', no tranches, neutrality or turnover cap).")
+    elif cfg.n_placebos > 0:
+        placebo = placebo_test(
+            P_all,
+            Y_all,
+            top_k=cfg.top_k,
+            rebalance_every=cfg.horizon_days,
+            transaction_cost_bps=cfg.transaction_cost_bps,
+            cost_model=cost_model_from_config(cfg, prices, volumes),
+            n_placebos=cfg.n_placebos,
+            seed=cfg.seed,
+        ).summary
+    return {"ec": ec, "placebo": placebo}
+
+
+def _report(cfg: Config, pred: dict, metrics: dict, bt: dict) -> None:
+    """Stage 'walkforward.report': write run artifacts (binary and / or CSV) and figures (never cached)."""
+    P_all, Y_all = pred["P_all"], pred["Y_all"]
+    ec = bt["ec"]
+    binary, csv = artifact_targets(cfg.artifacts)
+
+    # Run artifacts under one run ID (outputs/runs/<run id>, read back with artifacts.RunStore)
+    if binary:
+        run_id = store_run("walkforward", cfg, {
+            "predictions": P_all,
+            "realized_excess": Y_all,
+            "equity_curve": ec,
+            "fold_metrics": metrics["fold_metrics"],
+            "placebo_significance": bt["placebo"],
+        })
+        print(f"[INFO] Run artifacts stored under run ID '{run_id}'.")
+
+    # Legacy CSV files
+    if csv:
+        os.makedirs(os.path.join(OUTPUT_DIR, "artifacts"), exist_ok=True)
+
+        # Save per-fold metrics
+        fold_df_path = os.path.join(OUTPUT_DIR, "artifacts", "walkforward_metrics.csv")
+        metrics["fold_metrics"].to_csv(fold_df_path, index=False)
+
+        ec_path = os.path.join(OUTPUT_DIR, "artifacts", "equity_curve_walkforward.csv")
+        ec.to_csv(ec_path)
+
+        if bt["placebo"] is not None:
+            bt["placebo"].to_csv(
+                os.path.join(OUTPUT_DIR, "artifacts", "placebo_significance_walkforward.csv"), index=False
+            )
+
+        P_all_path = os.path.join(OUTPUT_DIR, "artifacts", "predictions_walkforward.csv")
+        Y_all_path = os.path.join(OUTPUT_DIR, "artifacts", "realized_excess_walkforward.csv")
+        P_all.to_csv(P_all_path)
+        Y_all.to_csv(Y_all_path)
+
+    # Figures come last: inline, in the background worker or skipped (cfg.plots)
+    if cfg.plots == "off":
+        return
+    os.makedirs(os.path.join(OUTPUT_DIR, "figures"), exist_ok=True)
+
+    fig_equity_path = os.path.join(OUTPUT_DIR, "figures", "equity_curve_walkforward.png")
+    render(
+        cfg.plots,
+        plot_equity,
+        ec,
+        fig_equity_path,
+        title=f"Walk-forward Top-{cfg.top_k} long — Ridge — h={cfg.horizon_days}"
+    )
+
+    fig_scatter_path = os.path.join(OUTPUT_DIR, "figures", "pred_vs_realized_walkforward.png")
+    render(
+        cfg.plots,
+        scatter_pred_vs_true,
+        Y_all.stack(),
+        P_all.stack(),
+        fig_scatter_path
+    )
+
+
+# Experiment stages on top of the shared data stages (fetch → align → benchmark → features → targets)
+_FOLDS = ("tickers", "train_start", "test_end", "horizon_days", "wf_first_test", "wf_cadence",
+          "wf_window", "wf_train_days", "wf_purge_days", "wf_embargo_days")
+_BACKTEST = ("top_k", "horizon_days", "transaction_cost_bps", "tranche_mode",
+             "weighting", "cov_window", "cov_halflife", "cov_shrinkage",
+             "construction", "neutral", "beta_window", "max_turnover",
+             "cost_model", "cost_window", "impact_coef", "portfolio_notional", "spread_table",
+             "n_placebos", "seed")
+
+STAGES = (
+    Stage("walkforward.fit", _fit, inputs=("features", "targets"), params=_FOLDS + ("ridge_alpha", "min_train_rows", "min_test_rows"),
+          modules=("auto_ml_pkg.models", "auto_ml_pkg.folds", "auto_ml_pkg.checkpoints")),
+    Stage("walkforward.predict", _predict, inputs=("walkforward.fit", "features", "targets"), params=_FOLDS,
+          modules=("auto_ml_pkg.models", "auto_ml_pkg.folds")),
+    Stage("walkforward.evaluate", _evaluate, inputs=("walkforward.predict",), modules=("auto_ml_pkg.evaluate",)),
+    Stage("walkforward.backtest", _backtest, inputs=("walkforward.predict", "align", "volume"), params=_BACKTEST,
+          modules=("auto_ml_pkg.backtest", "auto_ml_pkg.risk", "auto_ml_pkg.portfolio", "auto_ml_pkg.costs", "auto_ml_pkg.significance")),
+    Stage("walkforward.report", _report,
+          inputs=("walkforward.predict", "walkforward.evaluate", "walkforward.backtest"), cache=False),
+)
+
+
+def main(cfg: Config | None = None, pipeline: Pipeline | None = None):
     # === 0) Configuration & folders ===
-    cfg = Config()
+    #    A shared pipeline (e.g. from main.py) reuses its cached upstream stages.
+    pipe = pipeline or make_pipeline(cfg)
+    cfg = pipe.cfg
+    ensure_stages(pipe, STAGES)
 
     # === 1) Prices & benchmark (equal-weight) ===
-    prices = fetch_prices(cfg.tickers, cfg.train_start, cfg.test_end).dropna(how="all")
+    prices = pipe["align"]
 
     print("\n=== DATA AVAILABILITY CHECK ===")
     print(f"Date range in prices: {prices.index[0]} → {prices.index[-1]}")
@@ -88,12 +271,7 @@ def main():
     print(prices.head(), "\n")
 
     # Try to use CARZ as benchmark; if unavailable, fall back to an equal-weight universe index.
-    bench = fetch_benchmark(
-        symbol=cfg.benchmark,
-        start=cfg.train_start,
-        end=cfg.test_end,
-        fallback_from=prices,
-    )
+    bench = pipe["benchmark"]
 
     print("=== BENCHMARK CHECK ===")
     print(f"Benchmark name: {bench.name}")
@@ -101,8 +279,8 @@ def main():
     print("NaN ratio:", bench.isna().mean(), "\n")
 
     # === 2) Features & targets computed once ===
-    X = make_features(prices)
-    Y = make_targets_excess(prices, bench, cfg.horizon_days)
+    X = pipe["features"]
+    Y = pipe["targets"]
 
     print("=== TARGETS CHECK ===")
     print(f"Y shape: {Y.shape}")
@@ -111,165 +289,30 @@ def main():
     print("First 5 rows of Y:")
     print(Y.head(), "\n")
 
-    # === 3) Define walk-forward folds ===
-    folds = build_walkforward_folds(cfg)
-
-    all_P = []         # predictions for test periods (all folds)
-    all_Y = []         # realized excess returns for test periods (all folds)
-    fold_metrics = []  # per-fold metrics
-
-    # === 4) Loop over folds ===
-    for i, f in enumerate(folds, start=1):
-        train_start = pd.Timestamp(f["train_start"])
-        train_end   = pd.Timestamp(f["train_end"])
-        test_start  = pd.Timestamp(f["test_start"])
-        test_end    = pd.Timestamp(f["test_end"])
-
-        train_mask = (X.index >= train_start) & (X.index <= train_end)
-        test_mask  = (X.index >= test_start)  & (X.index <= test_end)
-
-        if train_mask.sum() == 0 or test_mask.sum() == 0:
-            print(f"[INFO] Fold {i}: empty train or test segment, skipped.")
-            continue
-
-        print(f"\n==== Fold {i} ====")
-        print(f"Train: {train_start.date()} → {train_end.date()}")
-        print(f"Test : {test_start.date()} → {test_end.date()}")
-        print(f"Train days: {train_mask.sum()}, Test days: {test_mask.sum()}")
-
-        preds_fold = {}
-        reals_fold = {}
-
-        # Per-ticker ridge regression for this fold
-        for t in tqdm(cfg.tickers, desc=f"Per-ticker fit (fold {i})"):
-            # Feature columns corresponding to this ticker
-            cols = [c for c in X.columns if any(
-                c.startswith(p) for p in (f"mom_{t}_", f"vol_{t}_", f"ma_ratio_{t}_", f"rsi_{t}_")
-            )]
-
-            if t not in Y.columns:
-                print(f"[SKIP] {t}: target column missing in Y.")
-                continue
-            if not cols:
-                print(f"[SKIP] {t}: no feature columns found.")
-                continue
-
-            # Align target with X index
-            Y_t = Y[t].reindex(X.index)
-            Y_t.replace([np.inf, -np.inf], np.nan, inplace=True)
-            X_clean = X[cols].replace([np.inf, -np.inf], np.nan)
-
-            # Split for this fold
-            Xtr, Xte = X_clean.loc[train_mask], X_clean.loc[test_mask]
-            ytr, yte = Y_t.loc[train_mask],     Y_t.loc[test_mask]
-
-            tr = pd.concat([Xtr, ytr], axis=1).dropna()
-            te = pd.concat([Xte, yte], axis=1).dropna()
-
-            if len(tr) < 100 or len(te) < 20:
-                print(f"[SKIP] {t} (fold {i}): insufficient data (train={len(tr)}, test={len(te)}).")
-                continue
-
-            model = make_ridge(alpha=2.0)
-            model.fit(tr[cols], tr[t])
-
-            p = pd.Series(model.predict(te[cols]), index=te.index, name=t)
-            preds_fold[t] = p
-            reals_fold[t] = te[t]
-
-        if not preds_fold:
-            print(f"[INFO] Fold {i}: no predictions created, skipped.")
-            continue
-
-        P_fold = pd.DataFrame(preds_fold).sort_index()
-        Y_fold = pd.DataFrame(reals_fold).sort_index()
-
-        # Store test predictions only
-        all_P.append(P_fold)
-        all_Y.append(Y_fold)
-
-        # Per-fold metrics (on test only)
-        stack_true = Y_fold.stack()
-        stack_pred = P_fold.stack()
-
-        reg = regression_report(stack_true, stack_pred)
-        ic = information_coefficient(stack_true, stack_pred)
-
-        fold_record = {
-            "fold": i,
-            "train_start": str(train_start.date()),
-            "train_end":   str(train_end.date()),
-            "test_start":  str(test_start.date()),
-            "test_end":    str(test_end.date()),
-            "MSE": reg["MSE"],
-            "MAE": reg["MAE"],
-            "R2":  reg["R2"],
-            "IC_pearson":  ic["pearson"],
-            "IC_spearman": ic["spearman"],
-        }
-        fold_metrics.append(fold_record)
-        print("Fold metrics:", fold_record)
-
-    if not all_P:
-        raise RuntimeError("No predictions created in any fold. Check folds or data availability.")
-
-    # === 5) Aggregate all out-of-sample predictions (all test periods) ===
-    P_all = pd.concat(all_P, axis=0).sort_index()
-    Y_all = pd.concat(all_Y, axis=0).sort_index()
-
-    # Align indices just in case
-    Y_all = Y_all.reindex(P_all.index).ffill().bfill()
-
-    # Global metrics over all test predictions
-    stack_true_all = Y_all.stack()
-    stack_pred_all = P_all.stack()
-
-    reg_global = regression_report(stack_true_all, stack_pred_all)
-    ic_global = information_coefficient(stack_true_all, stack_pred_all)
+    # === 3-4) Walk-forward folds: per-ticker fit and test predictions ===
+    pipe["walkforward.predict"]
+    metrics = pipe["walkforward.evaluate"]
 
     print("\n==== GLOBAL OUT-OF-SAMPLE METRICS (All folds) ====")
-    for k, v in reg_global.items():
+    for k, v in metrics["reg"].items():
         print(f"{k}: {v:.6f}")
-    print("IC:", ic_global)
-
-    # Save per-fold metrics
-    fold_df = pd.DataFrame(fold_metrics)
-    fold_df_path = os.path.join(OUTPUT_DIR, "artifacts", "walkforward_metrics.csv")
-    fold_df.to_csv(fold_df_path, index=False)
+    print("IC:", metrics["ic"])
 
     # === 6) Backtest & plots on the full walk-forward OOS period ===
-    ec = equity_curve(
-        P_all,
-        Y_all,
-        top_k=cfg.top_k,
-        rebalance_every=cfg.horizon_days,
-        transaction_cost_bps=cfg.transaction_cost_bps,
-    )
-
-    ec_path = os.path.join(OUTPUT_DIR, "artifacts", "equity_curve_walkforward.csv")
-    ec.to_csv(ec_path)
-
-    fig_equity_path = os.path.join(OUTPUT_DIR, "figures", "equity_curve_walkforward.png")
-    plot_equity(
-        ec,
-        fig_equity_path,
-        title=f"Walk-forward Top-{cfg.top_k} long — Ridge — h={cfg.horizon_days}"
-    )
-
-    fig_scatter_path = os.path.join(OUTPUT_DIR, "figures", "pred_vs_realized_walkforward.png")
-    scatter_pred_vs_true(
-        stack_true_all,
-        stack_pred_all,
-        fig_scatter_path
-    )
+    bt = pipe["walkforward.backtest"]
+    if bt["placebo"] is not None:
+        print("\n==== PLACEBO SIGNIFICANCE (walk-forward OOS) ====")
+        print(bt["placebo"].to_string(index=False))
 
-    P_all_path = os.path.join(OUTPUT_DIR, "artifacts", "predictions_walkforward.csv")
-    Y_all_path = os.path.join(OUTPUT_DIR, "artifacts", "realized_excess_walkforward.csv")
-    P_all.to_csv(P_all_path)
-    Y_all.to_csv(Y_all_path)
+    pipe["walkforward.report"]
 
     print(f"\n✅ Walk-forward experiment completed. Results saved in '{OUTPUT_DIR}/'.\n")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the walk-forward experiment.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reuse completed fold checkpoints whose inputs are unchanged.")
+    args = parser.parse_args()
+    main(Config(resume=True) if args.resume else None)
+    wait_plots()
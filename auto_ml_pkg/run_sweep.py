@@ -0,0 +1,364 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, fields, replace
+
+import numpy as np
+import pandas as pd
+
+# Add project root (/files/auto_ml) to sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))   # folder: auto_ml/auto_ml_pkg
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                # folder: auto_ml
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Sweep outputs: outputs/sweeps/<sweep name>/{store/, summary.csv}
+SWEEPS_DIR = os.path.join(PROJECT_ROOT, "outputs", "sweeps")
+
+from auto_ml_pkg.config import Config
+from auto_ml_pkg.pipeline import Pipeline, Stage
+from auto_ml_pkg.models import ticker_feature_columns
+from auto_ml_pkg.evaluate import equity_stats
+
+# Usage:
+#   python auto_ml_pkg/run_sweep.py variants.yaml --workers 8 --name overnight
+#
+# Variants file (YAML or JSON):
+#   base:                      # Config overrides shared by every variant (optional)
+#     transaction_cost_bps: 10
+#   grid:                      # cartesian product applied to every variant (optional)
+#     horizon_days: [5, 10]
+#     ridge_alpha: [1.0, 2.0, 4.0]
+#   variants:                  # one entry per variant (optional, default: one empty variant)
+#     - name: us_only
+#       experiment: walkforward          # 'walkforward' (default) or 'single'
+#       tickers: [TSLA, F, GM]
+#     - name: full_universe
+#       test_start: "2024-01-01"
+
+
+def load_variants(path: str) -> list[dict]:
+    """
+    Expand a variants file into a flat list of {name, experiment, overrides}.
+    """
+    with open(path, "r", encoding="utf-8") as fh:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+            spec = yaml.safe_load(fh)
+        else:
+            spec = json.load(fh)
+
+    if isinstance(spec, list):
+        spec = {"variants": spec}
+    base = spec.get("base", {}) or {}
+    grid = spec.get("grid", {}) or {}
+    variants = spec.get("variants") or [{}]
+
+    known = {f.name for f in fields(Config)}
+    grid_keys = sorted(grid)
+    out = []
+    for i, v in enumerate(variants):
+        v = dict(v)
+        name = str(v.pop("name", f"v{i:03d}"))
+        experiment = v.pop("experiment", "walkforward")
+        if experiment not in ("walkforward", "single"):
+            raise ValueError(f"Variant '{name}': unknown experiment '{experiment}'.")
+
+        for combo in itertools.product(*(grid[k] for k in grid_keys)):
+            overrides = {**base, **v, **dict(zip(grid_keys, combo))}
+            unknown = set(overrides) - known
+            if unknown:
+                raise ValueError(f"Variant '{name}': unknown Config fields {sorted(unknown)}.")
+            suffix = "".join(f"|{k}={val}" for k, val in zip(grid_keys, combo))
+            out.append({"name": name + suffix, "experiment": experiment, "overrides": overrides})
+    return out
+
+
+class SharedStore:
+    """
+    Read-only price / feature store shared by all sweep workers.
+
+    Built once by the coordinator for the union of all universes and date
+    ranges, saved as .npy arrays and opened by each worker with memory
+    mapping, so the operating system shares the pages between processes.
+    Prices are stored once for the union panel and sliced per variant.
+    Features depend on the variant's calendar and warm-up rows, so they are
+    stored once per (universe, date range) and computed on exactly the
+    price slice that variant sees, i.e. the same features as a standalone
+    run. Prices are stored in float64; a feature set is stored in float32
+    only when every variant using it asks for it, and variants cast their
+    feature and target slices to their own `dtype`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as fh:
+            meta = json.load(fh)
+        self.dates = pd.DatetimeIndex(np.load(os.path.join(path, "dates.npy")))
+        self.tickers = pd.Index(meta["tickers"])
+        self.benchmarks = meta["benchmarks"]
+        self.feature_sets = meta["feature_sets"]
+        self._prices = np.load(os.path.join(path, "prices.npy"), mmap_mode="r")
+        self._features = [
+            (pd.DatetimeIndex(np.load(os.path.join(path, fs["dates"]))),
+             np.load(os.path.join(path, fs["file"]), mmap_mode="r"))
+            for fs in self.feature_sets
+        ]
+        self._bench = np.load(os.path.join(path, "benchmarks.npy"), mmap_mode="r")
+        self._volumes = np.load(os.path.join(path, "volumes.npy"), mmap_mode="r") if meta.get("volumes") else None
+
+    @classmethod
+    def build(cls, path: str, cfgs: list[Config]) -> "SharedStore":
+        from auto_ml_pkg.data import fetch_prices, fetch_benchmark, fetch_volumes
+        from auto_ml_pkg.features import make_features
+
+        tickers = list(dict.fromkeys(t for c in cfgs for t in c.tickers))
+        start = min(c.train_start for c in cfgs)
+        end = max(c.test_end for c in cfgs)
+
+        prices = fetch_prices(tickers, start, end).dropna(how="all")
+
+        symbols = list(dict.fromkeys(c.benchmark for c in cfgs))
+        bench_cols, available = [], []
+        for sym in symbols:
+            try:
+                bench_cols.append(fetch_benchmark(sym, start, end).reindex(prices.index))
+                available.append(sym)
+            except RuntimeError:
+                print(f"[INFO] Benchmark '{sym}' unavailable; workers will use the equal-weight fallback.")
+        bench = pd.concat(bench_cols, axis=1) if bench_cols else pd.DataFrame(index=prices.index)
+
+        # Volumes only when a variant uses the volume cost model
+        with_volumes = any(c.cost_model == "volume" for c in cfgs)
+        if with_volumes:
+            volumes = fetch_volumes(prices.columns, start, end).reindex(index=prices.index, columns=prices.columns)
+
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "dates.npy"), prices.index.values)
+        np.save(os.path.join(path, "prices.npy"), prices.to_numpy(dtype=float))
+        np.save(os.path.join(path, "benchmarks.npy"), bench.to_numpy(dtype=float))
+
+        # One feature set per (universe, date range), on the variant's own price slice
+        groups = {}
+        for c in cfgs:
+            groups.setdefault(_feature_key(c), []).append(c)
+        feature_sets = []
+        for i, (key, members) in enumerate(groups.items()):
+            tickers_k, start_k, end_k = key
+            cols = [t for t in tickers_k if t in prices.columns]
+            px = prices.loc[pd.Timestamp(start_k):pd.Timestamp(end_k), cols].dropna(how="all")
+            dtype = "float32" if all(c.dtype == "float32" for c in members) else "float64"
+            X = make_features(px, dtype=dtype).reindex(px.index)
+            np.save(os.path.join(path, f"features_{i:03d}.npy"), X.to_numpy(dtype=dtype))
+            np.save(os.path.join(path, f"feature_dates_{i:03d}.npy"), px.index.values)
+            feature_sets.append({"key": [list(tickers_k), start_k, end_k], "columns": list(X.columns),
+                                 "file": f"features_{i:03d}.npy", "dates": f"feature_dates_{i:03d}.npy"})
+        print(f"[INFO] Shared store: {len(feature_sets)} feature set(s) for {len(cfgs)} variant(s).")
+        if with_volumes:
+            np.save(os.path.join(path, "volumes.npy"), volumes.to_numpy(dtype=float))
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as fh:
+            json.dump({
+                "tickers": list(prices.columns),
+                "feature_sets": feature_sets,
+                "benchmarks": available,
+                "volumes": with_volumes,
+            }, fh)
+        return cls(path)
+
+    def _rows(self, start: str, end: str) -> slice:
+        lo = self.dates.searchsorted(pd.Timestamp(start), side="left")
+        hi = self.dates.searchsorted(pd.Timestamp(end), side="right")
+        return slice(lo, hi)
+
+    def prices(self, tickers, start: str, end: str) -> pd.DataFrame:
+        cols = [t for t in tickers if t in self.tickers]
+        missing = [t for t in tickers if t not in self.tickers]
+        for t in missing:
+            print(f"[SKIP] Missing data for '{t}'")
+        if not cols:
+            raise RuntimeError("No price data available in the shared store for this universe.")
+        rows = self._rows(start, end)
+        idx = self.tickers.get_indexer(cols)
+        return pd.DataFrame(np.asarray(self._prices[rows][:, idx]), index=self.dates[rows], columns=cols)
+
+    def features(self, cfg: Config, index: pd.DatetimeIndex) -> pd.DataFrame:
+        """Features of the variant's feature set (same universe and date range) on `index`."""
+        tickers, start, end = _feature_key(cfg)
+        key = [list(tickers), start, end]                               # as stored in meta.json
+        i = next((i for i, fs in enumerate(self.feature_sets) if fs["key"] == key), None)
+        if i is None:
+            raise RuntimeError("The shared store has no features for the universe / dates of this variant.")
+        columns = pd.Index(self.feature_sets[i]["columns"])
+        dates, data = self._features[i]
+        rows = dates.get_indexer(index)
+        cols = [c for t in cfg.tickers for c in ticker_feature_columns(columns, t)]
+        return pd.DataFrame(np.asarray(data[rows][:, columns.get_indexer(cols)]), index=index, columns=cols)
+
+    def volumes(self, tickers, index: pd.DatetimeIndex) -> pd.DataFrame:
+        if self._volumes is None:
+            raise RuntimeError("The shared store has no volumes (no variant uses cost_model='volume').")
+        rows = self.dates.get_indexer(index)
+        idx = self.tickers.get_indexer(list(tickers))
+        return pd.DataFrame(np.asarray(self._volumes[rows][:, idx]), index=index, columns=list(tickers))
+
+    def benchmark(self, symbol: str, index: pd.DatetimeIndex) -> pd.Series | None:
+        if symbol not in self.benchmarks:
+            return None
+        j = self.benchmarks.index(symbol)
+        s = pd.Series(np.asarray(self._bench[self.dates.get_indexer(index), j]), index=index, name=symbol)
+        s = s.dropna()
+        return s if len(s) else None
+
+
+def _feature_key(cfg: Config) -> tuple:
+    """Inputs that define a variant's features: universe and date range."""
+    return tuple(cfg.tickers), cfg.train_start, cfg.test_end
+
+
+# ============================================================
+# Worker side: store-backed data stages + experiment stages
+# ============================================================
+
+_STORE: SharedStore | None = None
+
+
+def _init_worker(store_path: str) -> None:
+    global _STORE
+    _STORE = SharedStore(store_path)
+
+
+def _store_align(cfg: Config) -> pd.DataFrame:
+    return _STORE.prices(cfg.tickers, cfg.train_start, cfg.test_end).dropna(how="all")
+
+
+def _store_benchmark(cfg: Config, prices: pd.DataFrame) -> pd.Series:
+    from auto_ml_pkg.data import equal_weight_benchmark
+    bench = _STORE.benchmark(cfg.benchmark, prices.index)
+    return bench if bench is not None else equal_weight_benchmark(prices)
+
+
+def _store_volume(cfg: Config, prices: pd.DataFrame) -> pd.DataFrame | None:
+    if cfg.cost_model == "flat":
+        return None
+    return _STORE.volumes(prices.columns, prices.index)
+
+
+def _store_features(cfg: Config, prices: pd.DataFrame) -> pd.DataFrame:
+    X = _STORE.features(cfg, prices.index)
+    return X.dropna(how="all").astype(cfg.dtype)
+
+
+def _store_targets(cfg: Config, prices: pd.DataFrame, bench: pd.Series) -> pd.DataFrame:
+    from auto_ml_pkg.features import make_targets_excess
+    return make_targets_excess(prices, bench, cfg.horizon_days, dtype=cfg.dtype)
+
+
+STORE_STAGES = (
+    Stage("align", _store_align),
+    Stage("volume", _store_volume, inputs=("align",)),
+    Stage("benchmark", _store_benchmark, inputs=("align",)),
+    Stage("features", _store_features, inputs=("align",), params=("dtype",)),
+    Stage("targets", _store_targets, inputs=("align", "benchmark"), params=("dtype",)),
+)
+
+
+def run_variant(variant: dict) -> dict:
+    """
+    Run one variant (metrics only, no figures) and return a summary row.
+    Failures are reported in the 'error' column instead of stopping the sweep.
+    """
+    t0 = time.perf_counter()
+    row = {"name": variant["name"], "experiment": variant["experiment"]}
+    try:
+        cfg = replace(Config(), **variant["overrides"])
+        pipe = Pipeline(cfg, STORE_STAGES, use_cache=False)
+
+        if variant["experiment"] == "single":
+            from auto_ml_pkg.run_experiment_single_split import STAGES
+            prefix = "single"
+        else:
+            from auto_ml_pkg.run_experiment_walkforward import STAGES
+            prefix = "walkforward"
+        for s in STAGES:
+            if not s.name.endswith(".report"):
+                pipe.add(s)
+
+        metrics = pipe[f"{prefix}.evaluate"]
+        ec = pipe[f"{prefix}.backtest"]["ec"]
+        per_year = 252.0 if cfg.tranche_mode else 252.0 / cfg.horizon_days
+
+        row.update({k: v for k, v in metrics["reg"].items()})
+        row.update({f"IC_{k}": v for k, v in metrics["ic"].items()})
+        row.update(equity_stats(ec, per_year))
+        row["error"] = ""
+    except Exception as e:
+        row["error"] = repr(e)
+        traceback.print_exc()
+
+    row["seconds"] = round(time.perf_counter() - t0, 3)
+    row.update({f"cfg.{k}": json.dumps(v) if isinstance(v, list) else v for k, v in variant["overrides"].items()})
+    return row
+
+
+def run_sweep(
+    variants: list[dict],
+    name: str = "sweep",
+    workers: int | None = None,
+) -> pd.DataFrame:
+    """
+    Build the shared store for all variants, run them in a process pool and
+    write a consolidated summary table to outputs/sweeps/<name>/summary.csv.
+    """
+    out_dir = os.path.join(SWEEPS_DIR, name)
+    store_path = os.path.join(out_dir, "store")
+    cfgs = [replace(Config(), **v["overrides"]) for v in variants]
+
+    print(f"[INFO] Building shared store for {len(variants)} variants in '{store_path}'.")
+    SharedStore.build(store_path, cfgs)
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(store_path,)) as pool:
+        futures = {pool.submit(run_variant, v): v for v in variants}
+        for n_done, fut in enumerate(as_completed(futures), start=1):
+            try:
+                row = fut.result()
+            except Exception as e:                                      # worker process died (e.g. out of memory)
+                v = futures[fut]
+                row = {"name": v["name"], "experiment": v["experiment"], "error": repr(e), "seconds": np.nan}
+            rows.append(row)
+            status = "FAILED" if row["error"] else "ok"
+            print(f"[{n_done}/{len(variants)}] {row['name']}: {status} ({row['seconds']}s)")
+
+    order = {v["name"]: i for i, v in enumerate(variants)}
+    summary = pd.DataFrame(rows).sort_values("name", key=lambda s: s.map(order)).reset_index(drop=True)
+    summary.to_csv(os.path.join(out_dir, "summary.csv"), index=False)
+    with open(os.path.join(out_dir, "variants.json"), "w", encoding="utf-8") as fh:
+        json.dump({"base_config": asdict(Config()), "variants": variants}, fh, indent=2, default=str)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run many experiment variants in parallel.")
+    parser.add_argument("variants", help="YAML or JSON file describing the config variants")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: all CPUs)")
+    parser.add_argument("--name", default=None, help="sweep name (default: variants file name)")
+    args = parser.parse_args(argv)
+
+    name = args.name or os.path.splitext(os.path.basename(args.variants))[0]
+    summary = run_sweep(load_variants(args.variants), name=name, workers=args.workers)
+
+    print("\n==== SWEEP SUMMARY ====")
+    cols = [c for c in ("name", "experiment", "IC_spearman", "final_equity", "sharpe", "max_drawdown", "error")
+            if c in summary.columns]
+    print(summary[cols].to_string(index=False))
+    print(f"\n✅ Sweep completed. Summary saved in '{os.path.join(SWEEPS_DIR, name)}/'.\n")
+
+
+if __name__ == "__main__":
+    main()
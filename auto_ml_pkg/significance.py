@@ -0,0 +1,177 @@
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+import sys, os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from auto_ml_pkg.backtest import align_panels, topk_returns
+
+PLACEBO_KINDS = ("shuffle", "random", "shift")
+
+
+@dataclass
+class PlaceboResult:
+    """
+    Output of `placebo_test`.
+
+    `summary` has one row per (kind, metric) with the observed value, the null
+    mean / std and a one-sided p-value; `nulls` holds the raw null draws per kind.
+    """
+    summary: pd.DataFrame
+    nulls: dict
+
+
+def placebo_supported(cfg) -> bool:
+    """
+    True if `placebo_test` runs the same strategy as backtest.run_backtest for
+    the Config: an equal-weight top-k book rebalanced every horizon_days
+    (flat or volume costs). Other constructions, weightings, tranches,
+    neutral books and turnover caps have no batched null engine.
+    """
+    return (cfg.construction == "topk" and cfg.weighting == "equal" and cfg.neutral == "none"
+            and cfg.max_turnover is None and not cfg.tranche_mode)
+
+
+def _batch_stats(
+    S: np.ndarray,              # scores (B, n_rows, n_tickers)
+    R: np.ndarray,              # realized excess returns (n_rows, n_tickers)
+    top_k: int,
+    transaction_cost_bps: float,
+    periods_per_year: float,
+    costs=None,                 # costs.CostArrays on the same rows
+) -> np.ndarray:
+    """
+    Final equity, annualized Sharpe and pooled Pearson IC for each of the B signals.
+    Returns an array of shape (B, 3).
+    """
+    net, _, used, _ = topk_returns(S, R, top_k, transaction_cost_bps, costs)
+
+    final_equity = np.prod(1.0 + net, axis=-1)                          # net is 0.0 on skipped rows
+    n_used = used.sum(axis=-1)
+    mean = net.sum(axis=-1) / np.maximum(n_used, 1)
+    var = (np.where(used, net - mean[:, None], 0.0) ** 2).sum(axis=-1) / np.maximum(n_used - 1, 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(n_used > 1, mean / np.sqrt(var) * np.sqrt(periods_per_year), np.nan)
+
+    # Pooled Pearson correlation over valid (row, ticker) pairs
+    valid = ~np.isnan(S) & ~np.isnan(R)
+    n = valid.sum(axis=(-2, -1))
+    x = np.where(valid, S, 0.0)
+    y = np.where(valid, R, 0.0)
+    sx, sy = x.sum(axis=(-2, -1)), y.sum(axis=(-2, -1))
+    sxy = (x * y).sum(axis=(-2, -1))
+    sxx, syy = (x * x).sum(axis=(-2, -1)), (y * y).sum(axis=(-2, -1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ic = (n * sxy - sx * sy) / np.sqrt((n * sxx - sx ** 2) * (n * syy - sy ** 2))
+    ic = np.where(n >= 3, ic, np.nan)
+
+    return np.column_stack([final_equity, sharpe, ic])
+
+
+def placebo_test(                               # to compare a strategy against placebo (null) signals
+    pred_scores: pd.DataFrame,                  # predicted excess returns
+    future_excess: pd.DataFrame,                # realized excess returns
+    top_k: int = 5,                             # number of top tickers to hold
+    rebalance_every: int = 5,                   # rebalance frequency (in days)
+    transaction_cost_bps: float = 0.0,          # transaction cost in basis points
+    cost_model=None,                            # costs.CostModel (per-ticker spread / FX / impact costs)
+    n_placebos: int = 1000,                     # number of null draws per kind
+    kinds: tuple = PLACEBO_KINDS,               # which nulls to generate
+    min_shift: int | None = None,               # minimum time shift (in rebalance rows) for 'shift'
+    seed: int = 42,                             # random seed for reproducibility
+    chunk_size: int | None = None,              # placebos per batch (default: ~8M array cells per batch)
+) -> PlaceboResult:
+    """
+    Significance of the top-k strategy of `equity_curve` against placebo signals:
+
+    - 'shuffle': predictions permuted across tickers within each rebalance date
+      (same score distribution, no cross-sectional information).
+    - 'random' : i.i.d. uniform scores, i.e. random top-k picks.
+    - 'shift'  : the prediction panel circularly shifted in time by a random
+      offset of at least `min_shift` rebalance rows (default: 10% of rows).
+
+    The observed signal and every batch of placebos go through the same array
+    backtest (`topk_returns`, with the flat and per-ticker costs of
+    `cost_model`), using preallocated random key / index buffers. Metrics are computed on the
+    rebalance dates: final equity, annualized Sharpe (252 / rebalance_every
+    periods per year) and pooled Pearson IC. p-values are one-sided:
+    (1 + #{null >= observed}) / (1 + n_placebos).
+    """
+    unknown = set(kinds) - set(PLACEBO_KINDS)
+    if unknown:
+        raise ValueError(f"Unknown placebo kinds: {sorted(unknown)}. Use any of {PLACEBO_KINDS}.")
+    if n_placebos < 1:
+        raise ValueError(f"n_placebos must be >= 1, got {n_placebos}.")
+
+    dates, tickers, S, R = align_panels(pred_scores, future_excess)
+    rows = np.arange(0, len(dates), rebalance_every)
+    S, R = S[rows], R[rows]
+    m, N = S.shape
+    if m == 0:
+        raise RuntimeError("No common dates between predictions and realized excess returns.")
+    costs = cost_model.arrays(dates[rows], tickers) if cost_model is not None else None
+
+    valid = ~np.isnan(S) & ~np.isnan(R)
+    Sv = np.where(valid, S, np.nan)                                     # only tradable scores are permuted
+    S_sorted = np.sort(Sv, axis=-1)                                     # NaN sorted last
+    per_year = 252.0 / rebalance_every
+    metric_names = ["final_equity", "sharpe", "ic"]
+
+    observed = _batch_stats(Sv[None], R, top_k, transaction_cost_bps, per_year, costs)[0]
+
+    rng = np.random.default_rng(seed)
+    if chunk_size is None:
+        chunk_size = max(1, int(8_000_000 // max(m * N, 1)))
+    chunk_size = min(chunk_size, n_placebos)
+    if min_shift is None:
+        min_shift = max(1, m // 10)
+    min_shift = min(min_shift, m // 2)
+
+    # Preallocated buffers reused by every batch
+    keys = np.empty((chunk_size, m, N))
+    placebo = np.empty((chunk_size, m, N))
+    row_idx = np.empty((chunk_size, m), dtype=np.intp)
+    base_rows = np.arange(m)
+
+    nulls = {}
+    for kind in kinds:
+        draws = np.empty((n_placebos, len(metric_names)))
+        for start in range(0, n_placebos, chunk_size):
+            b = min(chunk_size, n_placebos - start)
+            k_buf, p_buf = keys[:b], placebo[:b]
+
+            if kind == "shuffle":
+                rng.random(out=k_buf)
+                k_buf[:, ~valid] = np.inf                               # invalid slots sort last and receive NaN
+                perm = np.argsort(k_buf, axis=-1)
+                np.put_along_axis(p_buf, perm, np.broadcast_to(S_sorted, p_buf.shape), axis=-1)
+            elif kind == "random":
+                rng.random(out=p_buf)
+                p_buf[:, ~valid] = np.nan
+            else:  # shift
+                offsets = rng.integers(min_shift, m - min_shift + 1, size=b) if m > 1 else np.zeros(b, dtype=int)
+                np.subtract(base_rows[None, :], offsets[:, None], out=row_idx[:b])
+                np.mod(row_idx[:b], m, out=row_idx[:b])
+                np.take(Sv, row_idx[:b], axis=0, out=p_buf)
+
+            draws[start:start + b] = _batch_stats(p_buf, R, top_k, transaction_cost_bps, per_year, costs)
+
+        nulls[kind] = pd.DataFrame(draws, columns=metric_names)
+
+    records = []
+    for kind, null in nulls.items():
+        for j, metric in enumerate(metric_names):
+            values = null[metric].to_numpy()
+            values = values[~np.isnan(values)]
+            obs = float(observed[j])
+            p_value = (1 + np.sum(values >= obs)) / (1 + len(values)) if len(values) and not np.isnan(obs) else np.nan
+            records.append({
+                "kind": kind,
+                "metric": metric,
+                "observed": obs,
+                "null_mean": float(values.mean()) if len(values) else np.nan,
+                "null_std": float(values.std(ddof=1)) if len(values) > 1 else np.nan,
+                "p_value": float(p_value),
+            })
+
+    return PlaceboResult(pd.DataFrame(records), nulls)
@@ -0,0 +1,157 @@
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+import sys, os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+TRADING_DAYS = 252
+REGIONS = ("US", "EU", "JP")    # each ticker trades on one calendar with its own holidays
+
+
+@dataclass
+class SyntheticPanel:
+    """Seeded synthetic market data shaped like the output of data.fetch_prices."""
+    prices: pd.DataFrame        # daily closes (dates × tickers), NaN on local holidays and outside listing dates
+    volume: pd.DataFrame        # daily share volume, NaN where prices are NaN
+    benchmark: pd.Series        # equal-weight index of the universe (like data.equal_weight_benchmark)
+    region: pd.Series           # ticker -> trading calendar
+
+
+def synthetic_panel(                            # to generate a correlated multi-asset price panel
+    n_tickers: int = 13,                        # number of tickers
+    years: float = 10,                          # length of the panel (years of business days)
+    seed: int = 42,                             # random seed (same seed → same panel)
+    start: str = "2000-01-03",                  # first business day
+    n_factors: int = 3,                         # common factors driving the correlation
+    drift: float = 0.06,                        # average annual drift
+    vol: float = 0.30,                          # average annual volatility
+    factor_share: float = 0.4,                  # share of variance explained by the factors
+    holiday_rate: float = 0.03,                 # fraction of business days closed per regional calendar
+    late_listing: float = 0.15,                 # fraction of tickers listed after the start
+    delisting: float = 0.05,                    # fraction of tickers delisted before the end
+) -> SyntheticPanel:
+    """
+    Geometric Brownian motions whose log-returns follow a factor model,
+    r = μ·dt + β·f + ε, with per-ticker drift, volatility and loadings.
+
+    Dates are the union of business days; each ticker belongs to one regional
+    calendar whose holidays are NaN for it (as in the real multi-exchange
+    universe). Some tickers list late or delist early (NaN outside their
+    lifetime). Generation is vectorized, so 5,000 tickers × 30 years takes
+    a few seconds and roughly n_days × n_tickers × 8 bytes per frame.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, periods=int(round(years * TRADING_DAYS)))
+    n = len(dates)
+    tickers = [f"SYN{i:04d}" for i in range(n_tickers)]
+    dt = 1.0 / TRADING_DAYS
+
+    # Per-ticker parameters
+    mu = rng.normal(drift, 0.05, n_tickers)
+    sigma = vol * rng.lognormal(0.0, 0.3, n_tickers)
+    beta = rng.normal(0.0, 1.0, (n_factors, n_tickers))
+    beta[0] = rng.normal(2.0, 0.5, n_tickers)                           # first factor = market (positive loadings)
+    beta /= np.linalg.norm(beta, axis=0, keepdims=True)                 # unit loadings: factor variance = factor_share
+
+    # Correlated log-returns (float64, one draw per day and factor / ticker)
+    f = rng.standard_normal((n, n_factors))
+    eps = rng.standard_normal((n, n_tickers))
+    shock = np.sqrt(factor_share) * (f @ beta) + np.sqrt(1.0 - factor_share) * eps
+    log_ret = (mu - 0.5 * sigma ** 2) * dt + sigma * np.sqrt(dt) * shock
+    log_px = np.log(rng.uniform(10.0, 200.0, n_tickers)) + np.cumsum(log_ret, axis=0)
+    px = np.exp(log_px)
+
+    # Regional holidays: the market is closed, so the close is missing
+    region = rng.integers(0, len(REGIONS), n_tickers)
+    closed = rng.random((n, len(REGIONS))) < holiday_rate
+    missing = closed[:, region]
+
+    # Late listings and delistings
+    first = np.zeros(n_tickers, dtype=int)
+    last = np.full(n_tickers, n)
+    late = rng.random(n_tickers) < late_listing
+    first[late] = rng.integers(1, max(2, n // 2), late.sum())
+    gone = rng.random(n_tickers) < delisting
+    last[gone] = rng.integers(max(1, n // 2), n, gone.sum())
+    rows = np.arange(n)[:, None]
+    missing |= (rows < first) | (rows >= last)
+
+    px[missing] = np.nan
+    volume = rng.lognormal(13.0, 1.0, n_tickers) * rng.lognormal(0.0, 0.4, (n, n_tickers))
+    volume[missing] = np.nan
+
+    prices = pd.DataFrame(px, index=dates, columns=tickers)
+    prices = prices.dropna(how="all")
+    volume = pd.DataFrame(volume, index=dates, columns=tickers).reindex(prices.index)
+
+    # Equal-weight universe index (same construction as data.equal_weight_benchmark)
+    bench_ret = prices.pct_change(fill_method=None).mean(axis=1).fillna(0)
+    benchmark = 100.0 * (1 + bench_ret).cumprod().rename("SYNTH_EW")
+
+    return SyntheticPanel(
+        prices=prices,
+        volume=volume,
+        benchmark=benchmark,
+        region=pd.Series([REGIONS[r] for r in region], index=tickers, name="region"),
+    )
+
+
+def synthetic_bars(                             # to generate intraday OHLCV bars for a stub bar source
+    n_tickers: int = 13,                        # number of tickers
+    days: int = 60,                             # trading days (business days)
+    interval: str = "5min",                     # bar length (pandas offset alias)
+    seed: int = 42,                             # random seed (same seed → same bars)
+    start: str = "2024-01-02",                  # first trading day
+    session: tuple = ("09:30", "16:00"),        # session open / close (bars start at the open)
+    vol: float = 0.30,                          # average annual volatility (intraday part)
+    overnight_share: float = 0.25,              # share of daily variance realized overnight
+) -> pd.DataFrame:
+    """
+    Intraday OHLCV bars shaped like an exchange export, in long format: one
+    row per (ticker, bar) with a 'timestamp' index and columns ticker, open,
+    high, low, close, volume. Log-returns are i.i.d. within the session, with
+    an overnight gap at each open and a U-shaped intraday volume profile.
+    """
+    rng = np.random.default_rng(seed)
+    days_idx = pd.bdate_range(start, periods=days)
+    offsets = pd.timedelta_range(session[0] + ":00", session[1] + ":00", freq=interval, closed="left")
+    n_bars = len(offsets)
+    tickers = [f"SYN{i:04d}" for i in range(n_tickers)]
+
+    sigma = vol * rng.lognormal(0.0, 0.3, n_tickers) / np.sqrt(TRADING_DAYS)
+    bar_sigma = sigma * np.sqrt((1.0 - overnight_share) / n_bars)
+    gap_sigma = sigma * np.sqrt(overnight_share)
+
+    r = rng.standard_normal((days, n_bars, n_tickers)) * bar_sigma
+    gap = rng.standard_normal((days, n_tickers)) * gap_sigma
+    gap[0] = 0.0
+
+    # Log close of every bar; the open of a bar is the previous close, plus the overnight gap at the session open
+    step = r.copy()
+    step[:, 0] += gap
+    log_close = np.log(rng.uniform(10.0, 200.0, n_tickers)) + np.cumsum(step.reshape(-1, n_tickers), axis=0)
+    log_close = log_close.reshape(days, n_bars, n_tickers)
+    log_open = log_close - r
+    close, open_ = np.exp(log_close), np.exp(log_open)
+    wiggle = np.exp(np.abs(rng.standard_normal((2, days, n_bars, n_tickers))) * bar_sigma * 0.5)
+    high = np.maximum(open_, close) * wiggle[0]
+    low = np.minimum(open_, close) / wiggle[1]
+
+    u = np.linspace(-1.0, 1.0, n_bars)
+    profile = (1.0 + 2.0 * u ** 2) / (1.0 + 2.0 * u ** 2).sum()                  # U-shaped volume profile
+    volume = rng.lognormal(13.0, 1.0, n_tickers) * profile[:, None] * rng.lognormal(0.0, 0.3, (days, n_bars, n_tickers))
+
+    stamps = (days_idx.values[:, None] + offsets.values[None, :]).ravel()
+
+    def long(a):                                                                 # (days, bars, tickers) → ticker-major rows
+        return a.reshape(days * n_bars, n_tickers).T.ravel()
+
+    bars = pd.DataFrame({
+        "ticker": pd.Categorical(np.repeat(tickers, days * n_bars), categories=tickers),
+        "open": long(open_),
+        "high": long(high),
+        "low": long(low),
+        "close": long(close),
+        "volume": np.round(long(volume)),
+    }, index=pd.DatetimeIndex(np.tile(stamps, n_tickers), name="timestamp"))
+    return bars
@@ -1,38 +1,168 @@
-import matplotlib.pyplot as plt
+from contextlib import contextmanager
 import pandas as pd
 import numpy as np
 import sys, os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-def plot_equity(ec: pd.Series, path: str, title: str = "Top-K long (excess)"):
+from auto_ml_pkg.profiling import traced
+
+# How figures are produced by the experiment reports:
+# - 'sync': rendered inline (default)
+# - 'background': rendered by a worker process once the metrics are written
+# - 'off': skipped (headless / metrics-only runs)
+PLOT_MODES = ("sync", "background", "off")
+
+_EXECUTOR = None    # background plot worker, started on first use
+_PENDING = []       # (path, future) of figures handed to the worker
+
+MAX_LINE_POINTS = 2000      # longer curves are decimated with LTTB before plotting
+MAX_SCATTER_POINTS = 5000   # larger scatters are drawn as a hexbin density
+
+
+def _pyplot():
+    """matplotlib.pyplot, imported on first use so that importing this module stays cheap."""
+    import matplotlib.pyplot as plt
+    return plt
+
+
+@contextmanager
+def _figure(figsize):
+    """A new pyplot figure that is always closed, even if rendering fails."""
+    plt = _pyplot()
+    fig = plt.figure(figsize=figsize)
+    try:
+        yield fig
+    finally:
+        plt.close(fig)
+
+
+def _init_plot_worker():
+    import matplotlib
+    matplotlib.use("Agg")                                               # no display in the worker
+
+
+def render(mode: str, func, *args, **kwargs):
+    """
+    Produce one figure with a plot function of this module according to `mode`
+    (see PLOT_MODES). In 'background' mode the call is queued on a single
+    worker process and `wait_plots` collects the results.
+    """
+    if mode not in PLOT_MODES:
+        raise ValueError(f"Unknown plot mode '{mode}'. Use one of {PLOT_MODES}.")
+    if mode == "off":
+        return None
+    if mode == "sync":
+        return func(*args, **kwargs)
+
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        from concurrent.futures import ProcessPoolExecutor
+        _EXECUTOR = ProcessPoolExecutor(max_workers=1, initializer=_init_plot_worker)
+    future = _EXECUTOR.submit(func, *args, **kwargs)
+    label = next((a for a in args if isinstance(a, str)), func.__name__)  # the output path
+    _PENDING.append((label, future))
+    return future
+
+
+def wait_plots() -> int:
+    """Wait for the figures queued in 'background' mode; returns how many were written."""
+    global _EXECUTOR
+    done = 0
+    for path, future in _PENDING:
+        try:
+            future.result()
+            done += 1
+        except Exception as e:
+            print(f"[WARN] Figure '{path}' failed: {e!r}")
+    _PENDING.clear()
+    if _EXECUTOR is not None:
+        _EXECUTOR.shutdown()
+        _EXECUTOR = None
+    return done
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling: indices of `n_out` points
+    (first and last included) that preserve the visual shape of (x, y).
+    Each bucket keeps the point forming the largest triangle with the point
+    kept in the previous bucket and the mean of the next bucket.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)                # n_out - 2 inner buckets
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        nlo, nhi = hi, (edges[b + 2] if b + 2 < len(edges) else n)
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()                   # next bucket average
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[b + 1] = a
+    return keep
+
+
+def decimate(s: pd.Series, max_points: int = MAX_LINE_POINTS) -> pd.Series:
+    """Series reduced to at most `max_points` points with LTTB (NaN dropped first)."""
+    s = s.dropna()
+    if len(s) <= max_points:
+        return s
+    x = s.index.asi8 if isinstance(s.index, pd.DatetimeIndex) else np.arange(len(s))
+    return s.iloc[lttb(x, s.to_numpy(dtype=float), max_points)]
+
+
+@traced(cat="plot")
+def plot_equity(ec: pd.Series, path: str, title: str = "Top-K long (excess)", max_points: int = MAX_LINE_POINTS):
     """
     Saves a cumulative growth plot of the backtested strategy.
+    Curves longer than `max_points` are decimated with LTTB.
     """
-    plt.figure(figsize=(9, 4))
-    ax = ec.plot(figsize=(9, 4))
-    ax.set_title(title)
-    ax.set_ylabel("Cumulative (×)")
-    ax.grid(True)
-    plt.tight_layout()
-    plt.savefig(path)
-    plt.close()
+    with _figure((9, 4)) as fig:
+        ax = decimate(ec, max_points).plot(ax=fig.gca())
+        ax.set_title(title)
+        ax.set_ylabel("Cumulative (×)")
+        ax.grid(True)
+        fig.tight_layout()
+        fig.savefig(path)
 
-def scatter_pred_vs_true(y_true: pd.Series, y_pred: pd.Series, path: str):
+@traced(cat="plot")
+def scatter_pred_vs_true(y_true: pd.Series, y_pred: pd.Series, path: str, max_points: int = MAX_SCATTER_POINTS):
     """
     Saves a scatter of predicted vs realized excess returns with a fitted line.
+    Above `max_points` pairs the points are drawn as a hexbin density
+    (log-scaled counts) instead of individual markers.
     """
     df = pd.concat([y_true, y_pred], axis=1, keys=["y", "p"]).dropna()
-    plt.figure(figsize=(5, 5))
-    plt.scatter(df["p"], df["y"], alpha=0.4)
-    m, b = np.polyfit(df["p"], df["y"], 1)
-    xs = np.linspace(df["p"].min(), df["p"].max(), 100)
-    plt.plot(xs, m * xs + b)
-    plt.xlabel("Predicted excess")
-    plt.ylabel("Realized excess")
-    plt.tight_layout()
-    plt.savefig(path)
-
-def plot_multi_equity(df: pd.DataFrame, path: str, title: str):
+    p, y = df["p"].to_numpy(dtype=float), df["y"].to_numpy(dtype=float)
+
+    with _figure((5, 5)) as fig:
+        ax = fig.gca()
+        if len(df) > max_points:
+            hb = ax.hexbin(p, y, gridsize=60, bins="log", mincnt=1, cmap="viridis")
+            fig.colorbar(hb, ax=ax, label="count")
+        else:
+            ax.scatter(p, y, alpha=0.4)
+
+        # Least-squares line from first and second moments (no design matrix)
+        if len(df) >= 2 and p.var() > 0:
+            m = np.mean((p - p.mean()) * (y - y.mean())) / p.var()
+            b = y.mean() - m * p.mean()
+            xs = np.linspace(p.min(), p.max(), 100)
+            ax.plot(xs, m * xs + b, color="C1")
+        ax.set_xlabel("Predicted excess")
+        ax.set_ylabel("Realized excess")
+        fig.tight_layout()
+        fig.savefig(path)
+
+@traced(cat="plot")
+def plot_multi_equity(df: pd.DataFrame, path: str, title: str, max_points: int = MAX_LINE_POINTS):
     """
     Plot multiple cumulative curves on the same figure.
 
@@ -44,12 +174,71 @@ def plot_multi_equity(df: pd.DataFrame, path: str, title: str):
         Output path for the PNG file.
     title : str
         Figure title.
+    max_points : int
+        Columns longer than this are decimated (each with its own LTTB points).
+    """
+    with _figure((9, 4)) as fig:
+        ax = fig.gca()
+        if len(df) <= max_points:
+            df.plot(ax=ax)
+        else:
+            for c in df.columns:
+                decimate(df[c], max_points).plot(ax=ax, label=str(c))
+            ax.legend()
+        ax.set_title(title)
+        ax.set_ylabel("Index level / Cumulative (×)")
+        ax.grid(True)
+        fig.tight_layout()
+        fig.savefig(path)
+
+
+# ============================================================
+# Batch rendering of stored runs (see artifacts.RunStore)
+# ============================================================
+
+def plot_run(run_path: str, out_dir: str) -> list[str]:
+    """
+    Equity curve and prediction scatter of one stored run, written to
+    `out_dir/<run id>_*.png`. Runs in a worker: only the run path is sent,
+    the artifacts are loaded (and released) inside the worker.
+    """
+    from auto_ml_pkg.artifacts import RunReader
+
+    run = RunReader(run_path)
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    if "equity_curve" in run.artifacts:
+        path = os.path.join(out_dir, f"{run.run_id}_equity.png")
+        plot_equity(run.load("equity_curve"), path, title=f"{run.run_id} — equity")
+        written.append(path)
+    if "predictions" in run.artifacts and "realized_excess" in run.artifacts:
+        path = os.path.join(out_dir, f"{run.run_id}_pred_vs_realized.png")
+        scatter_pred_vs_true(run.load("realized_excess").stack(), run.load("predictions").stack(), path)
+        written.append(path)
+    return written
+
+
+def render_batch(jobs, workers: int | None = None, tasks_per_worker: int = 50) -> int:
     """
-    plt.figure(figsize=(9, 4))
-    ax = df.plot(ax=plt.gca())
-    ax.set_title(title)
-    ax.set_ylabel("Index level / Cumulative (×)")
-    ax.grid(True)
-    plt.tight_layout()
-    plt.savefig(path)
-    plt.close()
\ No newline at end of file
+    Run plot jobs `(func, args, kwargs)` in a process pool and return how
+    many succeeded. On Python 3.11+ workers are recycled after
+    `tasks_per_worker` jobs so memory stays bounded however many figures
+    are rendered; older interpreters keep their workers for the whole batch.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    jobs = list(jobs)
+    if not jobs:
+        return 0
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    done = 0
+    recycle = {"max_tasks_per_child": tasks_per_worker} if sys.version_info >= (3, 11) else {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_plot_worker, **recycle) as pool:
+        futures = {pool.submit(func, *args, **(kwargs or {})): args for func, args, kwargs in jobs}
+        for fut in as_completed(futures):
+            try:
+                fut.result()
+                done += 1
+            except Exception as e:
+                print(f"[WARN] Plot job {futures[fut]} failed: {e!r}")
+    return done
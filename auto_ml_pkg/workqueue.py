@@ -0,0 +1,462 @@
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from dataclasses import asdict, fields, replace
+
+import numpy as np
+import pandas as pd
+
+# Add project root (/files/auto_ml) to sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))   # folder: auto_ml/auto_ml_pkg
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)                # folder: auto_ml
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Default queue location (any folder on a filesystem shared by the machines works)
+QUEUE_DIR = os.path.join(PROJECT_ROOT, "outputs", "queue")
+STATES = ("pending", "claimed", "done", "failed")
+
+from auto_ml_pkg.config import Config
+from auto_ml_pkg.models import ticker_feature_columns
+from auto_ml_pkg.backtest import backtest_inputs
+from auto_ml_pkg.artifacts import write_frame, read_frame
+
+# Usage (walk-forward fit / predict spread over machines sharing a filesystem):
+#   python auto_ml_pkg/workqueue.py init   /shared/queue --shard-size 50   # coordinator: store + tasks
+#   python auto_ml_pkg/workqueue.py worker /shared/queue                   # on every machine, any number
+#   python auto_ml_pkg/workqueue.py status /shared/queue
+#   python auto_ml_pkg/workqueue.py merge  /shared/queue                   # coordinator: evaluate + backtest + report
+#   python auto_ml_pkg/workqueue.py local  /tmp/queue --workers 4          # all of the above on one machine
+#
+# Queue layout:
+#   config.json                  Config of the run (workers rebuild it from here)
+#   store/                       dates, features and targets as .npy (memory-mapped by workers)
+#   tasks/<state>/<task>.json    one (fold, ticker shard) task; the state is the folder
+#   tasks/claimed/<task>.<token>.json   a claimed task; the token identifies the claim
+#   results/<task>_{pred,real}.npz + <task>.json   prediction shards and their metadata
+#
+# A task is claimed by renaming it from pending/ to claimed/ under a fresh
+# token: rename is atomic on a shared POSIX filesystem, so exactly one worker
+# wins. The claimed file's modification time is the lease; the owner refreshes
+# it from a heartbeat thread. A claim whose lease is older than `lease` seconds
+# (crashed or disconnected worker) is moved back to pending/ by a single rename
+# of that exact file, so of several processes noticing it only one succeeds,
+# and a later claim of the same task (new token) is never touched. The owner
+# completes or fails a task through its own token only: once its claim was
+# requeued, those calls find no file and leave the new claim alone. Results
+# are deterministic and written atomically, so a task that runs twice after
+# a lease expiry writes the same shard twice.
+
+
+# ============================================================
+# Shared feature store (built once by the coordinator)
+# ============================================================
+
+class FeatureStore:
+    """
+    Features and targets of the universe as .npy arrays, opened with memory
+    mapping so that a worker only reads the columns of its ticker shard.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as fh:
+            meta = json.load(fh)
+        self.dates = pd.DatetimeIndex(np.load(os.path.join(path, "dates.npy")), name="Date")
+        self.feature_columns = pd.Index(meta["feature_columns"])
+        self.tickers = pd.Index(meta["tickers"])
+        self._X = np.load(os.path.join(path, "features.npy"), mmap_mode="r")
+        self._Y = np.load(os.path.join(path, "targets.npy"), mmap_mode="r")
+
+    @classmethod
+    def build(cls, path: str, X: pd.DataFrame, Y: pd.DataFrame) -> "FeatureStore":
+        """Store features and targets on the feature index (targets reindexed on it)."""
+        os.makedirs(path, exist_ok=True)
+        Y = Y.reindex(X.index)
+        np.save(os.path.join(path, "dates.npy"), X.index.values)
+        np.save(os.path.join(path, "features.npy"), X.to_numpy())
+        np.save(os.path.join(path, "targets.npy"), Y.to_numpy())
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as fh:
+            json.dump({"feature_columns": list(X.columns), "tickers": list(Y.columns)}, fh)
+        return cls(path)
+
+    def shard(self, tickers) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """(X, Y) restricted to the feature and target columns of `tickers`."""
+        cols = [c for t in tickers for c in ticker_feature_columns(self.feature_columns, t)]
+        ys = [t for t in tickers if t in self.tickers]
+        X = pd.DataFrame(np.asarray(self._X[:, self.feature_columns.get_indexer(cols)]),
+                         index=self.dates, columns=cols)
+        Y = pd.DataFrame(np.asarray(self._Y[:, self.tickers.get_indexer(ys)]), index=self.dates, columns=ys)
+        return X, Y
+
+
+# ============================================================
+# Directory-based task queue
+# ============================================================
+
+def _write_json(path: str, obj: dict) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(obj, fh, indent=2, default=str)
+    os.replace(tmp, path)
+
+
+def _read_json(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+class WorkQueue:
+    """Tasks of one run, one JSON file each, moved between state folders by atomic renames."""
+
+    def __init__(self, root: str):
+        self.root = root
+        for state in STATES:
+            os.makedirs(self._dir(state), exist_ok=True)
+        os.makedirs(os.path.join(root, "results"), exist_ok=True)
+
+    def _dir(self, state: str) -> str:
+        return os.path.join(self.root, "tasks", state)
+
+    def _path(self, state: str, task_id: str) -> str:
+        return os.path.join(self._dir(state), f"{task_id}.json")
+
+    def _claim_path(self, task: dict) -> str:
+        return os.path.join(self._dir("claimed"), f"{task['task_id']}.{task['claim']}.json")
+
+    def task_ids(self, state: str) -> list[str]:
+        return sorted({n[:-5].split(".")[0] for n in os.listdir(self._dir(state)) if n.endswith(".json")})
+
+    def counts(self) -> dict:
+        return {state: len(self.task_ids(state)) for state in STATES}
+
+    def put(self, task: dict) -> None:
+        _write_json(self._path("pending", task["task_id"]), task)
+
+    def claim(self) -> dict | None:
+        """
+        Claim the first pending task still available (None if there is none).
+        The returned task carries its claim token under "claim".
+        """
+        for task_id in self.task_ids("pending"):
+            task = {"task_id": task_id, "claim": uuid.uuid4().hex}
+            target = self._claim_path(task)
+            try:
+                os.rename(self._path("pending", task_id), target)    # atomic: one winner per task
+            except FileNotFoundError:                                 # taken by another worker
+                continue
+            os.utime(target)                                          # the lease starts now
+            return {**_read_json(target), **task}
+        return None
+
+    def heartbeat(self, task: dict) -> bool:
+        """Renew the lease of a claimed task (False if the claim was lost)."""
+        try:
+            os.utime(self._claim_path(task))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def complete(self, task: dict) -> bool:
+        """Move the caller's claim to done/ (False if the claim was lost meanwhile)."""
+        try:
+            os.rename(self._claim_path(task), self._path("done", task["task_id"]))
+            return True
+        except FileNotFoundError:                                     # lease expired; the new owner completes it
+            return False
+
+    def fail(self, task: dict, error: str, max_attempts: int) -> str | None:
+        """
+        Return a failed task to pending/ (or move it to failed/ after
+        `max_attempts`). Returns the new state, or None if the claim was
+        lost meanwhile (the task is then left to its new owner).
+        """
+        claim = self._claim_path(task)
+        task = {k: v for k, v in task.items() if k != "claim"}
+        task.update(attempts=task.get("attempts", 0) + 1, error=error)
+        state = "failed" if task["attempts"] >= max_attempts else "pending"
+        # Take the claim out of claimed/ first (atomic, fails if it was requeued),
+        # then publish the updated task under its final name
+        private = os.path.join(self._dir(state), f"{task['task_id']}.{uuid.uuid4().hex}.tmp")
+        try:
+            os.rename(claim, private)
+        except FileNotFoundError:
+            return None
+        _write_json(private, task)
+        os.rename(private, self._path(state, task["task_id"]))
+        return state
+
+    def requeue_expired(self, lease: float) -> list[str]:
+        """Move claims whose lease is older than `lease` seconds back to pending/."""
+        now, moved = time.time(), []
+        for name in os.listdir(self._dir("claimed")):
+            if not name.endswith(".json"):
+                continue
+            task_id = name.split(".")[0]
+            path = os.path.join(self._dir("claimed"), name)
+            try:
+                if now - os.path.getmtime(path) > lease:
+                    os.rename(path, self._path("pending", task_id))   # this exact claim, once
+                    moved.append(task_id)
+            except FileNotFoundError:                                 # completed or requeued meanwhile
+                continue
+        for task_id in moved:
+            print(f"[WARN] Lease of task {task_id} expired; task returned to the queue.")
+        return moved
+
+
+# ============================================================
+# Coordinator: store, tasks, merge
+# ============================================================
+
+def _load_config(root: str) -> Config:
+    data = _read_json(os.path.join(root, "config.json"))
+    known = {f.name for f in fields(Config)}
+    return replace(Config(), **{k: v for k, v in data.items() if k in known})
+
+
+def init_queue(root: str = QUEUE_DIR, cfg: Config | None = None, shard_size: int | None = None) -> WorkQueue:
+    """
+    Coordinator step 1: compute features and targets once (cached pipeline),
+    write them to the shared store and enqueue one task per (fold, ticker shard).
+    """
+    from auto_ml_pkg.pipeline import make_pipeline
+    from auto_ml_pkg.run_experiment_walkforward import build_walkforward_folds
+
+    cfg = cfg or Config()
+    shard_size = shard_size or cfg.queue_shard_size
+    if os.path.exists(os.path.join(root, "tasks")):
+        raise RuntimeError(f"Queue '{root}' already exists; remove it or use another folder.")
+
+    pipe = make_pipeline(cfg)
+    X, Y = pipe["features"], pipe["targets"]
+    FeatureStore.build(os.path.join(root, "store"), X, Y)
+    _write_json(os.path.join(root, "config.json"), asdict(cfg))
+
+    queue = WorkQueue(root)
+    folds = list(build_walkforward_folds(cfg, X.index))
+    shards = [cfg.tickers[i:i + shard_size] for i in range(0, len(cfg.tickers), shard_size)]
+    for f in folds:
+        for s, tickers in enumerate(shards):
+            queue.put({"task_id": f"f{f.fold:03d}_s{s:05d}", "fold": f.fold, "shard": s,
+                       "tickers": list(tickers), "attempts": 0})
+    print(f"[INFO] Queue '{root}': {len(folds)} folds × {len(shards)} shards = {len(folds) * len(shards)} tasks.")
+    return queue
+
+
+def merge_results(root: str = QUEUE_DIR) -> dict:
+    """
+    Coordinator step 3: assemble the prediction shards of all done tasks into
+    the walk-forward predict-stage output (see folds.aggregate_folds).
+    """
+    from auto_ml_pkg.folds import aggregate_folds
+    from auto_ml_pkg.run_experiment_walkforward import build_walkforward_folds
+
+    cfg = _load_config(root)
+    queue = WorkQueue(root)
+    counts = queue.counts()
+    if counts["pending"] or counts["claimed"]:
+        raise RuntimeError(f"Queue '{root}' is not finished: {counts}.")
+    if counts["failed"]:
+        print(f"[WARN] {counts['failed']} task(s) failed; their tickers are missing from the merge.")
+
+    store = FeatureStore(os.path.join(root, "store"))
+    folds = {f.fold: f for f in build_walkforward_folds(cfg, store.dates)}
+    results = os.path.join(root, "results")
+    parts = {}
+    for task_id in queue.task_ids("done"):
+        meta_path = os.path.join(results, f"{task_id}.json")
+        if not os.path.exists(meta_path):                              # shard without predictions
+            continue
+        meta = _read_json(meta_path)
+        P = read_frame(os.path.join(results, f"{task_id}_pred.npz"), meta["pred"])
+        Yf = read_frame(os.path.join(results, f"{task_id}_real.npz"), meta["real"])
+        parts.setdefault(meta["fold"], []).append((meta["shard"], P, Yf))
+
+    items = []
+    for fold in sorted(parts):
+        shards = sorted(parts[fold], key=lambda p: p[0])
+        items.append({
+            "fold": folds[fold],
+            "P": pd.concat([p[1] for p in shards], axis=1, sort=True),
+            "Y": pd.concat([p[2] for p in shards], axis=1, sort=True),
+        })
+    return aggregate_folds(items)
+
+
+def finish(root: str = QUEUE_DIR, report: bool = True) -> dict:
+    """Merge, then evaluate / backtest / report exactly like the in-memory walk-forward experiment."""
+    from auto_ml_pkg.run_experiment_walkforward import _evaluate, _backtest, _report
+
+    cfg = _load_config(root)
+    pred = merge_results(root)
+    metrics = _evaluate(cfg, pred)
+
+    prices = volumes = None                                            # only the panels the backtest reads
+    need_prices, need_volumes = backtest_inputs(cfg)
+    if need_prices:
+        from auto_ml_pkg.pipeline import make_pipeline
+        pipe = make_pipeline(cfg)
+        prices = pipe["align"]
+        volumes = pipe["volume"] if need_volumes else None
+    bt = _backtest(cfg, pred, prices, volumes)
+    if report:
+        _report(cfg, pred, metrics, bt)
+
+    print("\n==== GLOBAL OUT-OF-SAMPLE METRICS (work queue) ====")
+    for k, v in metrics["reg"].items():
+        print(f"{k}: {v:.6f}")
+    print("IC:", metrics["ic"])
+    return {"pred": pred, "metrics": metrics, "bt": bt}
+
+
+# ============================================================
+# Worker
+# ============================================================
+
+def _run_task(cfg: Config, store: FeatureStore, folds: dict, task: dict, results: str) -> None:
+    from auto_ml_pkg.models import fit_tickers, predict_tickers
+
+    f = folds[task["fold"]]
+    X, Y = store.shard(task["tickers"])
+    models = fit_tickers(X, Y, task["tickers"], f.train, f.test, alpha=cfg.ridge_alpha,
+                         label=f" (fold {f.fold}, shard {task['shard']})",
+                         min_train=cfg.min_train_rows, min_test=cfg.min_test_rows)
+    if not models:
+        return
+    P, Yf = predict_tickers(models, X, Y, f.test)
+    meta = {"task_id": task["task_id"], "fold": task["fold"], "shard": task["shard"]}
+    meta["pred"] = write_frame(os.path.join(results, f"{task['task_id']}_pred.npz"), P)
+    meta["real"] = write_frame(os.path.join(results, f"{task['task_id']}_real.npz"), Yf)
+    _write_json(os.path.join(results, f"{task['task_id']}.json"), meta)
+
+
+def run_worker(                                 # to process tasks until the queue is drained
+    root: str = QUEUE_DIR,                      # queue folder (shared filesystem)
+    lease: float | None = None,                 # lease length in seconds (default: Config.queue_lease_seconds)
+    max_tasks: int | None = None,               # stop after this many tasks (None = until drained)
+    poll: float = 1.0,                          # wait between polls while other workers hold leases
+    max_attempts: int = 3,                      # failures before a task goes to failed/
+) -> int:
+    """
+    Claim, run and complete tasks until none is pending or claimed. Each
+    task fits the shard's tickers on its fold (features and targets read
+    from the memory-mapped store) and writes prediction shards to results/.
+
+    Returns
+    -------
+    int
+        Number of tasks completed by this worker.
+    """
+    from auto_ml_pkg.run_experiment_walkforward import build_walkforward_folds
+
+    cfg = _load_config(root)
+    lease = lease or cfg.queue_lease_seconds
+    queue = WorkQueue(root)
+    store = FeatureStore(os.path.join(root, "store"))
+    folds = {f.fold: f for f in build_walkforward_folds(cfg, store.dates)}
+    results = os.path.join(root, "results")
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+
+    done = 0
+    while max_tasks is None or done < max_tasks:
+        queue.requeue_expired(lease)
+        task = queue.claim()
+        if task is None:
+            if not queue.task_ids("claimed"):
+                break                                                   # drained
+            time.sleep(poll)                                            # others still working (or about to expire)
+            continue
+
+        # Heartbeat: renew the lease while the task runs
+        stop = threading.Event()
+
+        def beat(task=task):
+            while not stop.wait(lease / 3.0):
+                if not queue.heartbeat(task):
+                    return
+
+        beater = threading.Thread(target=beat, daemon=True)
+        beater.start()
+        t0 = time.perf_counter()
+        try:
+            _run_task(cfg, store, folds, task, results)
+        except Exception as e:
+            state = queue.fail(task, repr(e), max_attempts)
+            where = f"moved to {state}/" if state else "lease had expired, left to the new owner"
+            print(f"[WARN] {worker}: task {task['task_id']} failed ({e!r}); {where}.")
+        else:
+            if queue.complete(task):
+                done += 1
+                print(f"[INFO] {worker}: task {task['task_id']} done in {time.perf_counter() - t0:.1f}s.")
+            else:
+                print(f"[WARN] {worker}: lease of task {task['task_id']} expired before it finished; "
+                      f"left to the new owner.")
+        finally:
+            stop.set()
+            beater.join()
+    return done
+
+
+def run_local(root: str, workers: int = 4, cfg: Config | None = None, shard_size: int | None = None,
+              report: bool = True) -> dict:
+    """
+    Whole protocol on one machine: init the queue, start `workers` worker
+    processes (the same command as on remote machines), watch the leases,
+    then merge and report.
+    """
+    cfg = cfg or Config()
+    init_queue(root, cfg, shard_size)
+    cmd = [sys.executable, os.path.abspath(__file__), "worker", root]
+    procs = [subprocess.Popen(cmd) for _ in range(workers)]
+    queue = WorkQueue(root)
+    while any(p.poll() is None for p in procs):
+        queue.requeue_expired(cfg.queue_lease_seconds)
+        time.sleep(1.0)
+    if any(p.returncode for p in procs):
+        print(f"[WARN] Worker exit codes: {[p.returncode for p in procs]}")
+    return finish(root, report=report)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Walk-forward fit / predict through a filesystem work queue.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("init", "Coordinator: build the shared store and enqueue tasks."),
+                            ("worker", "Process tasks until the queue is drained."),
+                            ("status", "Task counts per state."),
+                            ("merge", "Coordinator: merge shards, evaluate, backtest and report."),
+                            ("local", "Init, run local worker processes, then merge.")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("queue", nargs="?", default=QUEUE_DIR)
+        if name in ("init", "local"):
+            p.add_argument("--shard-size", type=int, default=None, help="Tickers per task.")
+        if name == "worker":
+            p.add_argument("--lease", type=float, default=None, help="Lease length in seconds.")
+            p.add_argument("--max-tasks", type=int, default=None)
+        if name == "local":
+            p.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    if args.command == "init":
+        init_queue(args.queue, shard_size=args.shard_size)
+    elif args.command == "worker":
+        n = run_worker(args.queue, lease=args.lease, max_tasks=args.max_tasks)
+        print(f"[INFO] Worker finished after {n} task(s).")
+    elif args.command == "status":
+        print(WorkQueue(args.queue).counts())
+    elif args.command == "merge":
+        finish(args.queue)
+    else:
+        cfg = replace(Config(), plots="off")
+        run_local(args.queue, args.workers, cfg, args.shard_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,19 +6,47 @@ Entry point for the DS-AP capstone project:
 
 Running:
     python main.py
+    python main.py --plots background   # figures rendered by a worker after the metrics
+    python main.py --plots off          # headless, metrics and run artifacts only
+    python main.py --chunk-size 200     # out of core: tickers streamed in batches of 200
+    python main.py --resume             # walk-forward reuses completed fold checkpoints
 
 will:
     1) Run the single train–test split experiment
     2) Run the walk-forward expanding-window experiment
-and save all results under outputs/ (figures + CSV artifacts).
+and save all results under outputs/ (figures + run artifacts).
+
+With `Config.trace` enabled, every stage, download, per-ticker fit,
+backtest and plot is timed (wall, CPU, peak memory); a Chrome trace and a
+summary table are written to outputs/traces/.
+
+With `Config.chunk_size` set, both experiments run out of core instead
+(auto_ml_pkg.chunked): tickers are streamed in batches through features,
+fit and predict, predictions are written to outputs/chunks/ and merged for
+the backtest.
+
+Every walk-forward fold is checkpointed as soon as it is fitted
+(auto_ml_pkg.checkpoints, outputs/checkpoints/); after a failure or an
+interruption, `--resume` reloads the completed folds whose inputs are
+unchanged and only fits the rest.
+
+Both experiments share one stage pipeline (auto_ml_pkg.pipeline): prices,
+benchmark, features and targets are computed once, and every stage output
+is cached under outputs/cache/ so reruns only recompute invalidated stages.
 
 Modules used:
     - auto_ml_pkg.run_experiment_single_split
     - auto_ml_pkg.run_experiment_walkforward
+    - auto_ml_pkg.pipeline
+    - auto_ml_pkg.chunked
+    - auto_ml_pkg.checkpoints
+    - auto_ml_pkg.profiling
 """
 
+import argparse
 import os
 import sys
+from dataclasses import replace
 
 # ---------------------------------------------------------------------
 # 0) Ensure project root is on sys.path
@@ -32,13 +60,24 @@ if CURRENT_DIR not in sys.path:
 # Now we can import from auto_ml_pkg.*
 from auto_ml_pkg.run_experiment_single_split import main as run_single_split
 from auto_ml_pkg.run_experiment_walkforward import main as run_walkforward
+from auto_ml_pkg.config import Config
+from auto_ml_pkg.pipeline import make_pipeline
+from auto_ml_pkg.chunked import run_chunked
+from auto_ml_pkg import profiling
+from auto_ml_pkg.viz import PLOT_MODES, wait_plots
+
+TRACE_DIR = os.path.join(CURRENT_DIR, "outputs", "traces")
 
 
-def main() -> None:
+def main(plots: str | None = None, chunk_size: int | None = None, resume: bool = False) -> None:
     """
     High-level orchestration of the two experiments:
     1) Single train–test split
     2) Walk-forward expanding-window evaluation
+
+    `plots` overrides Config.plots ('sync', 'background' or 'off');
+    `chunk_size` overrides Config.chunk_size (tickers per out-of-core batch);
+    `resume` reuses walk-forward fold checkpoints (Config.resume).
     """
 
     print("=" * 70)
@@ -47,12 +86,30 @@ def main() -> None:
     print("=" * 70)
     print()
 
+    cfg = Config()
+    if plots is not None:
+        cfg = replace(cfg, plots=plots)
+    if chunk_size is not None:
+        cfg = replace(cfg, chunk_size=chunk_size)
+    if resume:
+        cfg = replace(cfg, resume=True)
+    if cfg.trace:
+        profiling.enable(memory=cfg.trace_memory)
+
+    # Shared stage pipeline: upstream data stages run once for both experiments
+    # (chunked mode streams the universe in batches instead)
+    pipe = None if cfg.chunk_size else make_pipeline(cfg)
+
     # -----------------------------------------------------------------
     # 1) Single Train–Test Split
     # -----------------------------------------------------------------
     print(">>> 1/2 Running SINGLE TRAIN–TEST SPLIT experiment...")
     try:
-        run_single_split()
+        with profiling.span("single_split", cat="experiment"):
+            if pipe is None:
+                run_chunked(cfg, "single")
+            else:
+                run_single_split(pipeline=pipe)
         print(">>> Single split experiment completed successfully.\n")
     except Exception as e:
         print("\n[ERROR] Single split experiment failed:")
@@ -65,18 +122,43 @@ def main() -> None:
     # -----------------------------------------------------------------
     print(">>> 2/2 Running WALK-FORWARD experiment (expanding window)...")
     try:
-        run_walkforward()
+        with profiling.span("walkforward", cat="experiment"):
+            if pipe is None:
+                run_chunked(cfg, "walkforward")
+            else:
+                run_walkforward(pipeline=pipe)
         print(">>> Walk-forward experiment completed successfully.\n")
     except Exception as e:
         print("\n[ERROR] Walk-forward experiment failed:")
         print(repr(e))
+        if cfg.checkpoints and not cfg.chunk_size:
+            print("[INFO] Completed folds are checkpointed; rerun with --resume to skip them.")
+
+    # Figures handed to the background worker (plots='background')
+    n_figures = wait_plots()
+    if n_figures:
+        print(f"[INFO] {n_figures} figures rendered in the background.\n")
+
+    tracer = profiling.disable()
+    if tracer is not None:
+        profiling.print_summary(tracer)
+        trace_path, summary_path = tracer.export(TRACE_DIR, "main")
+        print(f"[INFO] Trace written to {trace_path} (summary: {summary_path})\n")
 
     print("=" * 70)
     print(" All experiments finished. Check the 'outputs/' directory for:")
     print("   - figures/   (equity curves, scatter plots, benchmark charts)")
-    print("   - artifacts/ (CSV predictions, realized returns, metrics)")
+    print("   - runs/      (predictions, realized returns, equity, metrics per run ID)")
     print("=" * 70)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the single-split and walk-forward experiments.")
+    parser.add_argument("--plots", choices=PLOT_MODES, default=None,
+                        help="Figures inline (sync), in a background worker, or not at all (off).")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="Stream tickers in batches of this size (out-of-core mode).")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reuse walk-forward fold checkpoints whose inputs are unchanged.")
+    args = parser.parse_args()
+    main(plots=args.plots, chunk_size=args.chunk_size, resume=args.resume)
\ No newline at end of file
@@ -0,0 +1,109 @@
+import os
+import sys
+from dataclasses import replace
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add project root (/files/auto_ml) to sys.path
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))     # folder: auto_ml/tests
+PROJECT_ROOT = os.path.dirname(TESTS_DIR)                  # folder: auto_ml
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from auto_ml_pkg.config import Config
+from auto_ml_pkg.synthetic import synthetic_panel
+
+# Every test runs offline in a sandbox:
+# - yfinance is blocked, so data.fetch_* read the synthetic CSV cache written below
+#   (Date, Close, Volume per ticker) and the benchmark falls back to equal weight;
+# - every output folder (pipeline cache, checkpoints, chunks, runs, artifacts,
+#   figures) points into the test's tmp_path.
+
+N_TICKERS = 8
+
+
+@pytest.fixture(scope="session")
+def panel():
+    """Seeded synthetic prices and volumes (2016-2021) shaped like data.fetch_prices."""
+    return synthetic_panel(n_tickers=N_TICKERS, years=6, seed=7, start="2016-01-01")
+
+
+@pytest.fixture(scope="session")
+def cache_dir(panel, tmp_path_factory):
+    path = tmp_path_factory.mktemp("cache")
+    for t in panel.prices.columns:
+        df = pd.DataFrame({"Close": panel.prices[t], "Volume": panel.volume[t]}).dropna()
+        df.index.name = "Date"
+        df.to_csv(os.path.join(path, f"{t}.csv"))
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def sandbox(cache_dir, tmp_path, monkeypatch):
+    from auto_ml_pkg import chunked, data, pipeline, run_experiment_single_split, run_experiment_walkforward
+    from auto_ml_pkg.checkpoints import FoldCheckpoints
+    from auto_ml_pkg.artifacts import store_run
+
+    monkeypatch.setitem(sys.modules, "yfinance", None)                  # import fails: cache / raw CSV only
+    monkeypatch.setattr(data, "DATA_DIR", cache_dir)
+    monkeypatch.setattr(data, "RAW_DIR", str(tmp_path / "raw"))
+    monkeypatch.setattr(pipeline, "ArtifactCache", partial(pipeline.ArtifactCache, root=str(tmp_path / "cache")))
+    monkeypatch.setattr(chunked, "CHUNKS_DIR", str(tmp_path / "chunks"))
+    monkeypatch.setattr(run_experiment_walkforward, "FoldCheckpoints",
+                        partial(FoldCheckpoints, root=str(tmp_path / "checkpoints")))
+    for module in (run_experiment_single_split, run_experiment_walkforward):
+        monkeypatch.setattr(module, "store_run", partial(store_run, root=str(tmp_path / "runs")))
+    monkeypatch.setattr(run_experiment_single_split, "ARTIFACTS_DIR", str(tmp_path / "artifacts"))
+    monkeypatch.setattr(run_experiment_single_split, "FIGURES_DIR", str(tmp_path / "figures"))
+    monkeypatch.setattr(run_experiment_walkforward, "OUTPUT_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def cfg(panel):
+    """Small Config on the synthetic universe: 4-year single split train, 3 annual walk-forward folds."""
+    return replace(
+        Config(),
+        tickers=list(panel.prices.columns),
+        benchmark="NOBENCH",
+        train_start="2016-01-01",
+        train_end="2019-12-31",
+        test_start="2020-01-01",
+        test_end="2021-12-31",
+        wf_first_test="2019-01-01",
+        pipeline_cache=False,
+        checkpoints=False,
+        plots="off",
+    )
+
+
+def random_panels(n_dates: int = 160, n_tickers: int = 12, nan_share: float = 0.1, seed: int = 0):
+    """Random scores and realized returns with missing values (date × ticker frames)."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2020-01-01", periods=n_dates)
+    tickers = [f"T{i:02d}" for i in range(n_tickers)]
+    R = rng.normal(0.0, 0.02, (n_dates, n_tickers))
+    S = R + rng.normal(0.0, 0.03, (n_dates, n_tickers))
+    S[rng.random(S.shape) < nan_share] = np.nan
+    R[rng.random(R.shape) < nan_share] = np.nan
+    return (pd.DataFrame(S, index=dates, columns=tickers),
+            pd.DataFrame(R, index=dates, columns=tickers))
+
+
+def run_experiment(cfg: Config, experiment: str = "single"):
+    """In-memory pipeline with the experiment's stages up to the backtest (no report)."""
+    from auto_ml_pkg.pipeline import make_pipeline, ensure_stages
+    if experiment == "single":
+        from auto_ml_pkg.run_experiment_single_split import STAGES
+    else:
+        from auto_ml_pkg.run_experiment_walkforward import STAGES
+    stages = [s for s in STAGES if not s.name.endswith(".report")]
+    pipe = make_pipeline(cfg)
+    ensure_stages(pipe, stages)
+    for s in stages:                                                    # stages are computed on access
+        pipe[s.name]
+    return pipe
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import random_panels
+from auto_ml_pkg.backtest import equity_curve, sweep_equity, topk_returns, tranche_equity_curve
+from auto_ml_pkg.costs import CostArrays
+from auto_ml_pkg.evaluate import equity_stats, max_drawdown
+
+
+def reference_equity_curve(pred_scores, future_excess, top_k=5, rebalance_every=5, transaction_cost_bps=0.0):
+    """The original per-date loop of backtest.equity_curve (reference implementation)."""
+    dates = sorted(set(pred_scores.index).intersection(future_excess.index))
+    rets, prev_weights, turnovers = [], None, []
+    for i in range(0, len(dates), rebalance_every):
+        dt = dates[i]
+        p = pred_scores.loc[dt].dropna()
+        y = future_excess.loc[dt].dropna()
+        common = p.index.intersection(y.index)
+        if len(common) < top_k:
+            continue
+        picks = p[common].sort_values(ascending=False).head(top_k).index
+        weights = pd.Series(0.0, index=common)
+        weights[picks] = 1.0 / top_k
+        if prev_weights is None:
+            turnover = 0.0
+        else:
+            w_prev = prev_weights.reindex(weights.index).fillna(0.0)
+            turnover = (weights - w_prev).abs().sum() / 2.0
+        port_excess = (y[picks] * weights[picks]).sum()
+        rets.append((dt, port_excess - transaction_cost_bps / 10000.0 * turnover))
+        turnovers.append(turnover)
+        prev_weights = weights
+    s = pd.Series({d: r for d, r in rets}).sort_index()
+    return (1 + s).cumprod().rename("equity_excess"), np.array(turnovers)
+
+
+@pytest.mark.parametrize("top_k, rebalance_every, cost", [(3, 1, 0.0), (5, 5, 10.0), (11, 3, 25.0)])
+def test_equity_curve_matches_loop(top_k, rebalance_every, cost):
+    S, R = random_panels(nan_share=0.15)
+    ref, _ = reference_equity_curve(S, R, top_k, rebalance_every, cost)
+    ec = equity_curve(S, R, top_k, rebalance_every, cost)
+    pd.testing.assert_series_equal(ec, ref, check_freq=False, rtol=1e-12)
+
+
+def test_equity_curve_float32_inputs():
+    S, R = random_panels()
+    ref, _ = reference_equity_curve(S, R, 4, 2, 5.0)
+    ec = equity_curve(S.astype("float32"), R.astype("float32"), 4, 2, 5.0)
+    np.testing.assert_allclose(ec.to_numpy(), ref.to_numpy(), rtol=1e-5)
+
+
+def test_topk_returns_reports_the_cost_it_charges():
+    S, R = random_panels(nan_share=0.1)
+    S, R = S.to_numpy(), R.to_numpy()
+    rng = np.random.default_rng(5)
+    costs = CostArrays(rng.uniform(0.0, 5e-4, S.shape), rng.uniform(0.0, 1e-3, S.shape))
+    gross, turnover, used, zero = topk_returns(S, R, 4)
+    net, turnover_c, used_c, cost = topk_returns(S, R, 4, 10.0, costs)
+    np.testing.assert_array_equal(used, used_c)
+    np.testing.assert_array_equal(turnover, turnover_c)
+    assert not zero.any() and not cost[~used].any()
+    assert np.all(cost[used] >= 10.0 / 10000.0 * turnover[used])
+    np.testing.assert_allclose(net, gross - cost, rtol=0, atol=1e-15)
+
+
+def test_sweep_matches_equity_curves():
+    S, R = random_panels(nan_share=0.15)
+    top_ks, periods, costs = [2, 5], [1, 4], [0.0, 15.0]
+    table = sweep_equity(S, R, top_ks=top_ks, rebalance_periods=periods, costs_bps=costs).table
+    assert len(table) == len(top_ks) * len(periods) * len(costs)
+    for row in table.itertuples():
+        ref, turnovers = reference_equity_curve(S, R, row.top_k, row.rebalance_every, row.transaction_cost_bps)
+        stats = equity_stats(ref, 252.0 / row.rebalance_every)
+        assert row.n_rebalances == len(ref)
+        assert row.final_equity == pytest.approx(stats["final_equity"], rel=1e-10)
+        assert row.sharpe == pytest.approx(stats["sharpe"], rel=1e-8)
+        assert row.max_drawdown == pytest.approx(stats["max_drawdown"], abs=1e-12)
+        assert row.avg_turnover == pytest.approx(turnovers.mean(), rel=1e-10)
+
+
+def test_tranche_curve_averages_offset_curves():
+    S, R = random_panels(nan_share=0.1)
+    h, k, cost = 4, 3, 10.0
+    book = tranche_equity_curve(S, R, top_k=k, horizon=h, transaction_cost_bps=cost)
+    tranches = [
+        reference_equity_curve(S.iloc[o:], R.iloc[o:], k, h, cost)[0].reindex(S.index).ffill().fillna(1.0)
+        for o in range(h)
+    ]
+    ref = pd.concat(tranches, axis=1, sort=True).mean(axis=1)
+    np.testing.assert_allclose(book.to_numpy(), ref.to_numpy(), rtol=1e-12)
+
+
+def test_tranche_horizon_one_is_daily_rebalancing():
+    S, R = random_panels()
+    book = tranche_equity_curve(S, R, top_k=3, horizon=1, transaction_cost_bps=5.0)
+    ref, _ = reference_equity_curve(S, R, 3, 1, 5.0)
+    np.testing.assert_allclose(book.reindex(ref.index).to_numpy(), ref.to_numpy(), rtol=1e-12)
+
+
+def test_max_drawdown_counts_losses_from_initial_capital():
+    ec = pd.Series([0.9, 0.95, 0.8, 1.1])
+    assert max_drawdown(ec) == pytest.approx(0.8 - 1.0)
+    assert equity_stats(ec, 252)["max_drawdown"] == pytest.approx(0.8 - 1.0)
+    np.testing.assert_allclose(max_drawdown(np.array([[1.2, 0.9], [0.6, 1.0]]), axis=0), [-0.5, -0.1])
@@ -0,0 +1,39 @@
+from dataclasses import replace
+
+import pandas as pd
+import pytest
+
+from conftest import run_experiment
+from auto_ml_pkg import run_experiment_walkforward
+from auto_ml_pkg.checkpoints import list_folds
+
+
+def test_resume_loads_every_fold_without_refitting(cfg, sandbox, monkeypatch):
+    ref = run_experiment(cfg, "walkforward")
+    first = run_experiment(replace(cfg, checkpoints=True), "walkforward")
+    assert len(list_folds(str(sandbox / "checkpoints"))) == len(first["walkforward.fit"])
+
+    def refit(*args, **kwargs):
+        raise AssertionError("fold refitted despite a matching checkpoint")
+
+    monkeypatch.setattr(run_experiment_walkforward, "fit_tickers", refit)
+    resumed = run_experiment(replace(cfg, checkpoints=True, resume=True), "walkforward")
+
+    P = ref["walkforward.predict"]["P_all"]
+    for pipe in (first, resumed):
+        pd.testing.assert_frame_equal(pipe["walkforward.predict"]["P_all"][P.columns], P, check_freq=False)
+        assert pipe["walkforward.evaluate"]["reg"] == pytest.approx(ref["walkforward.evaluate"]["reg"], rel=1e-12)
+
+
+def test_changed_inputs_refit_only_the_moved_folds(cfg, sandbox, monkeypatch):
+    run_experiment(replace(cfg, checkpoints=True), "walkforward")
+    refitted = []
+    fit = run_experiment_walkforward.fit_tickers
+
+    def counting_fit(*args, label="", **kwargs):
+        refitted.append(label)
+        return fit(*args, label=label, **kwargs)
+
+    monkeypatch.setattr(run_experiment_walkforward, "fit_tickers", counting_fit)
+    run_experiment(replace(cfg, checkpoints=True, resume=True, test_end="2021-06-30"), "walkforward")
+    assert refitted == [" (fold 3)"]
@@ -0,0 +1,63 @@
+import json
+import os
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import run_experiment
+from auto_ml_pkg.chunked import run_chunked
+
+
+@pytest.mark.parametrize("chunk_size", [3, 8])
+def test_chunked_single_matches_in_memory(cfg, chunk_size):
+    pipe = run_experiment(cfg, "single")
+    P, Yf = pipe["single.predict"]
+    out = run_chunked(cfg, "single", chunk_size=chunk_size, report=False)
+    P_c, Y_c = out["pred"]
+    pd.testing.assert_frame_equal(P_c[P.columns], P, check_freq=False, rtol=1e-10)
+    pd.testing.assert_frame_equal(Y_c[Yf.columns], Yf, check_freq=False, rtol=1e-10)
+    pd.testing.assert_series_equal(out["bt"]["ec"], pipe["single.backtest"]["ec"], check_freq=False, rtol=1e-10)
+
+
+def test_chunked_walkforward_matches_in_memory(cfg):
+    pipe = run_experiment(cfg, "walkforward")
+    pred = pipe["walkforward.predict"]
+    out = run_chunked(cfg, "walkforward", chunk_size=3, report=False)
+    P = pred["P_all"]
+    pd.testing.assert_frame_equal(out["pred"]["P_all"][P.columns], P, check_freq=False, rtol=1e-10)
+    assert out["metrics"]["reg"] == pytest.approx(pipe["walkforward.evaluate"]["reg"], rel=1e-10)
+    pd.testing.assert_series_equal(out["bt"]["ec"], pipe["walkforward.backtest"]["ec"], check_freq=False, rtol=1e-10)
+
+
+@pytest.mark.parametrize("overrides", [
+    {"weighting": "inverse_vol"},
+    {"construction": "rank_ls", "neutral": "beta"},
+    {"cost_model": "volume"},
+])
+def test_chunked_backtest_inputs_match_in_memory(cfg, overrides):
+    cfg = replace(cfg, **overrides)
+    pipe = run_experiment(cfg, "walkforward")
+    out = run_chunked(cfg, "walkforward", chunk_size=3, report=False)
+    pd.testing.assert_series_equal(out["bt"]["ec"], pipe["walkforward.backtest"]["ec"], check_freq=False, rtol=1e-10)
+
+
+def test_chunked_panels_are_memory_mapped_shards(cfg):
+    cfg = replace(cfg, cost_model="volume")
+    out = run_chunked(cfg, "single", chunk_size=3, report=False)
+    files = os.listdir(out["out_dir"])
+    assert {"prices.npy", "volumes.npy", "manifest.json"} <= set(files)
+    assert not [f for f in files if f.endswith(".tmp")]
+    with open(os.path.join(out["out_dir"], "manifest.json"), encoding="utf-8") as fh:
+        shards = json.load(fh)["shards"]
+    assert {s["file"] for s in shards} <= set(files)
+
+    panel = np.load(os.path.join(out["out_dir"], "prices.npy"), mmap_mode="r")
+    pipe = run_experiment(cfg, "single")
+    np.testing.assert_array_equal(panel, pipe["align"].to_numpy())
+
+
+def test_flat_equal_weight_runs_write_no_panels(cfg):
+    out = run_chunked(cfg, "single", chunk_size=3, report=False)
+    assert not {"prices.npy", "volumes.npy"} & set(os.listdir(out["out_dir"]))
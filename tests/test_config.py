@@ -0,0 +1,116 @@
+import os
+from dataclasses import fields, replace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import N_TICKERS, run_experiment
+from auto_ml_pkg import profiling
+from auto_ml_pkg.config import Config
+
+TICKERS = [f"SYN{i:04d}" for i in range(N_TICKERS)]
+
+# (Config overrides, how to run them); every Config option is set to a non-default value at least once
+SMOKE = [
+    ({"tickers": TICKERS[:5]}, "single"),
+    ({"benchmark": TICKERS[-1]}, "single"),
+    ({"horizon_days": 3}, "single"),
+    ({"ridge_alpha": 0.5}, "single"),
+    ({"train_start": "2017-01-01", "train_end": "2019-06-30",
+      "test_start": "2019-07-01", "test_end": "2021-06-30"}, "single"),
+    ({"top_k": 3, "transaction_cost_bps": 0.0}, "single"),
+    ({"tranche_mode": True}, "single"),
+    ({"n_placebos": 5, "seed": 1}, "walkforward"),
+    ({"weighting": "inverse_vol", "cov_window": 40}, "single"),
+    ({"weighting": "min_variance", "cov_halflife": 20.0, "cov_shrinkage": 0.5}, "single"),
+    ({"weighting": "risk_parity"}, "single"),
+    ({"pipeline_cache": True}, "cache"),
+    ({"wf_first_test": "2020-01-01"}, "walkforward"),
+    *[({"wf_cadence": c}, "walkforward") for c in ("quarterly", "monthly", "weekly")],
+    ({"wf_window": "rolling", "wf_train_days": 500}, "walkforward"),
+    ({"wf_purge_days": 10, "wf_embargo_days": 5}, "walkforward"),
+    ({"min_train_rows": 200, "min_test_rows": 5}, "walkforward"),
+    ({"trace": True}, "trace"),
+    ({"trace": True, "trace_memory": False}, "trace"),
+    *[({"plots": p}, "report") for p in ("sync", "background", "off")],
+    *[({"artifacts": a}, "report") for a in ("csv", "both")],
+    ({"dtype": "float32"}, "single"),
+    ({"dtype": "float32"}, "walkforward"),
+    ({"chunk_size": 3}, "chunked"),
+    ({"chunk_size": 3, "weighting": "inverse_vol"}, "chunked"),
+    ({"queue_shard_size": 2, "queue_lease_seconds": 30.0}, "queue"),
+    *[({"construction": c}, "single") for c in ("rank", "score", "rank_ls", "score_ls")],
+    ({"construction": "long_short", "top_k": 3}, "single"),                  # 2 × top_k names needed
+    ({"construction": "rank_ls", "neutral": "dollar"}, "single"),
+    ({"construction": "score_ls", "neutral": "beta", "beta_window": 30}, "single"),
+    ({"max_turnover": 0.2}, "single"),
+    ({"construction": "rank_ls", "max_turnover": 0.2}, "walkforward"),
+    ({"construction": "rank_ls", "neutral": "beta", "chunk_size": 3}, "chunked"),
+    ({"construction": "rank_ls", "neutral": "beta", "queue_shard_size": 3}, "queue"),
+    ({"checkpoints": True}, "walkforward"),
+    ({"checkpoints": True, "resume": True}, "walkforward"),
+    ({"cost_model": "volume", "cost_window": 10, "impact_coef": 2.0, "portfolio_notional": 1e8}, "single"),
+    ({"cost_model": "volume", "spread_table": "spreads.csv"}, "walkforward"),
+    ({"cost_model": "volume", "n_placebos": 5}, "walkforward"),
+    ({"cost_model": "volume", "chunk_size": 3}, "chunked"),
+    ({"cost_model": "volume"}, "queue"),
+]
+
+
+def test_every_config_field_is_covered():
+    covered = {k for overrides, _ in SMOKE for k in overrides}
+    assert covered == {f.name for f in fields(Config)}
+
+
+def _run(cfg, mode: str, root) -> pd.Series:
+    """Equity curve of the smoke run."""
+    if mode in ("single", "walkforward"):
+        return run_experiment(cfg, mode)[f"{mode}.backtest"]["ec"]
+    if mode == "cache":
+        run_experiment(cfg, "single")
+        pipe = run_experiment(cfg, "single")                            # second run: every stage from the cache
+        return pipe["single.backtest"]["ec"]
+    if mode == "trace":
+        profiling.enable(memory=cfg.trace_memory)
+        try:
+            ec = run_experiment(cfg, "walkforward")["walkforward.backtest"]["ec"]
+        finally:
+            tracer = profiling.disable()
+        paths = tracer.export(str(root / "traces"), "smoke")
+        assert all(os.path.getsize(p) for p in paths)
+        assert not tracer.summary().empty
+        return ec
+    if mode == "report":
+        from auto_ml_pkg import run_experiment_single_split, run_experiment_walkforward
+        from auto_ml_pkg.viz import wait_plots
+        run_experiment_single_split.main(cfg)
+        run_experiment_walkforward.main(cfg)
+        wait_plots()
+        figures = [root / "figures" / "equity_curve.png", root / "figures" / "equity_curve_walkforward.png"]
+        assert all(os.path.exists(f) for f in figures) == (cfg.plots != "off")
+        assert os.path.isdir(root / "runs") == (cfg.artifacts != "csv")
+        assert os.path.isdir(root / "artifacts") == (cfg.artifacts != "binary")
+        return pd.Series([1.0])
+    if mode == "chunked":
+        from auto_ml_pkg.chunked import run_chunked
+        return run_chunked(cfg, "walkforward", report=False)["bt"]["ec"]
+    if mode == "queue":
+        from auto_ml_pkg.workqueue import finish, init_queue, run_worker
+        init_queue(str(root / "queue"), cfg)
+        run_worker(str(root / "queue"), poll=0.01)
+        return finish(str(root / "queue"), report=False)["bt"]["ec"]
+    raise ValueError(mode)
+
+
+@pytest.mark.parametrize("overrides, mode", SMOKE, ids=[
+    f"{mode}-" + "-".join(f"{k}={v}" for k, v in overrides.items()) for overrides, mode in SMOKE])
+def test_config_option_smoke(cfg, sandbox, overrides, mode):
+    if "spread_table" in overrides:
+        path = sandbox / overrides["spread_table"]
+        pd.DataFrame({"ticker": TICKERS[:3], "spread_bps": [2.0, 5.0, 30.0]}).to_csv(path, index=False)
+        overrides = {**overrides, "spread_table": str(path)}
+    if overrides.get("resume"):
+        run_experiment(replace(cfg, checkpoints=True), "walkforward")
+    ec = _run(replace(cfg, **overrides), mode, sandbox)
+    assert len(ec) and np.isfinite(ec.to_numpy(dtype=float)).all()
@@ -0,0 +1,39 @@
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from auto_ml_pkg import data
+from auto_ml_pkg.data import equal_weight_benchmark, fetch_prices, fetch_volumes
+
+
+def test_equal_weight_benchmark_starts_at_100_and_skips_gaps():
+    prices = pd.DataFrame(
+        {"A": [10.0, 11.0, np.nan, 12.1, 13.31], "B": [20.0, 20.0, 22.0, 24.2, 24.2]},
+        index=pd.bdate_range("2021-01-04", periods=5),
+    )
+    ew = equal_weight_benchmark(prices)
+    # day 1: mean(10%, 0%); days 2-3: A has no return around its gap, B alone; day 4: mean(10%, 0%)
+    expected = 100.0 * np.cumprod([1.0, 1.05, 1.10, 1.10, 1.05])
+    np.testing.assert_allclose(ew.to_numpy(), expected, rtol=1e-12)
+    assert ew.name == "EQUAL_WEIGHT_BENCH"
+
+
+def test_fetch_aligns_tickers_with_different_calendars(sandbox, monkeypatch):
+    """Staggered histories are joined on the sorted union of dates, without a pandas concat warning."""
+    monkeypatch.setattr(data, "DATA_DIR", str(sandbox / "data"))
+    os.makedirs(data.RAW_DIR)
+    dates = pd.bdate_range("2021-01-04", periods=6)
+    for ticker, rows in (("LATE", dates[2:]), ("EARLY", dates[:4])):
+        df = pd.DataFrame({"Close": np.arange(len(rows)) + 10.0, "Volume": 1e6}, index=rows[::-1])
+        df.index.name = "Date"
+        df.to_csv(os.path.join(data.RAW_DIR, f"{ticker}.csv"))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        prices = fetch_prices(["LATE", "EARLY"], "2021-01-01", "2021-12-31")
+        volumes = fetch_volumes(["LATE", "EARLY"], "2021-01-01", "2021-12-31")
+    for frame in (prices, volumes):
+        assert frame.index.equals(dates) and list(frame.columns) == ["LATE", "EARLY"]
+    assert prices["LATE"].isna().sum() == 2 and prices["EARLY"].isna().sum() == 2
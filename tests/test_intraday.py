@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from auto_ml_pkg.intraday import resample_bars
+from auto_ml_pkg.synthetic import synthetic_bars
+
+
+def reference_resample(bars: pd.DataFrame, freq: str) -> dict:
+    """Per-ticker pandas resample (daily, or weeks ending on Friday) of the same statistics."""
+    rule = {"D": "D", "W": "W-FRI"}[freq]
+    out = {}
+    for ticker, g in bars.groupby("ticker", observed=True):
+        g = g.sort_index()
+        r = np.log(g["close"]).groupby(g.index.normalize()).diff().fillna(0.0)   # intraday only
+        stats = pd.DataFrame({
+            "open": g["open"].resample(rule).first(),
+            "high": g["high"].resample(rule).max(),
+            "low": g["low"].resample(rule).min(),
+            "close": g["close"].resample(rule).last(),
+            "volume": g["volume"].resample(rule).sum(),
+            "rv": (r ** 2).resample(rule).sum(),
+            "n_bars": g["close"].resample(rule).count().astype(float),
+        })
+        out[str(ticker)] = stats[stats["n_bars"] > 0]
+    return {name: pd.DataFrame({t: s[name] for t, s in out.items()}) for name in next(iter(out.values())).columns}
+
+
+@pytest.mark.parametrize("freq", ["D", "W"])
+def test_resample_matches_pandas(freq):
+    bars = synthetic_bars(n_tickers=4, days=15, interval="30min", seed=1)
+    bars = bars.drop(bars.sample(frac=0.05, random_state=0).index[:50])          # ragged sessions
+    panels = resample_bars(bars, freq).as_dict()
+    ref = reference_resample(bars, freq)
+    for name, expected in ref.items():
+        got = panels[name]
+        expected = expected.reindex(index=got.index, columns=got.columns)
+        np.testing.assert_allclose(got.to_numpy(), expected.to_numpy(), rtol=1e-12, atol=1e-15, err_msg=name)
+
+
+def test_weekly_realized_variance_is_sum_of_daily():
+    bars = synthetic_bars(n_tickers=3, days=20, interval="1h", seed=2)
+    daily = resample_bars(bars, "D").rv
+    weekly = resample_bars(bars, "W").rv
+    ref = daily.groupby(daily.index.to_period("W-FRI").end_time.normalize()).sum()
+    np.testing.assert_allclose(weekly.to_numpy(), ref.to_numpy(), rtol=1e-12)
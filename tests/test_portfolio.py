@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from auto_ml_pkg.backtest import _turnover
+from auto_ml_pkg.portfolio import CONSTRUCTIONS, LONG_ONLY, construct_weights, scale_legs
+
+
+def _scores(n_rows=120, n_tickers=15, missing=0.15, seed=3):
+    rng = np.random.default_rng(seed)
+    return rng.normal(size=(n_rows, n_tickers)), rng.random((n_rows, n_tickers)) > missing
+
+
+@pytest.mark.parametrize("construction", CONSTRUCTIONS)
+@pytest.mark.parametrize("cap", [0.05, 0.3])
+def test_turnover_cap_holds_on_a_static_universe(construction, cap):
+    S, _ = _scores(missing=0.0)
+    valid = np.ones_like(S, dtype=bool)
+    W = construct_weights(S, valid, construction, top_k=4, max_turnover=cap)
+    used = (W != 0).any(axis=-1)
+    assert _turnover(W, valid, used).max() <= cap + 1e-12
+
+
+@pytest.mark.parametrize("construction", CONSTRUCTIONS)
+def test_turnover_cap_under_universe_changes(construction):
+    """Turnover stays within max(cap, turnover forced by rescaling what is left of the book)."""
+    S, valid = _scores()
+    cap, long_only = 0.1, construction in LONG_ONLY
+    W = construct_weights(S, valid, construction, top_k=4, max_turnover=cap)
+    T = construct_weights(S, valid, construction, top_k=4)
+    used = (W != 0).any(axis=-1)
+    turnover = _turnover(W, valid, used)
+
+    prev = np.where(valid[1:], W[:-1], 0.0)
+    base = scale_legs(prev, long_only)
+    base = np.where((base != 0).any(axis=-1, keepdims=True), base, T[1:])
+    forced = np.abs(base - prev).sum(axis=-1) / 2.0
+    assert np.all(turnover[1:] <= np.maximum(cap, forced) + 1e-12)
+
+    net = W[used].sum(axis=-1)
+    np.testing.assert_allclose(net, 1.0 if long_only else 0.0, atol=1e-12)
+
+
+@pytest.mark.parametrize("construction", CONSTRUCTIONS)
+def test_turnover_cap_that_never_binds_returns_the_targets(construction):
+    S, valid = _scores()
+    cap = 1.0 if construction in LONG_ONLY else 2.0
+    np.testing.assert_array_equal(construct_weights(S, valid, construction, top_k=4, max_turnover=cap),
+                                  construct_weights(S, valid, construction, top_k=4))
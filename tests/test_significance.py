@@ -0,0 +1,59 @@
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import random_panels, run_experiment
+from auto_ml_pkg.backtest import equity_curve
+from auto_ml_pkg.config import Config
+from auto_ml_pkg.costs import CostModel
+from auto_ml_pkg.significance import placebo_supported, placebo_test
+
+
+def _cost_model(S: pd.DataFrame, seed: int = 4) -> CostModel:
+    rng = np.random.default_rng(seed)
+    table = pd.DataFrame({"spread_bps": rng.uniform(2.0, 30.0, S.shape[1]), "fx_bps": 1.0}, index=S.columns)
+    sigma = pd.DataFrame(rng.uniform(0.01, 0.03, S.shape), index=S.index, columns=S.columns)
+    adv = pd.DataFrame(rng.uniform(1e6, 1e8, S.shape), index=S.index, columns=S.columns)
+    return CostModel(table=table, sigma=sigma, adv_usd=adv)
+
+
+@pytest.mark.parametrize("with_costs", [False, True])
+def test_observed_statistic_is_the_backtested_strategy(with_costs):
+    S, R = random_panels(nan_share=0.1)
+    cost_model = _cost_model(S) if with_costs else None
+    ec = equity_curve(S, R, top_k=4, rebalance_every=3, transaction_cost_bps=10.0, cost_model=cost_model)
+    summary = placebo_test(S, R, top_k=4, rebalance_every=3, transaction_cost_bps=10.0,
+                           cost_model=cost_model, n_placebos=20, seed=0).summary
+    observed = summary.loc[summary["metric"] == "final_equity", "observed"]
+    np.testing.assert_allclose(observed.to_numpy(), ec.iloc[-1], rtol=1e-12)
+
+
+def test_costs_are_charged_to_the_nulls():
+    S, R = random_panels()
+    flat = placebo_test(S, R, top_k=4, n_placebos=30, kinds=("random",), seed=1).nulls["random"]
+    costly = placebo_test(S, R, top_k=4, cost_model=_cost_model(S), n_placebos=30,
+                          kinds=("random",), seed=1).nulls["random"]
+    assert (costly["final_equity"] < flat["final_equity"]).all()
+
+
+def test_placebo_count_is_validated():
+    S, R = random_panels()
+    with pytest.raises(ValueError, match="n_placebos"):
+        placebo_test(S, R, n_placebos=0)
+
+
+def test_placebo_supported_configs():
+    assert placebo_supported(Config())
+    assert placebo_supported(replace(Config(), cost_model="volume"))
+    for overrides in ({"construction": "rank"}, {"weighting": "inverse_vol"}, {"tranche_mode": True},
+                      {"construction": "rank_ls", "neutral": "dollar"}, {"max_turnover": 0.2}):
+        assert not placebo_supported(replace(Config(), **overrides))
+
+
+def test_walkforward_skips_placebos_it_cannot_reproduce(cfg):
+    bt = run_experiment(replace(cfg, n_placebos=5), "walkforward")["walkforward.backtest"]
+    assert set(bt["placebo"]["kind"]) == {"shuffle", "random", "shift"}
+    bt = run_experiment(replace(cfg, n_placebos=5, construction="rank"), "walkforward")["walkforward.backtest"]
+    assert bt["placebo"] is None
@@ -0,0 +1,58 @@
+import os
+from dataclasses import replace
+
+import pytest
+
+from conftest import run_experiment
+from auto_ml_pkg import run_sweep
+from auto_ml_pkg.evaluate import equity_stats
+
+RUN_VARIANT = run_sweep.run_variant
+
+
+def crash_on_bad_variant(variant: dict) -> dict:
+    """run_variant stand-in whose worker process dies on the variant named 'bad'."""
+    if variant["name"] == "bad":
+        os._exit(1)
+    return RUN_VARIANT(variant)
+
+
+def _variants(cfg):
+    return [
+        {"name": "full", "experiment": "single", "overrides": {}},
+        {"name": "subset", "experiment": "single",
+         "overrides": {"tickers": cfg.tickers[2:7], "train_start": "2017-03-01"}},
+        {"name": "wf", "experiment": "walkforward", "overrides": {"tickers": cfg.tickers[:5]}},
+    ]
+
+
+def _base(variants, cfg):
+    """Variants on top of the test Config (run_sweep starts from Config())."""
+    fixed = {k: getattr(cfg, k) for k in ("tickers", "benchmark", "train_start", "train_end", "test_start",
+                                          "test_end", "wf_first_test", "plots")}
+    return [{**v, "overrides": {**fixed, **v["overrides"]}} for v in variants]
+
+
+def test_variants_match_standalone_runs(cfg, sandbox, monkeypatch):
+    monkeypatch.setattr(run_sweep, "SWEEPS_DIR", str(sandbox / "sweeps"))
+    variants = _base(_variants(cfg), cfg)
+    summary = run_sweep.run_sweep(variants, name="t", workers=2).set_index("name")
+    assert not summary["error"].any()
+
+    for v in variants:
+        alone = run_experiment(replace(cfg, **v["overrides"]), v["experiment"])
+        metrics = alone[f"{v['experiment']}.evaluate"]
+        ec = alone[f"{v['experiment']}.backtest"]["ec"]
+        row = summary.loc[v["name"]]
+        assert row["R2"] == pytest.approx(metrics["reg"]["R2"], rel=1e-10)
+        assert row["final_equity"] == pytest.approx(equity_stats(ec, 252.0 / cfg.horizon_days)["final_equity"], rel=1e-10)
+
+
+def test_crashed_worker_keeps_finished_results(cfg, sandbox, monkeypatch):
+    monkeypatch.setattr(run_sweep, "SWEEPS_DIR", str(sandbox / "sweeps"))
+    monkeypatch.setattr(run_sweep, "run_variant", crash_on_bad_variant)
+    variants = _base(_variants(cfg)[:1] + [{"name": "bad", "experiment": "single", "overrides": {}}], cfg)
+    summary = run_sweep.run_sweep(variants, name="t", workers=1).set_index("name")
+    assert summary.loc["full", "error"] == ""
+    assert "BrokenProcessPool" in summary.loc["bad", "error"]
+    assert os.path.exists(sandbox / "sweeps" / "t" / "summary.csv")
@@ -0,0 +1,47 @@
+import os
+from dataclasses import replace
+
+import pandas as pd
+import pytest
+
+from conftest import run_experiment
+from auto_ml_pkg.workqueue import WorkQueue, finish, init_queue, run_worker
+
+
+@pytest.mark.parametrize("overrides", [{}, {"construction": "rank_ls", "neutral": "beta"}, {"cost_model": "volume"}])
+def test_queue_matches_in_memory_walkforward(cfg, sandbox, overrides):
+    cfg = replace(cfg, **overrides)
+    pipe = run_experiment(cfg, "walkforward")
+    root = str(sandbox / "queue")
+    init_queue(root, cfg, shard_size=3)
+    assert run_worker(root, poll=0.01) == WorkQueue(root).counts()["done"]
+    out = finish(root, report=False)
+
+    P = pipe["walkforward.predict"]["P_all"]
+    pd.testing.assert_frame_equal(out["pred"]["P_all"][P.columns], P, check_freq=False, rtol=1e-10)
+    assert out["metrics"]["reg"] == pytest.approx(pipe["walkforward.evaluate"]["reg"], rel=1e-10)
+    pd.testing.assert_series_equal(out["bt"]["ec"], pipe["walkforward.backtest"]["ec"], check_freq=False, rtol=1e-10)
+
+
+def test_expired_claim_cannot_touch_the_new_claim(tmp_path):
+    queue = WorkQueue(str(tmp_path))
+    queue.put({"task_id": "f000_s00000", "attempts": 0})
+    first = queue.claim()
+    old = os.path.getmtime(queue._claim_path(first)) - 60.0
+    os.utime(queue._claim_path(first), (old, old))
+
+    assert queue.requeue_expired(lease=10.0) == ["f000_s00000"]
+    assert queue.requeue_expired(lease=10.0) == []                     # requeued once
+    second = queue.claim()
+    assert second["claim"] != first["claim"]
+
+    assert not queue.heartbeat(first)
+    assert not queue.complete(first)
+    assert queue.fail(first, "late", max_attempts=3) is None
+    assert queue.counts() == {"pending": 0, "claimed": 1, "done": 0, "failed": 0}
+
+    assert queue.fail(second, "boom", max_attempts=3) == "pending"
+    third = queue.claim()
+    assert third["attempts"] == 1 and third["error"] == "boom"
+    assert queue.complete(third)
+    assert queue.counts() == {"pending": 0, "claimed": 0, "done": 1, "failed": 0}